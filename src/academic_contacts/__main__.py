@@ -0,0 +1,19 @@
+#!/usr/bin/python3
+import sys
+
+
+def main():
+    # Subcomandos de linha de comando não carregam a interface gráfica
+    if len(sys.argv) > 1 and sys.argv[1] == "export":
+        from academic_contacts.cli import main as cli_main
+        sys.exit(cli_main(sys.argv[1:]))
+
+    from academic_contacts.desktop import handle_desktop_args
+    if handle_desktop_args(sys.argv[1:]):
+        return
+
+    from academic_contacts.program import main as gui_main
+    gui_main()
+
+if __name__ == "__main__":
+    main()
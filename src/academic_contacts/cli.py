@@ -0,0 +1,167 @@
+#!/usr/bin/python3
+'''
+Exportação em lote, sem interface gráfica (não importa PyQt5).
+
+academic-contacts export --format elsevier file.AcademicContacts.json
+academic-contacts export --format mdpi --select 3,1,2 file.AcademicContacts.json
+academic-contacts export --format mdpi --lists manuscripts.txt -o out/{name}.tex file.AcademicContacts.json
+'''
+import os
+import sys
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import academic_contacts.about as about
+from academic_contacts.modules.latex    import EXPORTERS
+from academic_contacts.modules.jsonio   import iter_contact_chunks
+from academic_contacts.modules.sqlstore import SqliteContactStore, DB_SUFFIX
+
+
+def load_contacts(path):
+    if path.endswith(DB_SUFFIX):
+        store = SqliteContactStore(path)
+        try:
+            return list(store)
+        finally:
+            store.close()
+    contacts = []
+    for chunk, _, _ in iter_contact_chunks(path):
+        contacts.extend(chunk)
+    return contacts
+
+
+def parse_selection(text, contacts, emails):
+    """
+    Converte "3,1,ana@uni.edu" na lista de contatos correspondente.
+    Cada item é uma posição (a partir de 1) ou um email.
+    """
+    selected = []
+    for item in text.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        if item.isdigit():
+            pos = int(item)
+            if not 1 <= pos <= len(contacts):
+                raise ValueError(f"position {pos} out of range (1-{len(contacts)})")
+            selected.append(contacts[pos - 1])
+        elif item.lower() in emails:
+            selected.append(emails[item.lower()])
+        else:
+            raise ValueError(f"no contact with email '{item}'")
+    return selected
+
+
+def read_lists(path):
+    """
+    Lê um arquivo com uma lista de autores por linha, no formato
+    "nome: 3,1,ana@uni.edu". Linhas vazias e iniciadas por # são ignoradas.
+    """
+    lists = []
+    with open(path, "r", encoding="utf-8") as f:
+        for number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            name, sep, selection = line.partition(":")
+            if not sep:
+                raise ValueError(f"{path}:{number}: expected 'name: selection'")
+            lists.append((name.strip(), selection.strip()))
+    return lists
+
+
+def export_one(job):
+    """
+    Executa uma exportação; roda nos processos do pool.
+    """
+    fmt, name, contacts = job
+    try:
+        return name, EXPORTERS[fmt](contacts), None
+    except Exception as e:
+        return name, None, str(e)
+
+
+def run_export(args):
+    contacts = load_contacts(args.file)
+    emails = {}
+    for contact in contacts:
+        # O arquivo pode trazer "email": null (ou um número): vale como texto
+        email = str(contact.get("email") or "").strip().lower()
+        if email:
+            emails.setdefault(email, contact)
+
+    if args.lists:
+        named = read_lists(args.lists)
+    elif args.select:
+        named = [(str(n), selection) for n, selection in enumerate(args.select, start=1)]
+    else:
+        named = [("all", None)]
+
+    # Uma seleção inválida só invalida a sua própria lista
+    jobs = []
+    invalid = {}
+    for index, (name, selection) in enumerate(named):
+        try:
+            selected = contacts if selection is None else parse_selection(selection, contacts, emails)
+            jobs.append((args.format, name, selected))
+        except ValueError as e:
+            invalid[index] = (name, None, str(e))
+
+    if args.jobs > 1 and len(jobs) > 1:
+        pool = ProcessPoolExecutor(max_workers=args.jobs)
+        exported = pool.map(export_one, jobs, chunksize=max(1, len(jobs) // (4 * args.jobs)))
+    else:
+        pool = None
+        exported = map(export_one, jobs)
+
+    # map devolve na ordem dos jobs; cada resultado sai assim que fica pronto
+    results = (invalid[index] if index in invalid else next(exported) for index in range(len(named)))
+
+    status = 0
+    try:
+        for index, (name, text, error) in enumerate(results, start=1):
+            if error is not None:
+                print(f"{about.__program_name__}: {name}: {error}", file=sys.stderr)
+                status = 1
+                continue
+            if args.output:
+                path = args.output.format(name=name, index=index)
+                if os.path.dirname(path):
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(text + "\n")
+            else:
+                if len(named) > 1:
+                    sys.stdout.write(f"% --- {name} ---\n")
+                sys.stdout.write(text + "\n")
+                sys.stdout.flush()
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return status
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog=about.__program_name__,
+                                     description=about.__description__)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export = subparsers.add_parser("export", help="export LaTeX author blocks without opening the GUI")
+    export.add_argument("file", help="*.AcademicContacts.json (or .db) file")
+    export.add_argument("--format", required=True, choices=sorted(EXPORTERS), help="journal template")
+    group = export.add_mutually_exclusive_group()
+    group.add_argument("--select", action="append", metavar="LIST",
+                       help="comma separated positions (from 1) or emails, in author order; repeat for several lists")
+    group.add_argument("--lists", metavar="FILE",
+                       help="file with one 'name: positions/emails' author list per line")
+    export.add_argument("-o", "--output", metavar="PATTERN",
+                        help="write each list to a file instead of stdout; may use {name} and {index}")
+    export.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="number of processes used for several lists (default: all CPUs)")
+
+    args = parser.parse_args(argv)
+    try:
+        return run_export(args)
+    except (OSError, ValueError) as e:
+        print(f"{about.__program_name__}: {e}", file=sys.stderr)
+        return 2
@@ -1,9 +1,10 @@
 import os
 import academic_contacts.about as about
-import subprocess
 
 
 def update_desktop_database(desktop_path):
+    import subprocess
+    
     applications_dir = os.path.expanduser(desktop_path)
     try:
         subprocess.run(
@@ -91,6 +92,25 @@ def create_desktop_menu(directory_name = "ResearchTools",
             f.write(desktop_entry)
         print(f"File {path} created.")
 
+def create_desktop_entries(desktop_path='~/.local/share/applications', overwrite=False):
+    create_desktop_directory(overwrite = overwrite)
+    create_desktop_menu(overwrite = overwrite)
+    create_desktop_file(desktop_path, overwrite = overwrite)
+
+def handle_desktop_args(argv):
+    """
+    Trata --autostart e --applications (sem abrir a janela).
+    Retorna True se algum deles foi usado.
+    """
+    for arg in argv:
+        if arg == "--autostart":
+            create_desktop_entries('~/.config/autostart', overwrite=True)
+            return True
+        if arg == "--applications":
+            create_desktop_entries('~/.local/share/applications', overwrite=True)
+            return True
+    return False
+
 if __name__ == '__main__':
     create_desktop_menu()
     create_desktop_directory()
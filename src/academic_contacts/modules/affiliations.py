@@ -0,0 +1,95 @@
+#!/usr/bin/python3
+import re
+import unicodedata
+
+# Abreviações comuns nos nomes de instituições (já sem pontuação)
+ABBREVIATIONS = {
+    "univ": "university", "uni": "university", "universidade": "university", "universidad": "university",
+    "inst": "institute", "instituto": "institute",
+    "dept": "department", "dep": "department", "depto": "department", "departamento": "department",
+    "lab": "laboratory", "labs": "laboratories",
+    "natl": "national", "nat": "national",
+    "fed": "federal",
+    "ctr": "center", "centre": "center", "cent": "center",
+    "sch": "school",
+    "tech": "technology", "technol": "technology",
+}
+
+# Palavras de ligação que não distinguem instituições
+STOPWORDS = frozenset({"of", "the", "and", "de", "da", "do", "dos", "das", "del", "la", "di", "für"})
+
+_WORD = re.compile(r"\w+")
+
+def normalize(text):
+    """
+    Forma canônica de um campo: sem acentos, minúsculas, sem pontuação,
+    com as abreviações expandidas e sem palavras de ligação.
+    """
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    words = (ABBREVIATIONS.get(word, word) for word in _WORD.findall(text))
+    return " ".join(word for word in words if word not in STOPWORDS)
+
+
+# Campos que descrevem uma afiliação
+AFFILIATION_FIELDS = ("organization", "addressline", "city", "postcode", "state", "country")
+
+
+def _words(value):
+    # Palavras normalizadas de um campo, em qualquer ordem
+    return frozenset(normalize(value if isinstance(value, str) else str(value)).split())
+
+
+class AffiliationIndex:
+    """
+    Agrupa as afiliações iguais dos contatos. Só entram os campos que o
+    formato de exportação imprime (`fields`), e dois valores de um campo
+    são iguais se têm as mesmas palavras depois de normalize() (acentos,
+    maiúsculas, pontuação, espaços e abreviações), em qualquer ordem.
+    Nomes apenas parecidos ("Electrical" e "Electronic") continuam em
+    grupos diferentes.
+
+    Os resultados são guardados pelos valores dos campos, então editar
+    um contato só faz recalcular a afiliação dele.
+    """
+    def __init__(self):
+        self._groups = {}     # (campos, valores crus) -> grupo
+        self._canonical = {}  # (campos, palavras de cada valor) -> grupo
+        self._next_group = 1
+
+    def group(self, contact, fields=AFFILIATION_FIELDS):
+        """
+        Número (estável durante a sessão) do grupo de afiliação do contato.
+        """
+        raw = (fields, tuple(contact.get(field, "") for field in fields))
+        group = self._groups.get(raw)
+        if group is None:
+            key = (fields, tuple(_words(value) for value in raw[1]))
+            group = self._canonical.get(key)
+            if group is None:
+                group = self._canonical[key] = self._next_group
+                self._next_group += 1
+            self._groups[raw] = group
+        return group
+
+    def number(self, contacts, fields=AFFILIATION_FIELDS):
+        """
+        Numera as afiliações de `contacts` (pelos campos `fields`) a partir
+        de 1, na ordem em que aparecem. Retorna (número de cada contato, posição do primeiro
+        contato de cada afiliação).
+        """
+        numbers = []
+        first = []
+        seen = {}   # grupo -> número
+        for pos, contact in enumerate(contacts):
+            group = self.group(contact, fields)
+            number = seen.get(group)
+            if number is None:
+                number = seen[group] = len(first) + 1
+                first.append(pos)
+            numbers.append(number)
+        return numbers, first
+
+
+# Índice compartilhado por todos os formatos de exportação
+AFFILIATIONS = AffiliationIndex()
@@ -0,0 +1,152 @@
+#!/usr/bin/python3
+import json
+
+from academic_contacts.modules.jsonio   import atomic_write
+from academic_contacts.modules.filesync import identity_key
+from academic_contacts.modules.latex    import TEMPLATES
+
+AUTHORS_SUFFIX = ".authors"
+
+
+class AuthorList:
+    """
+    Lista nomeada de autores de um manuscrito: IDs de contatos na ordem
+    dos autores e a posição do autor correspondente nessa lista. Os
+    contatos não são copiados; o texto exportado fica em cache por
+    modelo e só é refeito quando um dos contatos da lista muda.
+    """
+    def __init__(self, name, ids=(), corresponding=0):
+        self.name = name
+        self.ids = list(ids)
+        self.corresponding = corresponding
+        self._cache = {}   # nome do modelo -> (carimbo, texto)
+
+    def _stamp(self, store):
+        return (self.corresponding,) + tuple((cid, store.contact_version(cid)) for cid in self.ids)
+
+    def missing(self, store):
+        """
+        IDs da lista que não estão mais em `store`.
+        """
+        return [cid for cid in self.ids if not store.has_id(cid)]
+
+    def export(self, store, template):
+        """
+        Bloco LaTeX da lista no modelo `template` (nome em TEMPLATES).
+        """
+        stamp = self._stamp(store)
+        cached = self._cache.get(template)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        missing = self.missing(store)
+        if missing:
+            raise ValueError(f"A lista '{self.name}' tem {len(missing)} autor(es) que não estão mais nos contatos")
+        if not self.ids:
+            return ""
+        text = TEMPLATES[template].render([store.get(cid) for cid in self.ids], corresponding=self.corresponding)
+        self._cache[template] = (stamp, text)
+        return text
+
+
+class AuthorLists:
+    """
+    As listas de autores de um arquivo de contatos, gravadas ao lado
+    dele (*.AcademicContacts.json.authors). No arquivo cada autor é
+    guardado pela posição do contato e pela sua identidade (ORCID, email
+    ou nome), que confirma a posição ao abrir ou a substitui se o
+    arquivo de contatos foi mudado por fora.
+    """
+    def __init__(self):
+        self.lists = []
+
+    def __iter__(self):
+        return iter(self.lists)
+
+    def __len__(self):
+        return len(self.lists)
+
+    def names(self):
+        return [author_list.name for author_list in self.lists]
+
+    def get(self, name):
+        for author_list in self.lists:
+            if author_list.name == name:
+                return author_list
+        return None
+
+    def add(self, name, ids=(), corresponding=0):
+        author_list = AuthorList(name, ids, corresponding)
+        self.lists.append(author_list)
+        return author_list
+
+    def remove(self, name):
+        self.lists = [author_list for author_list in self.lists if author_list.name != name]
+
+    def to_data(self, store):
+        """
+        Conteúdo do arquivo para o estado atual de `store` (tirado junto
+        com os contatos que vão ser salvos). Autores apagados ficam de fora.
+        """
+        lists = []
+        for author_list in self.lists:
+            authors = []
+            corresponding = 0
+            for n, cid in enumerate(author_list.ids):
+                if not store.has_id(cid):
+                    continue
+                if n == author_list.corresponding:
+                    corresponding = len(authors)
+                key = identity_key(store.get(cid))
+                authors.append({"pos": store.position(cid), "key": list(key) if key else None})
+            lists.append({"name": author_list.name, "authors": authors, "corresponding": corresponding})
+        return {"lists": lists}
+
+    def save(self, path, data):
+        atomic_write(path, json.dumps(data, ensure_ascii=False, indent=1).encode("utf-8"))
+
+    def load(self, path, store):
+        """
+        Lê as listas gravadas por save() para os contatos de `store`.
+        Retorna quantos autores não foram encontrados.
+        """
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        return self.from_data(data, store)
+
+    def from_data(self, data, store):
+        """
+        Troca as listas pelas de `data` (de to_data()), com os IDs de
+        `store`. Retorna quantos autores não foram encontrados.
+        """
+        self.lists = []
+        by_identity = None
+        lost = 0
+        for entry in data.get("lists", []):
+            ids = []
+            corresponding = 0
+            for n, author in enumerate(entry.get("authors", [])):
+                pos = author.get("pos")
+                key = tuple(author["key"]) if author.get("key") else None
+                cid = None
+                if isinstance(pos, int) and 0 <= pos < len(store):
+                    cid = store.id_at(pos)
+                    if key is not None and identity_key(store.get(cid)) != key:
+                        cid = None
+                if cid is None and key is not None:
+                    if by_identity is None:
+                        # Só quando o arquivo mudou por fora
+                        by_identity = {}
+                        for other, contact in store.items():
+                            by_identity.setdefault(identity_key(contact), other)
+                    cid = by_identity.get(key)
+                if cid is None:
+                    lost += 1
+                    continue
+                if n == entry.get("corresponding", 0):
+                    corresponding = len(ids)
+                ids.append(cid)
+            self.add(entry.get("name", ""), ids, corresponding)
+        return lost
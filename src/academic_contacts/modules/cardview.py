@@ -0,0 +1,589 @@
+import html
+from collections import OrderedDict
+
+from PyQt5.QtWidgets import QListView, QStyledItemDelegate, QAbstractItemView, QStyle
+from PyQt5.QtGui import QColor, QFont, QFontMetrics, QPalette, QPen, QTextDocument
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QPoint, QRect, QRectF, QSize, pyqtSignal
+
+from academic_contacts.modules.orcid   import orcid_is_valid
+from academic_contacts.modules.sorting import GroupHeader
+
+# Papel (role) com que a view obtém o ID estável do contato
+ContactIdRole = Qt.UserRole + 1
+
+
+class ContactListModel(QAbstractListModel):
+    """
+    Modelo de lista sobre os contatos visíveis (já filtrados).
+    Guarda apenas os IDs dos contatos do ContactStore, nunca cópias.
+    O texto dos cards pintados recentemente fica pronto em cache, por
+    versão do contato: só um card alterado é montado de novo.
+
+    Com uma CardOrder (ordenação ou grupos) `matching` guarda os IDs que
+    casam com o filtro na ordem do arquivo e `rows` é a ordem da tela,
+    com um GroupHeader antes de cada grupo; sem ela `rows` já é a ordem
+    do arquivo e as alterações são aplicadas linha a linha.
+    """
+    CACHE_SIZE = 512
+    # Até este número de linhas a altura de cada card é medida (campos
+    # longos quebram em várias linhas); acima, todos têm field_count linhas
+    MEASURED_ROWS = 5000
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.store = None
+        self.rows = []
+        self.field_count = 0
+        self._cards = OrderedDict()   # ID -> (versão, fonte, documento, ORCID válido)
+        self.order = None      # CardOrder ativa
+        self.matching = []     # com ordem: IDs que casam com o filtro, na ordem do arquivo
+        self.numbers = None    # com grupos: (posição no grupo, tamanho do grupo) por linha
+        self._arranged = 0     # len(matching) na última ordenação
+        self._shown = set()    # IDs de `rows` (ou de `matching`, com ordem)
+        self._heights = {}     # ID -> (versão, fonte, largura, altura do texto)
+        self._metrics = None   # [fonte, QFontMetrics em negrito, largura de cada caractere, a maior]
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.rows):
+            return None
+
+        item = self.rows[index.row()]
+        if isinstance(item, GroupHeader):
+            if role == Qt.DisplayRole:
+                arrow = "▸" if item.key in self.order.collapsed else "▾"
+                return f"{arrow} {item.title} ({item.count})"
+            return None
+
+        if role == Qt.DisplayRole:
+            if self.numbers is not None:
+                return "{}/{}".format(*self.numbers[index.row()])
+            return f"{index.row() + 1}/{len(self.rows)}"
+        if role == ContactIdRole:
+            return item
+        return None
+
+    def flags(self, index):
+        if index.isValid() and self.is_header(index.row()):
+            return Qt.ItemIsEnabled
+        return super().flags(index)
+
+    def is_header(self, row):
+        return isinstance(self.rows[row], GroupHeader)
+
+    def shown_ids(self):
+        """
+        IDs que a lista mostra (inclusive os dos grupos recolhidos).
+        Mantido a cada alteração: não deve ser modificado por quem chama.
+        """
+        return self._shown
+
+    def contact_at(self, row):
+        # Acesso direto: passar o dict por QVariant o converteria (e ordenaria as chaves)
+        return self.store.get(self.rows[row])
+
+    def card(self, row, font):
+        """
+        (QTextDocument com os campos, ORCID válido) do card da linha `row`.
+        """
+        cid = self.rows[row]
+        version = self.store.contact_version(cid)
+        cached = self._cards.get(cid)
+        if cached is not None and cached[0] == version and cached[1] == font:
+            self._cards.move_to_end(cid)
+            return cached[2], cached[3]
+
+        contact = self.store.get(cid)
+        # Os valores vêm do arquivo: nada deles é interpretado como HTML
+        info = "<br>".join(f"<b>{html.escape(str(k).capitalize())}</b>: {html.escape(str(v))}"
+                           for k, v in contact.items())
+        doc = QTextDocument()
+        doc.setDefaultFont(font)
+        doc.setDocumentMargin(0)
+        doc.setHtml(info)
+        valid = orcid_is_valid(contact)
+        self._cards[cid] = (version, QFont(font), doc, valid)
+        self._cards.move_to_end(cid)
+        if len(self._cards) > self.CACHE_SIZE:
+            self._cards.popitem(last=False)
+        return doc, valid
+
+    def measured(self):
+        return len(self.rows) <= self.MEASURED_ROWS
+
+    def text_height(self, row, font, width):
+        """
+        Altura do texto do card da linha `row` com as linhas quebradas
+        na largura `width`.
+        """
+        cid = self.rows[row]
+        cached = self._heights.get(cid)
+        if not self.store.has_id(cid):
+            # Já apagado, ainda na lista até update_contacts: um layout
+            # pendente pode pedir a sua altura antes disso
+            return cached[3] if cached is not None else 0
+        version = self.store.contact_version(cid)
+        if cached is not None and cached[0] == version and cached[2] == width and cached[1] == font:
+            return cached[3]
+        height = self._measure(cid, font, width)
+        self._heights[cid] = (version, QFont(font), width, height)
+        return height
+
+    def heights_changed(self, ids, font, width):
+        """
+        True se o texto de algum dos contatos `ids` (já editados) mudou de altura.
+        """
+        for cid in ids:
+            cached = self._heights.get(cid)
+            if cached is not None and self._measure(cid, font, width) != cached[3]:
+                return True
+        return False
+
+    def _measure(self, cid, font, width):
+        # Medido em negrito (como os nomes dos campos), sem montar o
+        # documento: na dúvida sobra espaço, mas o texto não é cortado
+        if self._metrics is None or self._metrics[0] != font:
+            bold = QFont(font)
+            bold.setBold(True)
+            self._metrics = [QFont(font), QFontMetrics(bold), {}, 0]
+        metrics = self._metrics
+        fm, advances = metrics[1], metrics[2]
+        lines = [f"{str(key).capitalize()}: {value}" for key, value in self.store.get(cid).items()]
+        for char in set("".join(lines)).difference(advances):
+            advances[char] = fm.horizontalAdvance(char)
+            metrics[3] = max(metrics[3], advances[char])
+        # Larguras dos caracteres (em cache) somadas dão um limite por cima:
+        # só as linhas que podem quebrar são medidas pelo Qt
+        if max(map(len, lines), default=0) * metrics[3] <= width:
+            return len(lines) * fm.lineSpacing()
+        height = 0
+        for line in lines:
+            if len(line) * metrics[3] <= width or sum(map(advances.__getitem__, line)) <= width:
+                height += fm.lineSpacing()
+            else:
+                height += fm.boundingRect(QRect(0, 0, max(width, 1), 1 << 20), Qt.TextWordWrap, line).height()
+        return height
+
+    def _arrange(self):
+        self.rows, self.numbers = self.order.arrange(self.store, self.matching)
+        self._arranged = len(self.matching)
+
+    def set_rows(self, store, rows):
+        self.beginResetModel()
+        if store is not self.store:
+            self._cards.clear()
+            self._heights.clear()
+            if self.order is not None:
+                self.order.clear()
+        self.store = store
+        self._shown = set(rows)
+        if self.order is not None:
+            self.matching = rows
+            self._arrange()
+        else:
+            self.rows = rows
+        self.field_count = store.field_count()
+        self.endResetModel()
+
+    def set_order(self, order):
+        """
+        Passa a mostrar os cards na ordem `order` (None: ordem do arquivo).
+        """
+        matching = self.matching if self.order is not None else self.rows
+        self.beginResetModel()
+        self.order = order if order is not None and order.active() else None
+        if self.order is not None and self.store is not None:
+            self.matching = matching
+            self._arrange()
+        else:
+            self.rows = matching
+            self.matching = []
+            self.numbers = None
+        self.endResetModel()
+
+    def toggle_group(self, row):
+        self.beginResetModel()
+        self.order.toggle(self.rows[row])
+        self._arrange()
+        self.endResetModel()
+
+    def flush(self):
+        """
+        Ordena os contatos acrescentados desde a última ordenação.
+        """
+        if self.order is not None and len(self.matching) != self._arranged:
+            self.beginResetModel()
+            self._arrange()
+            self.endResetModel()
+
+    def update_order(self, changed, removed, inserted):
+        """
+        Com ordem: aplica as alterações em `matching` e reordena se algum
+        contato entrou, saiu ou mudou de lugar. Retorna True nesse caso.
+        """
+        removed = set(removed) & self._shown
+        if removed:
+            self.matching = [cid for cid in self.matching if cid not in removed]
+            self._shown -= removed
+        present = self._shown
+        changed = [cid for cid in changed if cid in present]
+        inserted = [cid for cid in inserted if cid not in present]
+        for cid in sorted(inserted, key=self.store.position):
+            self.matching.insert(self._row_for_position(self.store.position(cid), self.matching), cid)
+        present.update(inserted)
+        if not (removed or inserted or self.order.moved(self.store, changed)):
+            return False
+        self.beginResetModel()
+        self._arrange()
+        self.endResetModel()
+        return True
+
+    def append_rows(self, rows):
+        if not rows:
+            return
+        self._shown.update(rows)
+        if self.order is not None:
+            # Durante a leitura: reordena só quando a lista dobra de tamanho
+            self.matching.extend(rows)
+            if len(self.matching) >= 2 * self._arranged:
+                self.flush()
+            return
+        first = len(self.rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self.rows.extend(rows)
+        field_count = self.store.field_count()
+        self.endInsertRows()
+
+        if field_count > self.field_count:
+            self.field_count = field_count
+            self.layoutChanged.emit()
+        # Os títulos mostram o total de linhas
+        if first > 0:
+            self.dataChanged.emit(self.index(0), self.index(first - 1), [Qt.DisplayRole])
+
+    def _row_for_position(self, pos, rows=None):
+        # `rows` (self.rows) segue a ordem do store: busca binária pela posição
+        rows = self.rows if rows is None else rows
+        lo, hi = 0, len(rows)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.store.position(rows[mid]) < pos:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def insert_ids(self, ids):
+        """
+        Mostra os contatos `ids` (ainda fora da lista) nas suas posições.
+        """
+        self._shown.update(ids)
+        if len(ids) > self.MAX_BLOCK_UPDATES:
+            self.beginResetModel()
+            self.rows = sorted(self.rows + list(ids), key=self.store.position)
+            self.endResetModel()
+            return
+        for cid in sorted(ids, key=self.store.position):
+            row = self._row_for_position(self.store.position(cid))
+            self.beginInsertRows(QModelIndex(), row, row)
+            self.rows.insert(row, cid)
+            self.endInsertRows()
+
+    # Acima disso, inserir ou remover linha a linha custa mais que refazer a lista
+    MAX_BLOCK_UPDATES = 64
+
+    def remove_ids(self, ids):
+        """
+        Tira os contatos `ids` da lista, um bloco de linhas seguidas por vez
+        (ou tudo de uma vez, se os blocos forem muitos).
+        """
+        ids = set(ids)
+        self._shown -= ids
+        if len(ids) > self.MAX_BLOCK_UPDATES:
+            self.beginResetModel()
+            self.rows = [cid for cid in self.rows if cid not in ids]
+            self.endResetModel()
+            return
+        row = len(self.rows) - 1
+        while row >= 0:
+            if self.rows[row] in ids:
+                last = row
+                while row > 0 and self.rows[row - 1] in ids:
+                    row -= 1
+                self.beginRemoveRows(QModelIndex(), row, last)
+                del self.rows[row:last + 1]
+                self.endRemoveRows()
+            row -= 1
+
+    def refresh_layout(self, titles=True):
+        """
+        Depois de inserções e remoções: altura dos cards e títulos (i/N).
+        """
+        field_count = self.store.field_count()
+        if field_count != self.field_count:
+            self.field_count = field_count
+            self.layoutChanged.emit()
+        if titles and self.rows:
+            self.dataChanged.emit(self.index(0), self.index(len(self.rows) - 1), [Qt.DisplayRole])
+
+
+class ContactCardDelegate(QStyledItemDelegate):
+    """
+    Desenha um card por linha. Só é chamado para as linhas visíveis,
+    então o custo de pintura depende do viewport e não do tamanho da lista.
+    """
+    MARGIN  = 4
+    PADDING = 8
+    BUTTON  = 25
+    WARNING = QColor("#c62828")
+
+    def body_width(self, width):
+        # Largura do texto de um card numa linha de largura `width`
+        return width - 2 * self.MARGIN - 2 * self.PADDING
+
+    def card_rect(self, rect):
+        return rect.adjusted(self.MARGIN, self.MARGIN, -self.MARGIN, -self.MARGIN)
+
+    def button_rect(self, rect, fm):
+        card = self.card_rect(rect)
+        return QRect(card.right() - self.PADDING - self.BUTTON,
+                     card.top() + self.PADDING,
+                     self.BUTTON,
+                     fm.height())
+
+    def sizeHint(self, option, index):
+        fm = option.fontMetrics
+        if index.model().is_header(index.row()):
+            return QSize(option.rect.width(), fm.height() + 2 * self.PADDING + 2 * self.MARGIN)
+        model = index.model()
+        if model.measured():
+            body = model.text_height(index.row(), option.font, self.body_width(self.parent().viewport().width()))
+        else:
+            body = model.field_count * fm.lineSpacing()
+        height = fm.height() + body + 3 * self.PADDING + 2 * self.MARGIN
+        return QSize(option.rect.width(), height)
+
+    def paint_header(self, painter, option, index):
+        # Título do grupo (clique para recolher ou abrir)
+        card = self.card_rect(option.rect)
+        title_font = QFont(option.font)
+        title_font.setBold(True)
+        painter.save()
+        painter.setFont(title_font)
+        painter.setPen(option.palette.color(QPalette.Text))
+        painter.drawText(card.adjusted(self.PADDING, 0, -self.PADDING, 0), Qt.AlignLeft | Qt.AlignVCenter,
+                         index.data(Qt.DisplayRole))
+        painter.setPen(option.palette.color(QPalette.Mid))
+        painter.drawLine(card.bottomLeft(), card.bottomRight())
+        painter.restore()
+
+    def paint(self, painter, option, index):
+        if index.model().is_header(index.row()):
+            self.paint_header(painter, option, index)
+            return
+        doc, orcid_valid = index.model().card(index.row(), option.font)
+        fm = option.fontMetrics
+        card = self.card_rect(option.rect)
+
+        painter.save()
+        painter.setClipRect(option.rect)
+
+        # Moldura do card (destacada se o card estiver selecionado)
+        if option.state & QStyle.State_Selected:
+            highlight = option.palette.color(QPalette.Highlight)
+            painter.setPen(QPen(highlight, 2))
+            highlight.setAlpha(40)
+            painter.setBrush(option.palette.brush(QPalette.Base))
+            painter.drawRoundedRect(card, 4, 4)
+            painter.setBrush(highlight)
+        else:
+            painter.setPen(option.palette.color(QPalette.Mid))
+            painter.setBrush(option.palette.brush(QPalette.Base))
+        painter.drawRoundedRect(card, 4, 4)
+
+        # Título (posição/total) e botão do menu
+        title_font = QFont(option.font)
+        title_font.setBold(True)
+        painter.setFont(title_font)
+        painter.setPen(option.palette.color(QPalette.Text))
+        title_rect = QRect(card.left() + self.PADDING,
+                           card.top() + self.PADDING,
+                           card.width() - 3 * self.PADDING - self.BUTTON,
+                           fm.height())
+        painter.drawText(title_rect, Qt.AlignLeft | Qt.AlignVCenter, index.data(Qt.DisplayRole))
+        painter.drawText(self.button_rect(option.rect, fm), Qt.AlignCenter, "⋮")
+        if not orcid_valid:
+            # Não vai para a exportação enquanto não for corrigido
+            painter.setPen(self.WARNING)
+            painter.drawText(title_rect, Qt.AlignRight | Qt.AlignVCenter, "⚠ invalid ORCID")
+
+        # Info display
+        body_width = card.width() - 2 * self.PADDING
+        body_height = card.bottom() - title_rect.bottom() - 2 * self.PADDING
+        # Campos longos quebram na largura do card em vez de serem cortados
+        doc.setTextWidth(body_width)
+        painter.translate(card.left() + self.PADDING, title_rect.bottom() + self.PADDING)
+        doc.drawContents(painter, QRectF(0, 0, body_width, body_height))
+
+        painter.restore()
+
+
+class CardListView(QListView):
+    """
+    Lista de cards. O botão ⋮ é localizado por hit testing sobre o
+    retângulo da linha; o clique direito abre o mesmo menu. Vários cards
+    podem ser selecionados com Ctrl (alterna) e Shift (intervalo).
+    """
+    menuRequested = pyqtSignal(int, object)   # contact ID, global QPoint
+
+    # Acima disso o layout é sempre feito em lotes (update_layout_mode)
+    BATCHED_ROWS = 100000
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.card_model = ContactListModel(self)
+        self.card_delegate = ContactCardDelegate(self)
+        self.setModel(self.card_model)
+        self.setItemDelegate(self.card_delegate)
+        self.setUniformItemSizes(True)
+        self.setBatchSize(2000)
+        # A altura dos cards medidos depende da largura
+        self.setResizeMode(QListView.Adjust)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.setMouseTracking(True)
+
+    def menu_button_at(self, pos):
+        index = self.indexAt(pos)
+        if not index.isValid() or self.card_model.is_header(index.row()):
+            return None, None
+        button = self.card_delegate.button_rect(self.visualRect(index), QFontMetrics(self.font()))
+        return index, button
+
+    def mousePressEvent(self, event):
+        # O botão ⋮ não mexe na seleção: o menu age sobre os cards selecionados
+        index, button = self.menu_button_at(event.pos())
+        if index is not None and event.button() == Qt.LeftButton and button.contains(event.pos()):
+            event.accept()
+            return
+        super().mousePressEvent(event)
+
+    def mouseReleaseEvent(self, event):
+        header = self.indexAt(event.pos())
+        if header.isValid() and self.card_model.is_header(header.row()) and event.button() == Qt.LeftButton:
+            self.card_model.toggle_group(header.row())
+            return
+        index, button = self.menu_button_at(event.pos())
+        if index is not None and event.button() == Qt.LeftButton and button.contains(event.pos()):
+            global_pos = self.viewport().mapToGlobal(button.bottomLeft())
+            self.menuRequested.emit(index.data(ContactIdRole), global_pos)
+            return
+        super().mouseReleaseEvent(event)
+
+    def mouseMoveEvent(self, event):
+        index, button = self.menu_button_at(event.pos())
+        if index is not None and button.contains(event.pos()):
+            self.viewport().setCursor(Qt.PointingHandCursor)
+            self.setToolTip("Card menu")
+        else:
+            self.viewport().unsetCursor()
+            self.setToolTip("")
+        super().mouseMoveEvent(event)
+
+    def contextMenuEvent(self, event):
+        index = self.indexAt(event.pos())
+        if index.isValid() and not self.card_model.is_header(index.row()):
+            self.menuRequested.emit(index.data(ContactIdRole), event.globalPos())
+
+    def selected_ids(self):
+        """
+        IDs dos cards selecionados, na ordem da lista.
+        """
+        rows = sorted(index.row() for index in self.selectionModel().selectedRows())
+        return [self.card_model.rows[row] for row in rows if not self.card_model.is_header(row)]
+
+    def set_contacts(self, store, rows):
+        self.card_model.set_rows(store, rows)
+        self.update_layout_mode()
+
+    def append_contacts(self, rows):
+        self.card_model.append_rows(rows)
+        self.update_layout_mode()
+
+    def set_order(self, order):
+        self.card_model.set_order(order)
+        self.update_layout_mode()
+
+    def update_layout_mode(self):
+        # Títulos de grupo são mais baixos que os cards, e numa lista
+        # pequena cada card tem a sua altura. Sem tamanho uniforme a view
+        # pergunta a altura de cada linha: em lotes, para não travar a janela.
+        # Numa lista enorme também: mesmo com tamanho uniforme o Qt consulta
+        # o modelo (rowCount) a cada linha, e isso leva segundos
+        model = self.card_model
+        grouped = model.order is not None and bool(model.order.group)
+        uniform = not grouped and not model.measured()
+        batched = not uniform or len(model.rows) > self.BATCHED_ROWS
+        if uniform != self.uniformItemSizes() or batched != (self.layoutMode() == QListView.Batched):
+            self.setUniformItemSizes(uniform)
+            self.setLayoutMode(QListView.Batched if batched else QListView.SinglePass)
+
+    def finish_appending(self):
+        self.card_model.flush()
+
+    def repaint_ids(self, ids):
+        """
+        Repinta os cards visíveis dos contatos `ids`. O modelo não expõe
+        os campos (o delegate os lê do store), então nada muda para a
+        view além da pintura: um dataChanged faria o QListView refazer o
+        layout de todas as linhas.
+        """
+        rows = self.card_model.rows
+        top = self.indexAt(QPoint(0, 0)).row()
+        if top < 0:
+            return
+        bottom = self.indexAt(QPoint(0, self.viewport().height() - 1)).row()
+        if bottom < 0:
+            bottom = len(rows) - 1
+        for row in range(top, bottom + 1):
+            if rows[row] in ids:
+                self.update(self.card_model.index(row))
+
+    def update_contacts(self, changed=(), removed=(), inserted=()):
+        """
+        Aplica alterações pontuais sem recriar a lista: `changed` são IDs
+        a repintar, `removed` IDs a tirar e `inserted` IDs a mostrar. O
+        card do topo continua no mesmo lugar da tela.
+        """
+        model = self.card_model
+        anchor = self.indexAt(QPoint(0, 0))
+        anchor_id = anchor.data(ContactIdRole) if anchor.isValid() else None
+        anchor_top = self.visualRect(anchor).top() if anchor.isValid() else 0
+
+        if model.order is not None:
+            moved = model.update_order(changed, removed, inserted)
+        else:
+            moved = bool(removed or inserted)
+            if removed:
+                model.remove_ids(removed)
+            if inserted:
+                model.insert_ids(inserted)
+        if removed or inserted or changed:
+            # Depois de reordenar (reset) os títulos já estão certos
+            model.refresh_layout(titles=moved and model.order is None)
+        self.update_layout_mode()
+        if changed and not moved:
+            width = self.card_delegate.body_width(self.viewport().width())
+            if model.measured() and model.heights_changed(changed, self.font(), width):
+                self.scheduleDelayedItemsLayout()
+            self.repaint_ids(set(changed))
+
+        if anchor_id is not None and moved and anchor_id in model.rows:
+            self.doItemsLayout()
+            index = model.index(model.rows.index(anchor_id))
+            bar = self.verticalScrollBar()
+            bar.setValue(bar.value() + self.visualRect(index).top() - anchor_top)
@@ -1,33 +1,110 @@
 import os
 import json
+import threading
 
-def verify_default_config(path,default_content={}):
+from academic_contacts.modules.jsonio   import atomic_write
+from academic_contacts.modules.filesync import file_signature
+
+
+class Config:
     """
-    Cria o arquivo JSON no caminho especificado com conteúdo padrão,
-    criando diretórios intermediários se necessário.
+    Configuração do programa (config.json) mantida em memória. O arquivo
+    só é lido no primeiro acesso; um arquivo corrompido é guardado como
+    config.json.bad e trocado pelos valores padrão. As alterações são
+    gravadas juntas (e de forma atômica) um pouco depois da última, numa
+    thread, ou na hora com flush(). Troque os valores (listas inclusive)
+    em vez de alterá-los no lugar.
     """
+    DELAY = 0.5   # segundos entre a última alteração e a gravação
 
-    # Se o arquivo não existir, cria com o conteúdo padrão
-    if not os.path.exists(path):
-        # Garante que os diretórios existam
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(default_content, f, ensure_ascii=False, indent=4)
+    def __init__(self, path, defaults=None, delay=DELAY):
+        self.path = path
+        self.defaults = dict(defaults or {})
+        self.delay = delay
+        self._data = None
+        self._signature = None   # (mtime, tamanho) do arquivo lido ou gravado
+        self._dirty = set()      # chaves alteradas ainda não gravadas
+        self._timer = None
+        self._lock = threading.RLock()
 
+    def _read(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError):
+            data = None
+        if not isinstance(data, dict):
+            # Não trava o programa: o arquivo fica guardado para conserto
+            try:
+                os.replace(self.path, self.path + ".bad")
+            except OSError:
+                pass
+            return {}
+        self._signature = file_signature(self.path)
+        return data
 
-# Lê o JSON no início do programa
-def load_config(config_path):
-    with open(config_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    def _loaded(self):
+        with self._lock:
+            if self._data is None:
+                self._data = self._read()
+            return self._data
 
-def save_config(path,content):
-    """
-    Cria o arquivo JSON no caminho especificado com conteúdo padrão,
-    criando diretórios intermediários se necessário.
-    """
+    def get(self, key, default=None):
+        data = self._loaded()
+        if key in data:
+            return data[key]
+        return self.defaults.get(key, default)
+
+    def __getitem__(self, key):
+        data = self._loaded()
+        return data[key] if key in data else self.defaults[key]
+
+    def __contains__(self, key):
+        return key in self._loaded() or key in self.defaults
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            data = self._loaded()
+            if key in data and data[key] == value:
+                return
+            data[key] = value
+            self._dirty.add(key)
+            self._schedule()
+
+    def update(self, values):
+        for key, value in values.items():
+            self[key] = value
+
+    def _schedule(self):
+        if self._timer is None:
+            self._timer = threading.Timer(self.delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
 
-    # Garante que os diretórios existam
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, 'w', encoding='utf-8') as f:
-        json.dump(content, f, ensure_ascii=False, indent=4)
-    
+    def flush(self):
+        """
+        Grava agora as alterações pendentes.
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return
+            data = self._data
+            current = file_signature(self.path)
+            if current is not None and current != self._signature:
+                # Editado à mão desde a leitura: fica o que não mudou aqui
+                fresh = self._read()
+                fresh.update({key: data[key] for key in self._dirty})
+                data = self._data = fresh
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                atomic_write(self.path, json.dumps(data, ensure_ascii=False, indent=4).encode("utf-8"))
+            except OSError:
+                # Tenta de novo na próxima alteração
+                return
+            self._dirty.clear()
+            self._signature = file_signature(self.path)
@@ -0,0 +1,155 @@
+#!/usr/bin/python3
+import sys
+
+# Chave usada quando os IDs internos são gravados no arquivo
+ID_KEY = "_id"
+
+DEFAULT_CONTACT = {
+    "name": "",
+    "email": "",
+    "organization": "",
+    "addressline": "",
+    "city": "",
+    "postcode": "",
+    "state": "",
+    "country": "",
+    "orcid": ""
+}
+
+FIELDS = tuple(DEFAULT_CONTACT)
+_FIELD_SET = frozenset(FIELDS)
+
+# Campos com poucos valores distintos: a mesma string é compartilhada
+INTERNED_FIELDS = ("organization", "city", "state", "country")
+
+
+class Contact:
+    """
+    Registro compacto de um contato: um slot por campo de DEFAULT_CONTACT
+    e `extra` (dict ou None) com as chaves desconhecidas do JSON, que
+    voltam intactas ao salvar. Oferece a interface de leitura de um dict
+    (contact["name"], get, keys, values, items, len, in).
+    """
+    __slots__ = FIELDS + ("extra",)
+
+    def __init__(self, **fields):
+        for key in FIELDS:
+            setattr(self, key, fields.pop(key, ""))
+        self.extra = fields or None
+
+    @classmethod
+    def from_dict(cls, data):
+        self = cls.__new__(cls)
+        get = data.get
+        self.name         = get("name", "")
+        self.email        = get("email", "")
+        self.organization = get("organization", "")
+        self.addressline  = get("addressline", "")
+        self.city         = get("city", "")
+        self.postcode     = get("postcode", "")
+        self.state        = get("state", "")
+        self.country      = get("country", "")
+        self.orcid        = get("orcid", "")
+        self.extra = {k: v for k, v in data.items() if k not in _FIELD_SET} or None
+
+        for key in INTERNED_FIELDS:
+            value = getattr(self, key)
+            if type(value) is str:
+                setattr(self, key, sys.intern(value))
+        return self
+
+    def to_dict(self):
+        data = {key: getattr(self, key) for key in FIELDS}
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def to_row(self):
+        """
+        Tupla com os campos na ordem de FIELDS e `extra` no fim
+        (forma compacta usada pelos snapshots).
+        """
+        return (self.name, self.email, self.organization, self.addressline, self.city,
+                self.postcode, self.state, self.country, self.orcid, self.extra)
+
+    @classmethod
+    def from_row(cls, row):
+        self = cls.__new__(cls)
+        (self.name, self.email, self.organization, self.addressline, self.city,
+         self.postcode, self.state, self.country, self.orcid, self.extra) = row
+        return self
+
+    def copy(self):
+        return Contact.from_dict(self.to_dict())
+
+    def keys(self):
+        if self.extra:
+            return FIELDS + tuple(self.extra)
+        return FIELDS
+
+    def values(self):
+        return [self[key] for key in self.keys()]
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(FIELDS) + (len(self.extra) if self.extra else 0)
+
+    def __contains__(self, key):
+        return key in _FIELD_SET or (self.extra is not None and key in self.extra)
+
+    def __getitem__(self, key):
+        if key in _FIELD_SET:
+            return getattr(self, key)
+        if self.extra is not None and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in _FIELD_SET:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def pop(self, key, *default):
+        """
+        Remove uma chave extra (os campos fixos não podem ser removidos).
+        """
+        if self.extra is not None and key in self.extra:
+            value = self.extra.pop(key)
+            if not self.extra:
+                self.extra = None
+            return value
+        if default:
+            return default[0]
+        raise KeyError(key)
+
+    def __eq__(self, other):
+        if isinstance(other, Contact):
+            other = other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    def __repr__(self):
+        return f"Contact({self.to_dict()!r})"
+
+
+def to_contacts(records):
+    """
+    Converte os objetos lidos do JSON em Contact, completando os
+    campos ausentes com os valores de DEFAULT_CONTACT.
+    """
+    return [Contact.from_dict(record) for record in records]
@@ -0,0 +1,227 @@
+#!/usr/bin/python3
+import re
+import unicodedata
+from difflib import SequenceMatcher
+from functools import lru_cache
+
+from academic_contacts.modules.affiliations import normalize
+from academic_contacts.modules.contact      import Contact, FIELDS
+from academic_contacts.modules.orcid        import check_orcid
+
+_WORD = re.compile(r"\w+")
+
+# Pares com nota menor que isso não são sugeridos
+MIN_SCORE = 0.85
+# Nomes menos parecidos que isso nunca são a mesma pessoa
+MIN_NAME_SCORE = 0.9
+# Nota de "A. Silva" contra "Ana Silva"
+INITIAL_SCORE = 0.95
+# Filtro barato (bigramas em comum) antes da comparação caractere a caractere
+MIN_BIGRAM_SCORE = 0.7
+# Blocos maiores (nomes ou emails muito comuns) só comparam vizinhos em ordem alfabética
+MAX_BLOCK = 64
+WINDOW = 16
+
+
+def _text(value):
+    # Campos null (ou números) no JSON não valem como texto para comparar
+    return value if isinstance(value, str) else ""
+
+
+def fold(text):
+    """
+    Texto sem acentos, em minúsculas, só com as palavras.
+    """
+    text = _text(text).casefold()
+    if not text.isascii():
+        text = unicodedata.normalize("NFKD", text)
+        text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(_WORD.findall(text))
+
+
+# Organizações se repetem muito e só são comparadas quando os nomes batem
+_organization = lru_cache(maxsize=1 << 16)(normalize)
+
+
+def orcid_key(value):
+    """
+    O ORCID normalizado, ou "" se não houver um ORCID válido.
+    """
+    normalized, valid = check_orcid(_text(value))
+    return normalized if valid else ""
+
+
+def email_key(value):
+    return _text(value).strip().casefold()
+
+
+def name_keys(name):
+    """
+    Chaves de bloco do nome: sobrenome + inicial do primeiro nome e
+    primeiro nome + início do sobrenome, de modo que "A. Silva" e
+    "Ana Silva" ou "Ana Silva" e "Ana Silwa" caiam num bloco comum.
+    """
+    words = [word for word in name.split() if not word.isdigit()]
+    if not words:
+        return ()
+    if len(words) == 1:
+        return (("name", words[0], ""),)
+    first, last = words[0], words[-1]
+    return (("name", last, first[0]), ("name", first, last[:3]))
+
+
+class _Entry:
+    __slots__ = ("cid", "contact", "orcid", "email", "name", "bigrams")
+
+    def __init__(self, cid, contact):
+        self.cid = cid
+        self.contact = contact
+        self.orcid = orcid_key(contact.get("orcid", ""))
+        self.email = email_key(contact.get("email", ""))
+        self.name = fold(contact.get("name", ""))
+        self.bigrams = frozenset(map(str.__add__, self.name, self.name[1:]))
+
+
+class DuplicateGroup:
+    """
+    Contatos que parecem ser a mesma pessoa: `ids` na ordem da lista,
+    `score` (0-1) do par mais fraco e `reason` ("orcid", "email" ou
+    "name") do par mais forte.
+    """
+    def __init__(self, ids, score, reason):
+        self.ids = ids
+        self.score = score
+        self.reason = reason
+
+
+def _abbreviates(short, full):
+    # "a silva" abrevia "ana maria silva": inicial e sobrenome iguais
+    return (len(short) == 2 and len(full) >= 2 and len(short[0]) == 1
+            and full[0].startswith(short[0]) and short[-1] == full[-1])
+
+
+def _name_similarity(a, b):
+    if a.name == b.name:
+        return 1.0
+    words_a, words_b = a.name.split(), b.name.split()
+    if _abbreviates(words_a, words_b) or _abbreviates(words_b, words_a):
+        return INITIAL_SCORE
+    # A maioria dos pares de um bloco tem nomes bem diferentes
+    if 2 * len(a.bigrams & b.bigrams) < MIN_BIGRAM_SCORE * (len(a.bigrams) + len(b.bigrams)):
+        return 0.0
+    matcher = SequenceMatcher(None, a.name, b.name)
+    if matcher.real_quick_ratio() < MIN_NAME_SCORE or matcher.quick_ratio() < MIN_NAME_SCORE:
+        return 0.0
+    return matcher.ratio()
+
+
+def score_pair(a, b):
+    """
+    (nota, motivo) de dois contatos serem a mesma pessoa. ORCIDs
+    diferentes são sempre pessoas diferentes.
+    """
+    if a.orcid and b.orcid:
+        return (1.0, "orcid") if a.orcid == b.orcid else (0.0, "")
+    if a.email and a.email == b.email:
+        return 0.95, "email"
+    if not a.name or not b.name:
+        return 0.0, ""
+    name = _name_similarity(a, b)
+    if name < MIN_NAME_SCORE:
+        return 0.0, ""
+    org_a = _organization(_text(a.contact.get("organization")))
+    org_b = _organization(_text(b.contact.get("organization")))
+    if org_a and org_b:
+        # A organização confirma ou enfraquece um nome parecido
+        name = 0.8 * name + 0.2 * SequenceMatcher(None, org_a, org_b).ratio()
+    return name, "name"
+
+
+def candidate_pairs(entries):
+    """
+    Pares (i, j), i < j, de posições em `entries` que dividem um bloco
+    (ORCID, email ou nome). Cada par aparece uma vez; nenhum bloco é
+    comparado todo contra todo acima de MAX_BLOCK.
+    """
+    blocks = {}
+    for i, entry in enumerate(entries):
+        keys = list(name_keys(entry.name))
+        if entry.orcid:
+            keys.append(("orcid", entry.orcid))
+        if entry.email:
+            keys.append(("email", entry.email))
+        for key in keys:
+            blocks.setdefault(key, []).append(i)
+
+    seen = set()
+    for key, members in blocks.items():
+        if len(members) < 2:
+            continue
+        if len(members) <= MAX_BLOCK:
+            pairs = ((members[x], members[y]) for x in range(len(members)) for y in range(x + 1, len(members)))
+        else:
+            # Vizinhança ordenada: só nomes próximos na ordem alfabética
+            members = sorted(members, key=lambda i: entries[i].name)
+            pairs = ((min(members[x], members[y]), max(members[x], members[y]))
+                     for x in range(len(members)) for y in range(x + 1, min(x + 1 + WINDOW, len(members))))
+        for pair in pairs:
+            if pair not in seen:
+                seen.add(pair)
+                yield pair
+
+
+def find_duplicates(items, cancelled=None):
+    """
+    Procura contatos duplicados em `items`, pares (ID, contato) na ordem
+    da lista, sem comparar todos contra todos: só são comparados os
+    contatos que dividem um bloco em candidate_pairs(). Os pares
+    parecidos são unidos em grupos, dos mais prováveis para os menos.
+    `cancelled()` é consultado de tempos em tempos para interromper a
+    busca (retorna None).
+    """
+    entries = [_Entry(cid, contact) for cid, contact in items]
+    parent = list(range(len(entries)))
+
+    def root(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    matches = []
+    for n, (i, j) in enumerate(candidate_pairs(entries)):
+        if cancelled is not None and n % 4096 == 0 and cancelled():
+            return None
+        score, reason = score_pair(entries[i], entries[j])
+        if score >= MIN_SCORE:
+            matches.append((i, j, score, reason))
+            ri, rj = root(i), root(j)
+            if ri != rj:
+                parent[max(ri, rj)] = min(ri, rj)
+
+    groups = {}
+    for i, j, score, reason in matches:
+        group = groups.setdefault(root(i), [set(), 1.0, 0.0, ""])
+        group[0].update((i, j))
+        group[1] = min(group[1], score)
+        if score > group[2]:
+            group[2], group[3] = score, reason
+
+    result = [DuplicateGroup([entries[i].cid for i in sorted(members)], low, reason)
+              for members, low, _, reason in groups.values()]
+    result.sort(key=lambda group: -group.score)
+    return result
+
+
+def merge_contacts(contacts):
+    """
+    Junta os contatos no primeiro: campos vazios são preenchidos, na
+    ordem, com os valores dos outros; campos já preenchidos ficam.
+    """
+    data = contacts[0].to_dict()
+    for other in contacts[1:]:
+        for key, value in other.items():
+            current = data.get(key)
+            if current is None or (key in FIELDS and isinstance(current, str) and not current.strip()):
+                data[key] = value
+    return Contact.from_dict(data)
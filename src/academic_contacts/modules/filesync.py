@@ -0,0 +1,130 @@
+#!/usr/bin/python3
+import json
+import os
+
+from academic_contacts.modules.contact import ID_KEY
+
+
+def file_signature(path):
+    """
+    (mtime, tamanho) do arquivo, ou None se ele não existir.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def content_key(contact):
+    items = tuple(contact.items())
+    try:
+        hash(items)
+    except TypeError:
+        # Valores extras que não são texto (listas, dicts)
+        return json.dumps(items, ensure_ascii=False, sort_keys=True)
+    return items
+
+
+def identity_key(contact):
+    """
+    O que identifica a mesma pessoa em duas versões do arquivo:
+    ORCID, senão email, senão nome.
+    """
+    for key in ("orcid", "email", "name"):
+        value = contact.get(key, "")
+        if isinstance(value, str) and value.strip():
+            return key, value.strip().casefold()
+    return None
+
+
+class FileChanges:
+    """
+    Diferença entre a lista aberta e uma nova versão do arquivo.
+
+    added:     contatos novos no arquivo
+    changed:   {ID: contato} alterados no arquivo
+    removed:   IDs apagados do arquivo
+    synced:    IDs alterados aqui que ficaram iguais no arquivo
+    conflicts: [(ID, versão local ou None, versão do arquivo ou None)]
+               para contatos alterados aqui e no arquivo
+    """
+    def __init__(self):
+        self.added = []
+        self.changed = {}
+        self.removed = []
+        self.synced = []
+        self.conflicts = []
+
+    def __bool__(self):
+        return bool(self.added or self.changed or self.removed or self.synced or self.conflicts)
+
+
+def diff_contacts(base, remote):
+    """
+    Compara `remote` (contatos lidos do arquivo) com `base`, a lista de
+    ContactStore.sync_base(). Os contatos são pareados pelo `_id`
+    gravado com persist_ids, depois pelo conteúdo idêntico e por fim
+    pela identidade (ORCID, email ou nome); a ordem no arquivo não conta.
+    """
+    changes = FileChanges()
+    entries = {cid: (original, current, dirty) for cid, original, current, dirty in base}
+    unmatched = {cid for cid, (original, _, _) in entries.items() if original is not None}
+    pairs = []      # (ID, contato do arquivo)
+    pending = []    # contatos do arquivo ainda sem par
+
+    for contact in remote:
+        cid = contact.pop(ID_KEY, None)
+        if isinstance(cid, int) and cid in unmatched:
+            unmatched.discard(cid)
+            pairs.append((cid, contact))
+        else:
+            pending.append(contact)
+
+    # Conteúdo idêntico: o contato não mudou no arquivo
+    by_content = {}
+    for cid in unmatched:
+        by_content.setdefault(content_key(entries[cid][0]), []).append(cid)
+    rest = []
+    for contact in pending:
+        cids = by_content.get(content_key(contact))
+        if cids:
+            unmatched.discard(cids.pop())
+        else:
+            rest.append(contact)
+
+    # Mesma pessoa com outros dados: o contato foi editado no arquivo
+    by_identity = {}
+    for cid in unmatched:
+        by_identity.setdefault(identity_key(entries[cid][0]), []).append(cid)
+    for contact in rest:
+        key = identity_key(contact)
+        cids = by_identity.get(key) if key is not None else None
+        if cids:
+            cid = cids.pop(0)
+            unmatched.discard(cid)
+            pairs.append((cid, contact))
+        else:
+            changes.added.append(contact)
+
+    for cid, contact in pairs:
+        original, current, dirty = entries[cid]
+        if contact == original:
+            continue
+        if not dirty:
+            changes.changed[cid] = contact
+        elif current is not None and contact == current:
+            changes.synced.append(cid)
+        else:
+            changes.conflicts.append((cid, current, contact))
+
+    for cid in unmatched:
+        _, current, dirty = entries[cid]
+        if not dirty:
+            changes.removed.append(cid)
+        elif current is None:
+            changes.synced.append(cid)
+        else:
+            changes.conflicts.append((cid, current, None))
+
+    return changes
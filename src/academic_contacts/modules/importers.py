@@ -0,0 +1,304 @@
+#!/usr/bin/python3
+import io
+import os
+import re
+import csv
+import unicodedata
+
+from academic_contacts.modules.contact  import Contact, FIELDS, ID_KEY
+from academic_contacts.modules.jsonio   import iter_contact_chunks
+from academic_contacts.modules.sqlstore import SqliteContactStore, DB_SUFFIX
+from academic_contacts.modules.dedup    import fold, orcid_key, email_key
+from academic_contacts.modules.orcid    import normalize_orcid
+
+IMPORT_SUFFIXES = (".json", DB_SUFFIX, ".csv", ".vcf", ".vcard", ".bib")
+
+
+# Cabeçalhos de CSV aceitos para cada campo (já em minúsculas)
+CSV_ALIASES = {
+    "name":         ("name", "full name", "fullname", "author", "display name"),
+    "email":        ("email", "e-mail", "mail", "email address", "e-mail address"),
+    "organization": ("organization", "organisation", "affiliation", "institution", "company", "org"),
+    "addressline":  ("addressline", "address", "address line", "street"),
+    "city":         ("city", "town"),
+    "postcode":     ("postcode", "postal code", "zip", "zip code"),
+    "state":        ("state", "region", "province"),
+    "country":      ("country",),
+    "orcid":        ("orcid", "orcid id", "orcid identifier"),
+}
+_CSV_FIELDS = {alias: key for key, aliases in CSV_ALIASES.items() for alias in aliases}
+_CSV_FIRST = ("first name", "given name", "firstname", "given names")
+_CSV_LAST  = ("last name", "family name", "surname", "lastname")
+
+
+def read_json(path):
+    contacts = []
+    for chunk, _, _ in iter_contact_chunks(path):
+        contacts.extend(chunk)
+    return contacts
+
+
+def read_database(path):
+    store = SqliteContactStore(path)
+    try:
+        return list(store)
+    finally:
+        store.close()
+
+
+def read_csv(path):
+    """
+    Uma linha por contato; as colunas são reconhecidas pelo cabeçalho
+    (CSV_ALIASES) e as desconhecidas são ignoradas.
+    """
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        text = f.read()
+    try:
+        dialect = csv.Sniffer().sniff(text[:8192], delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    contacts = []
+    for row in csv.DictReader(io.StringIO(text), dialect=dialect):
+        record = {}
+        first = last = ""
+        for header, value in row.items():
+            if header is None or not isinstance(value, str):
+                continue
+            header = header.strip().lower()
+            if header in _CSV_FIELDS:
+                record[_CSV_FIELDS[header]] = value
+            elif header in _CSV_FIRST:
+                first = value.strip()
+            elif header in _CSV_LAST:
+                last = value.strip()
+        if not record.get("name", "").strip():
+            record["name"] = f"{first} {last}".strip()
+        if any(value.strip() for value in record.values()):
+            contacts.append(Contact.from_dict(record))
+    return contacts
+
+
+def _vcard_unescape(value):
+    return re.sub(r"\\(.)", lambda m: "\n" if m.group(1) in "nN" else m.group(1), value)
+
+def _vcard_split(value):
+    # Componentes separados por ";" que não estejam escapados
+    return [_vcard_unescape(part) for part in re.split(r"(?<!\\);", value)]
+
+def read_vcard(path):
+    """
+    Cartões BEGIN:VCARD ... END:VCARD (versões 3 e 4): FN (ou N), EMAIL,
+    ORG, ADR e ORCID (X-ORCID ou uma URL de orcid.org).
+    """
+    with open(path, "r", encoding="utf-8-sig") as f:
+        text = f.read()
+    # Linhas dobradas continuam com um espaço ou tab no início
+    text = re.sub(r"\r?\n[ \t]", "", text)
+
+    contacts = []
+    record = None
+    for line in text.splitlines():
+        name, sep, value = line.partition(":")
+        if not sep:
+            continue
+        key = name.split(";")[0].split(".")[-1].upper()
+        if key == "BEGIN" and value.strip().upper() == "VCARD":
+            record = {}
+        elif key == "END" and record is not None:
+            if any(record.values()):
+                contacts.append(Contact.from_dict(record))
+            record = None
+        elif record is None:
+            continue
+        elif key == "FN":
+            record["name"] = _vcard_unescape(value)
+        elif key == "N" and not record.get("name"):
+            parts = _vcard_split(value) + [""] * 5
+            # Nome, nomes do meio, sobrenome e sufixo (sem o título)
+            record["name"] = " ".join(part for part in (parts[1], parts[2], parts[0], parts[4]) if part)
+        elif key == "EMAIL" and not record.get("email"):
+            record["email"] = value.strip()
+        elif key == "ORG" and not record.get("organization"):
+            record["organization"] = _vcard_split(value)[0]
+        elif key == "ADR" and not record.get("city"):
+            parts = _vcard_split(value) + [""] * 7
+            street = ", ".join(part for part in parts[:3] if part)
+            record.update(addressline=street, city=parts[3], state=parts[4], postcode=parts[5], country=parts[6])
+        elif key in ("X-ORCID", "URL") and "orcid" not in record:
+            if key == "X-ORCID" or "orcid.org" in value:
+                record["orcid"] = value.strip()
+    return contacts
+
+
+# Acentos do LaTeX: \'a, \'{a}, {\'a}, \c{c} ...
+_LATEX_ACCENTS = {"`": "\u0300", "'": "\u0301", "^": "\u0302", "~": "\u0303", "=": "\u0304",
+                  ".": "\u0307", '"': "\u0308", "H": "\u030b", "v": "\u030c", "c": "\u0327", "k": "\u0328"}
+_LATEX_ACCENT = re.compile(r"\\([`'^~=.\"]|[Hvck](?=[\s{]))\s*\{?\s*(\\?[A-Za-z]|ı|ȷ)\s*\}?")
+_LATEX_LETTERS = {r"\ss": "ß", r"\o": "ø", r"\O": "Ø", r"\ae": "æ", r"\AE": "Æ", r"\aa": "å", r"\AA": "Å",
+                  r"\l": "ł", r"\L": "Ł", r"\i": "ı", r"\j": "ȷ"}
+_LATEX_LETTER = re.compile(r"\\(ss|o|O|ae|AE|aa|AA|l|L|i|j)(?![A-Za-z])\s*")
+
+def delatex(text):
+    """
+    Texto de um campo BibTeX sem os comandos de acento e sem chaves.
+    """
+    text = _LATEX_LETTER.sub(lambda m: _LATEX_LETTERS["\\" + m.group(1)], text)
+    text = _LATEX_ACCENT.sub(lambda m: m.group(2).lstrip("\\").replace("ı", "i").replace("ȷ", "j") + _LATEX_ACCENTS[m.group(1)], text)
+    text = text.replace("\\&", "&").replace("~", " ")
+    text = re.sub(r"\\[A-Za-z]+\s*", "", text).replace("{", "").replace("}", "")
+    return unicodedata.normalize("NFC", " ".join(text.split()))
+
+
+def _bibtex_value(text, pos):
+    """
+    Valor entre chaves ou aspas que começa em `pos`; retorna (valor, fim).
+    """
+    opening = text[pos]
+    depth = 0
+    end = pos
+    while end < len(text):
+        char = text[end]
+        end += 1
+        if char == "\\":
+            end += 1   # \{ e \" não abrem nem fecham
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if opening == "{" and depth == 0:
+                return text[pos + 1:end - 1], end
+        elif char == '"' and opening == '"' and end > pos + 1 and depth == 0:
+            return text[pos + 1:end - 1], end
+    raise ValueError(f"Unterminated value at character {pos}")
+
+
+def _split_top(text, separator):
+    # Divide em `separator` fora de chaves ({Barnes and Noble} fica inteiro)
+    parts, depth, start = [], 0, 0
+    for match in re.finditer(r"[{}]|" + separator, text):
+        token = match.group(0)
+        if token == "{":
+            depth += 1
+        elif token == "}":
+            depth -= 1
+        elif depth == 0:
+            parts.append(text[start:match.start()])
+            start = match.end()
+    parts.append(text[start:])
+    return parts
+
+
+def bibtex_name(text):
+    """
+    "Last, First", "Last, Jr, First" ou "First Last" como "First Last".
+    """
+    parts = [part.strip() for part in _split_top(text, ",")]
+    if len(parts) == 2:
+        parts = [parts[1], parts[0]]
+    elif len(parts) >= 3:
+        parts = [parts[2], parts[0], parts[1]]
+    return delatex(" ".join(part for part in parts if part))
+
+
+_AUTHOR_FIELD = re.compile(r"\b(?:author|editor)\s*=\s*", re.IGNORECASE)
+
+def read_bibtex(path):
+    """
+    Um contato (só com o nome) por autor ou editor distinto das entradas.
+    """
+    with open(path, "r", encoding="utf-8-sig") as f:
+        text = f.read()
+    contacts = []
+    seen = set()
+    for match in _AUTHOR_FIELD.finditer(text):
+        pos = match.end()
+        if pos >= len(text) or text[pos] not in '{"':
+            continue
+        value, _ = _bibtex_value(text, pos)
+        for author in _split_top(" ".join(value.split()), r"\s+and\s+"):
+            name = bibtex_name(author)
+            if name and name.lower() != "others" and name not in seen:
+                seen.add(name)
+                contacts.append(Contact.from_dict({"name": name}))
+    return contacts
+
+
+def reader_for(path):
+    lower = path.lower()
+    if lower.endswith(DB_SUFFIX.lower()):
+        return read_database
+    readers = {".json": read_json, ".csv": read_csv, ".vcf": read_vcard, ".vcard": read_vcard, ".bib": read_bibtex}
+    reader = readers.get(os.path.splitext(lower)[1])
+    if reader is None:
+        raise ValueError(f"Unknown file type: {os.path.basename(path)}")
+    return reader
+
+
+def field_text(contact, key):
+    # Como na exportação (cli): null vira "" e números viram texto
+    return str(contact.get(key) or "")
+
+
+def clean_contact(contact):
+    """
+    Contato importado com os campos em texto e aparados, o nome sem
+    espaços repetidos, o ORCID normalizado e sem o `_id` do arquivo de origem.
+    """
+    data = contact.to_dict()
+    data.pop(ID_KEY, None)
+    for key in FIELDS:
+        value = field_text(data, key)
+        data[key] = " ".join(value.split()) if key == "name" else value.strip()
+    data["orcid"] = normalize_orcid(data["orcid"])
+    return Contact.from_dict(data)
+
+
+def read_source(path):
+    """
+    Lê um arquivo para importação; roda nos processos do pool.
+    Retorna (caminho, contatos, erro).
+    """
+    try:
+        return path, [clean_contact(contact) for contact in reader_for(path)(path)], None
+    except Exception as e:
+        return path, [], str(e)
+
+
+class ImportFilter:
+    """
+    Descarta os contatos importados que já estão na lista (ou que já
+    vieram de outro arquivo): mesmo ORCID, mesmo email ou mesmo nome e
+    organização (só o nome, para quem veio sem organização, como os
+    autores do BibTeX). Duplicados só parecidos ficam para "Duplicates".
+    """
+    def __init__(self, contacts=()):
+        self.keys = set()
+        for contact in contacts:
+            self.keys.update(self._keys(contact, known=True))
+
+    @staticmethod
+    def _keys(contact, known=False):
+        keys = []
+        orcid = orcid_key(field_text(contact, "orcid"))
+        if orcid:
+            keys.append(("orcid", orcid))
+        email = email_key(field_text(contact, "email"))
+        if email:
+            keys.append(("email", email))
+        name = fold(field_text(contact, "name"))
+        if name:
+            organization = fold(field_text(contact, "organization"))
+            if organization or known:
+                keys.append(("name", name, organization))
+            if not organization or known:
+                keys.append(("name", name))
+        return keys
+
+    def add(self, contact):
+        """
+        True se o contato é novo (e passa a ser conhecido).
+        """
+        if any(key in self.keys for key in self._keys(contact)):
+            return False
+        self.keys.update(self._keys(contact, known=True))
+        return True
@@ -0,0 +1,240 @@
+#!/usr/bin/python3
+import json
+import time
+from collections import deque
+
+from academic_contacts.modules.contact import Contact
+from academic_contacts.modules.jsonio  import atomic_write
+
+JOURNAL_SUFFIX = ".undo"
+
+
+def field_delta(before, after):
+    """
+    Campos que mudaram de `before` para `after`: (old, new), só com as
+    chaves que existiam em cada lado.
+    """
+    old = {}
+    new = {}
+    for key in set(before.keys()) | set(after.keys()):
+        if key in before and key in after and before[key] == after[key]:
+            continue
+        if key in before:
+            old[key] = before[key]
+        if key in after:
+            new[key] = after[key]
+    return old, new
+
+
+def apply_delta(contact, old, new):
+    """
+    Cópia de `contact` passando dos valores `old` para `new`.
+    """
+    data = contact.to_dict()
+    for key in old:
+        if key not in new:
+            data.pop(key, None)
+    data.update(new)
+    return Contact.from_dict(data)
+
+
+def _edit_items(items):
+    edits = []
+    for pos, cid, before, after in items:
+        old, new = field_delta(before, after)
+        if old or new:
+            edits.append([pos, cid, old, new])
+    return edits
+
+
+def _delete_items(items):
+    # Em ordem crescente de posição, como insert_many espera ao desfazer
+    items = sorted(items, key=lambda item: item[0])
+    return [[pos, cid, contact.to_dict()] for pos, cid, contact in items]
+
+
+class UndoJournal:
+    """
+    Histórico de desfazer/refazer guardado como diferenças: uma edição
+    guarda só os campos alterados; inclusão e exclusão guardam o contato.
+    As operações apontam a posição do contato na lista (que é a mesma
+    ao reabrir o arquivo salvo) e o ID (usado pelo banco SQLite).
+
+    O histórico tem no máximo `limit` operações. Edições seguidas no
+    mesmo card, com menos de COALESCE segundos entre elas, viram uma só;
+    inclusões, edições e exclusões em lote e a junção de duplicados são
+    um único passo.
+    """
+    COALESCE = 30.0
+
+    def __init__(self, limit=1000):
+        self.undo_stack = deque(maxlen=limit)
+        self.redo_stack = []
+        self._last_edit = 0.0
+
+    def clear(self):
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self._last_edit = 0.0
+
+    def can_undo(self):
+        return bool(self.undo_stack)
+
+    def can_redo(self):
+        return bool(self.redo_stack)
+
+    def _push(self, op):
+        self.undo_stack.append(op)
+        self.redo_stack.clear()
+
+    def record_edit(self, pos, cid, before, after):
+        old, new = field_delta(before, after)
+        if not old and not new:
+            return
+        now = time.monotonic()
+        last = self.undo_stack[-1] if self.undo_stack else None
+        if (last is not None and last["op"] == "edit" and last["pos"] == pos
+                and not self.redo_stack and now - self._last_edit < self.COALESCE):
+            # Junta com a edição anterior do mesmo card
+            for key, value in old.items():
+                if key not in last["old"] and key not in last["new"]:
+                    last["old"][key] = value
+            for key in old:
+                if key not in new:
+                    last["new"].pop(key, None)
+            last["new"].update(new)
+        else:
+            self._push({"op": "edit", "pos": pos, "id": cid, "old": old, "new": new})
+        self._last_edit = now
+
+    def record_add(self, pos, cid, contact):
+        self._push({"op": "add", "pos": pos, "id": cid, "contact": contact.to_dict()})
+        self._last_edit = 0.0
+
+    def record_delete(self, pos, cid, contact):
+        self._push({"op": "delete", "pos": pos, "id": cid, "contact": contact.to_dict()})
+        self._last_edit = 0.0
+
+    def record_edit_many(self, items):
+        """
+        Edição em lote como um único passo: `items` é uma lista de
+        (posição, ID, antes, depois).
+        """
+        edits = _edit_items(items)
+        if edits:
+            self._push({"op": "edit_many", "items": edits})
+        self._last_edit = 0.0
+
+    def record_delete_many(self, items):
+        """
+        Exclusão em lote como um único passo: `items` é uma lista de
+        (posição, ID, contato).
+        """
+        self._push({"op": "delete_many", "items": _delete_items(items)})
+        self._last_edit = 0.0
+
+    def record_add_many(self, items):
+        """
+        Inclusão em lote (importação) como um único passo: `items` é uma
+        lista de (posição, ID, contato).
+        """
+        self._push({"op": "add_many", "items": _delete_items(items)})
+        self._last_edit = 0.0
+
+    def record_merge(self, edits, deletes):
+        """
+        Junção de contatos duplicados como um único passo: edição em lote
+        dos contatos que ficam e exclusão dos que foram juntados, nos
+        formatos de record_edit_many e record_delete_many.
+        """
+        self._push({"op": "merge",
+                    "edit": {"op": "edit_many", "items": _edit_items(edits)},
+                    "delete": {"op": "delete_many", "items": _delete_items(deletes)}})
+        self._last_edit = 0.0
+
+    def _apply(self, store, op, forward):
+        """
+        Aplica `op` (ou o inverso dela) em `store`. Retorna
+        (IDs alterados, IDs removidos, IDs inseridos).
+        """
+        kind = op["op"]
+        if kind == "merge":
+            # As posições da edição são as de antes da exclusão
+            steps = (op["edit"], op["delete"])
+            changed, removed, inserted = [], [], []
+            for step in (steps if forward else reversed(steps)):
+                result = self._apply(store, step, forward)
+                changed += result[0]
+                removed += result[1]
+                inserted += result[2]
+            return changed, removed, inserted
+        if kind == "edit_many":
+            changed = []
+            for pos, _, old, new in op["items"]:
+                cid = store.id_at(pos)
+                old, new = (old, new) if forward else (new, old)
+                store.replace(cid, apply_delta(store.get(cid), old, new))
+                changed.append(cid)
+            return changed, [], []
+        if kind in ("delete_many", "add_many"):
+            items = op["items"]
+            if (kind == "delete_many") == forward:
+                removed = [store.id_at(pos) for pos, _, _ in items]
+                store.remove_many(removed)
+                return [], removed, []
+            # Em ordem crescente cada contato volta exatamente à sua posição
+            inserted = store.insert_many([(pos, Contact.from_dict(contact), cid) for pos, cid, contact in items])
+            for item, cid in zip(items, inserted):
+                item[1] = cid
+            return [], [], inserted
+        if kind == "edit":
+            cid = store.id_at(op["pos"])
+            old, new = (op["old"], op["new"]) if forward else (op["new"], op["old"])
+            store.replace(cid, apply_delta(store.get(cid), old, new))
+            return [cid], [], []
+
+        inserting = (kind == "add") == forward
+        if inserting:
+            cid = store.insert(op["pos"], Contact.from_dict(op["contact"]), op["id"])
+            op["id"] = cid
+            return [], [], [cid]
+        cid = store.id_at(op["pos"])
+        store.remove(cid)
+        return [], [cid], []
+
+    def undo(self, store):
+        op = self.undo_stack.pop()
+        self._last_edit = 0.0
+        result = self._apply(store, op, forward=False)
+        self.redo_stack.append(op)
+        return result
+
+    def redo(self, store):
+        op = self.redo_stack.pop()
+        result = self._apply(store, op, forward=True)
+        self.undo_stack.append(op)
+        return result
+
+    def save(self, path, signature):
+        """
+        Grava o histórico ao lado do arquivo de contatos, valendo para o
+        arquivo com essa assinatura (mtime, tamanho).
+        """
+        data = {"signature": list(signature), "undo": list(self.undo_stack), "redo": self.redo_stack}
+        atomic_write(path, json.dumps(data, ensure_ascii=False).encode("utf-8"))
+
+    def load(self, path, signature):
+        """
+        Lê o histórico gravado por save(), se ele for do arquivo atual.
+        """
+        self.clear()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if signature is None or data.get("signature") != list(signature):
+            return False
+        self.undo_stack.extend(data.get("undo", []))
+        self.redo_stack.extend(data.get("redo", []))
+        return True
@@ -0,0 +1,167 @@
+#!/usr/bin/python3
+import os
+import json
+import codecs
+
+from academic_contacts.modules.contact import to_contacts, ID_KEY
+
+_WHITESPACE = " \t\n\r"
+
+
+def iter_contact_chunks(path, chunk_size=500, block_size=1 << 20):
+    """
+    Lê um *.AcademicContacts.json de forma incremental.
+
+    Gera tuplas (contatos, bytes_lidos, bytes_totais), onde `contatos` é
+    uma lista de até `chunk_size` Contact já completados com os campos
+    padrão. O arquivo é lido em blocos de `block_size` bytes, então o
+    primeiro bloco de contatos fica disponível sem esperar o arquivo todo.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8-sig")()
+    total = os.path.getsize(path)
+
+    with open(path, "rb") as f:
+        buf = ""
+        pos = 0
+        read = 0
+        eof = False
+
+        def more():
+            nonlocal buf, pos, read, eof
+            block = f.read(block_size)
+            read += len(block)
+            eof = not block
+            buf = buf[pos:] + utf8.decode(block, final=eof)
+            pos = 0
+
+        def skip():
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in _WHITESPACE:
+                    pos += 1
+                if pos < len(buf) or eof:
+                    return
+                more()
+
+        skip()
+        if pos >= len(buf) or buf[pos] != "[":
+            raise ValueError("The file does not contain a JSON list of contacts")
+        pos += 1
+
+        chunk = []
+        expect_value = True
+        while True:
+            skip()
+            if pos >= len(buf):
+                raise ValueError("Unexpected end of file")
+
+            char = buf[pos]
+            if char == "]":
+                break
+            if char == ",":
+                if expect_value:
+                    raise ValueError(f"Unexpected ',' at character {read - len(buf) + pos}")
+                expect_value = True
+                pos += 1
+                continue
+            if not expect_value:
+                raise ValueError(f"Expected ',' at character {read - len(buf) + pos}")
+
+            try:
+                contact, pos = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                # Objeto incompleto no fim do bloco: lê mais e tenta de novo
+                if eof:
+                    raise
+                more()
+                continue
+
+            if not isinstance(contact, dict):
+                raise ValueError("Each contact must be a JSON object")
+            chunk.append(contact)
+            expect_value = False
+
+            if len(chunk) >= chunk_size:
+                yield to_contacts(chunk), read, total
+                chunk = []
+
+        yield to_contacts(chunk), read, total
+
+
+def encode_contact(contact, compact=False):
+    """
+    Serializa um contato (dict) como elemento da lista do arquivo (bytes UTF-8).
+    No modo indentado o resultado é idêntico ao de json.dump(indent=4)
+    sobre a lista inteira.
+    """
+    if compact:
+        text = json.dumps(contact, ensure_ascii=False, separators=(",", ":"))
+    else:
+        text = "    " + json.dumps(contact, indent=4, ensure_ascii=False).replace("\n", "\n    ")
+    return text.encode("utf-8")
+
+
+def join_contacts(blobs, compact=False):
+    """
+    Monta o conteúdo do arquivo a partir dos contatos já serializados.
+    """
+    if not blobs:
+        return b"[]"
+    if compact:
+        return b"[" + b",".join(blobs) + b"]"
+    return b"[\n" + b",\n".join(blobs) + b"\n]"
+
+
+def serialize_contacts(items, compact=False, with_ids=False):
+    """
+    Serializa a lista (ID, contato, blob) de ContactStore.save_items,
+    reaproveitando os blobs em cache. Retorna (conteúdo, novos_blobs),
+    com novos_blobs no formato {ID: (contato, blob)}.
+    """
+    blobs = []
+    new_blobs = {}
+    for cid, contact, blob in items:
+        if blob is None:
+            record = contact.to_dict()
+            if with_ids:
+                record = {ID_KEY: cid, **record}
+            blob = encode_contact(record, compact)
+            new_blobs[cid] = (contact, blob)
+        blobs.append(blob)
+    return join_contacts(blobs, compact), new_blobs
+
+
+def atomic_write(path, data):
+    """
+    Grava `data` (bytes ou uma lista de pedaços) num arquivo temporário
+    no mesmo diretório, faz fsync e troca pelo arquivo final com
+    os.replace. Uma falha no meio da escrita nunca deixa o arquivo
+    original truncado.
+    """
+    path = os.path.abspath(path)
+    directory = os.path.dirname(path)
+    tmp_path = os.path.join(directory, f".{os.path.basename(path)}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            if isinstance(data, (bytes, bytearray)):
+                f.write(data)
+            else:
+                f.writelines(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o7777)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    # Garante que a troca de nomes também chegou ao disco
+    if hasattr(os, "O_DIRECTORY"):
+        fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
@@ -0,0 +1,346 @@
+#!/usr/bin/python3
+import re
+import string
+from functools import lru_cache
+
+from academic_contacts.modules.affiliations import AFFILIATIONS, AFFILIATION_FIELDS
+from academic_contacts.modules.contact      import Contact, DEFAULT_CONTACT, FIELDS
+from academic_contacts.modules.orcid        import check_orcid
+
+# Todos os caracteres especiais são trocados numa única passada
+_LATEX_TABLE = str.maketrans({
+    '\\': r'\textbackslash{}',
+    '{': r'\{',
+    '}': r'\}',
+    '#': r'\#',
+    '$': r'\$',
+    '%': r'\%',
+    '&': r'\&',
+    '_': r'\_',
+    '~': r'\textasciitilde{}',
+    '^': r'\^{}',
+})
+
+_LATEX_SPECIAL = re.compile(r'[\\{}#$%&_~^]')
+
+def latex_escape(text):
+    # translate é lento com substituições longas; a maioria dos campos não precisa
+    if _LATEX_SPECIAL.search(text) is None:
+        return text
+    return text.translate(_LATEX_TABLE)
+
+@lru_cache(maxsize=1 << 16)
+def _escape_field(value):
+    # Organização, cidade e país se repetem muito entre os autores
+    return latex_escape(value.strip())
+
+@lru_cache(maxsize=8192)
+def parse_name(full_name):
+    """
+    (primeiro nome, resto, inicial) de um nome; cada nome é analisado
+    uma só vez.
+    """
+    parts = full_name.split()
+    if not parts:
+        return "", "", ""  # Caso a string esteja vazia ou só espaços
+    first_word = parts[0]
+    return first_word, " ".join(parts[1:]), first_word[0].upper() + "."
+
+def split_first_word(full_name):
+    return parse_name(full_name)[:2]
+
+
+_FORMATTER = string.Formatter()
+
+def compile_format(fmt):
+    """
+    Compila um formato de str.format ("{name}, {email}") numa função
+    ctx -> str equivalente a fmt.format_map(ctx). Só são aceitos campos
+    simples ({name}, {name!r}, {name:>4}): atributos e índices como
+    {name.__class__} levantam ValueError, assim como um formato inválido.
+    """
+    pieces = []   # texto fixo antes de cada campo e depois do último
+    fields = []   # (campo, conversão, especificação)
+    pending = ""
+    for literal, field, spec, conversion in _FORMATTER.parse(fmt):
+        pending += literal
+        if field is None:
+            continue
+        if not field.isidentifier():
+            raise ValueError(f"Campo inválido no modelo: {field!r}")
+        if conversion not in (None, "s", "r", "a") or "{" in spec:
+            raise ValueError(f"Formato inválido no modelo para o campo {field!r}")
+        pieces.append(pending)
+        fields.append((field, conversion, spec))
+        pending = ""
+    pieces.append(pending)
+
+    if not fields:
+        text = pieces[0]
+        return lambda ctx: text
+    if len(fields) in _PLAIN and all(field[1:] == (None, "") for field in fields):
+        # O caso comum (campos simples, até três por linha): uma f-string
+        # fixa sobre os trechos e os nomes, bem mais rápida que format_map
+        return _PLAIN[len(fields)](*pieces, *(field for field, _, _ in fields))
+    return fmt.format_map
+
+
+def _plain1(p0, p1, f0):
+    return lambda ctx: f"{p0}{ctx[f0]}{p1}"
+
+def _plain2(p0, p1, p2, f0, f1):
+    return lambda ctx: f"{p0}{ctx[f0]}{p1}{ctx[f1]}{p2}"
+
+def _plain3(p0, p1, p2, p3, f0, f1, f2):
+    return lambda ctx: f"{p0}{ctx[f0]}{p1}{ctx[f1]}{p2}{ctx[f2]}{p3}"
+
+_PLAIN = {1: _plain1, 2: _plain2, 3: _plain3}
+
+
+def _compile_line(line, sep):
+    """
+    Uma função por final da linha (demais, penúltimo, último).
+    """
+    return [compile_format(line + end.replace("{", "{{").replace("}", "}}")) for end in sep]
+
+
+class Text:
+    """
+    Linhas fixas do modelo.
+    """
+    def __init__(self, *lines):
+        self.lines = lines
+
+class Each:
+    """
+    Linha repetida para cada autor. `first` e `corresponding` substituem
+    a linha do primeiro autor e do autor correspondente; `sep` é o final
+    da linha (demais autores, penúltimo, último); `when` pula os autores
+    com esse campo vazio.
+    """
+    def __init__(self, line, first=None, corresponding=None, sep=("", "", ""), when=None):
+        self.line = line
+        self.first = first or line
+        self.corresponding = corresponding
+        self.sep = sep
+        self.when = when
+
+class Corresponding:
+    """
+    Linha com os campos do autor correspondente.
+    """
+    def __init__(self, line):
+        self.line = line
+
+class Affiliations:
+    """
+    Linha repetida para cada afiliação distinta, na ordem em que aparecem,
+    com os campos do primeiro autor que a tem ({aff} é o número e
+    {affiliation} o texto). `sep` funciona como em `Each`.
+    """
+    def __init__(self, line, sep=("", "", "")):
+        self.line = line
+        self.sep = sep
+
+
+class Template:
+    """
+    Modelo declarativo de um bloco de autores. Os campos de cada autor
+    ({name}, {email}, ... e os derivados {number}, {letter}, {first},
+    {last}, {initial}, {aff}) são calculados numa só passada pela lista
+    e reaproveitados por todas as seções `Each`.
+
+    escape:      apara e escapa para LaTeX os campos dos contatos
+    required:    campos que não podem estar vazios
+    optional:    {nome: (campo, formato)} vale o formato se o campo não
+                 estiver vazio e "" caso contrário
+    affiliation: formato do texto da afiliação; autores do mesmo grupo
+                 em AffiliationIndex (pelos campos que o formato imprime)
+                 recebem o mesmo número {aff}
+    orcid:       o ORCID entra no texto: é normalizado (0000-0000-0000-0000)
+                 e um ORCID inválido impede a exportação
+    """
+    def __init__(self, *sections, escape=False, required=(), optional=None, affiliation=None, orcid=False):
+        self.sections = sections
+        self.escape = escape
+        self.required = required
+        self.orcid = orcid
+        # Os formatos são compilados uma vez, na definição do modelo
+        self._optional = [(name, field, compile_format(fmt)) for name, (field, fmt) in (optional or {}).items()]
+        self._affiliation = compile_format(affiliation) if affiliation else None
+        # Campos impressos no texto da afiliação (direto ou pelos opcionais)
+        sources = {name: field for name, (field, _) in (optional or {}).items()}
+        used = {sources.get(name, name) for _, name, _, _ in _FORMATTER.parse(affiliation or "") if name}
+        self._affiliation_fields = tuple(field for field in AFFILIATION_FIELDS if field in used)
+        self._each = []    # seções Each compiladas
+        self._parts = []   # (tipo, conteúdo) de cada seção, em ordem
+        for section in sections:
+            if isinstance(section, Text):
+                self._parts.append((Text, section.lines))
+            elif isinstance(section, Each):
+                self._parts.append((Each, len(self._each)))
+                # Uma função por variante da linha e por final (sep)
+                compiled = [_compile_line(line, section.sep) if line else None
+                            for line in (section.line, section.first, section.corresponding)]
+                self._each.append((*compiled, section.when))
+            elif isinstance(section, Affiliations):
+                self._parts.append((Affiliations, _compile_line(section.line, section.sep)))
+            else:
+                self._parts.append((type(section), compile_format(section.line)))
+
+    def _context(self, entry, index):
+        ctx = entry.to_dict() if isinstance(entry, Contact) else {**DEFAULT_CONTACT, **entry}
+        for key in FIELDS:
+            # null (ou um número) no JSON: vale como texto, e um campo
+            # obrigatório null conta como vazio
+            if type(ctx[key]) is not str:
+                ctx[key] = str(ctx[key] or "")
+        for key in self.required:
+            if not ctx[key].strip():
+                raise ValueError(f"O campo obrigatório '{key}' está ausente ou vazio para {ctx['name'] or '<desconhecido>'}")
+        if self.orcid and ctx["orcid"]:
+            ctx["orcid"], valid = check_orcid(ctx["orcid"])
+            if not valid:
+                raise ValueError(f"ORCID inválido '{ctx['orcid']}' para {ctx['name'] or '<desconhecido>'}")
+        if self.escape:
+            for key in FIELDS:
+                ctx[key] = _escape_field(ctx[key])
+        ctx["number"] = index + 1
+        ctx["letter"] = chr(index + ord('A'))
+        ctx["first"], ctx["last"], ctx["initial"] = parse_name(ctx["name"])
+        for name, field, fmt in self._optional:
+            ctx[name] = fmt(ctx) if ctx[field] else ""
+        return ctx
+
+    def render(self, data, corresponding=0, affiliations=AFFILIATIONS):
+        """
+        Texto LaTeX para os contatos `data`, na ordem dada; `corresponding`
+        é a posição do autor correspondente.
+        """
+        L = len(data)
+        if L == 0:
+            return ""
+
+        contexts = [self._context(entry, ID) for ID, entry in enumerate(data)]
+        first_ctx = []   # contexto do primeiro autor de cada afiliação
+        if self._affiliation is not None:
+            numbers, first = affiliations.number(data, self._affiliation_fields)
+            for ctx, number in zip(contexts, numbers):
+                ctx["aff"] = number
+            first_ctx = [contexts[pos] for pos in first]
+
+        def ending(ID, L=L):
+            return 2 if ID == L - 1 else 1 if ID == L - 2 else 0
+
+        outputs = []
+        for line, first, corr, when in self._each:
+            # Autores do meio em lote; as poucas posições especiais são refeitas
+            output = list(map(line[0], contexts))
+            if L >= 2:
+                output[L - 2] = line[1](contexts[L - 2])
+            output[L - 1] = line[2](contexts[L - 1])
+            output[0] = first[ending(0)](contexts[0])
+            if corr:
+                output[corresponding] = corr[ending(corresponding)](contexts[corresponding])
+            if when:
+                output = [text for text, ctx in zip(output, contexts) if ctx[when]]
+            outputs.append(output)
+        corresponding_ctx = contexts[corresponding]
+
+        latex_lines = []
+        for kind, part in self._parts:
+            if kind is Text:
+                latex_lines.extend(part)
+            elif kind is Each:
+                latex_lines.extend(outputs[part])
+            elif kind is Corresponding:
+                latex_lines.append(part(corresponding_ctx))
+            else:
+                A = len(first_ctx)
+                latex_lines.extend(part[ending(n, A)]({**ctx, "affiliation": self._affiliation(ctx)})
+                                   for n, ctx in enumerate(first_ctx))
+        return "\n".join(latex_lines)
+
+
+MDPI_TEMPLATE = Template(
+    Text("% Author Orchid ID: enter ID or remove command"),
+    Each("\\newcommand{{\\orcidauthor{letter}}}{{{orcid}}}", when="orcid"),
+    Text("",
+         "% Authors, for the paper (add full first names)",
+         "\\Author{%"),
+    Each("   {name}$^{{{aff}}}${orcid_ref}",
+         corresponding="   {name}$^{{{aff},}}*${orcid_ref}",
+         sep=(", %", " and %", "%")),
+    Text("}",
+         "",
+         "%\\longauthorlist{yes}",
+         "",
+         "% MDPI internal command: Authors, for metadata in PDF",
+         "\\AuthorNames{%"),
+    Each("   {name}", sep=(", %", " and %", "%")),
+    Text("}%",
+         "",
+         "% MDPI internal command: Authors, for citation in the left column, only choose below one of them according to the journal style",
+         "\\isAPAStyle{%",
+         "    \\AuthorCitation{%"),
+    Each("    {last}, {initial}", sep=(", %", " \\&%", " %")),
+    Text("    }%",
+         "}{\\isChicagoStyle{%",
+         "    \\AuthorCitation{%"),
+    Each("    {name}", first="    {last}, {first}", sep=(", %", ", and %", ". %")),
+    Text("    }%",
+         "}{%",
+         "    \\AuthorCitation{%"),
+    Each("    {last}, {initial}", sep=("; %", "; %", " %")),
+    Text("    }%",
+         "}}%",
+         "",
+         "% Affiliations / Addresses (Add [1] after \\address if there is only one affiliation.)",
+         "\\address{%"),
+    Affiliations("    $^{{{aff}}}$ \\quad {affiliation}", sep=("\\\\%", "\\\\%", "%")),
+    Text("}%",
+         "",
+         "% Contact information of the corresponding author"),
+    Corresponding("\\corres{{Correspondence: {email}}}"),
+    optional={
+        "orcid_ref":    ("orcid",   "\\orcid{letter}{{}}"),
+        "city_part":    ("city",    ", {city}"),
+        "country_part": ("country", ", {country}"),
+    },
+    affiliation="{organization}{city_part}{country_part}",
+    orcid=True,
+)
+
+_AFF_SEP = ",\n            "
+
+ELSEVIER_TEMPLATE = Template(
+    Corresponding("\\cortext[cor1]{{{name}}}\n"),
+    Each("\\author[{aff}]{{{name}}}\n\\ead{{{email}}}\n",
+         corresponding="\\author[{aff}]{{{name}\\corref{{cor1}}}}\n\\ead{{{email}}}\n"),
+    Affiliations("\\affiliation[{aff}]{{{affiliation}}}\n"),
+    escape=True,
+    required=("name", "email", "organization"),
+    optional={
+        "addressline_part": ("addressline", _AFF_SEP + "addressline={{{addressline}}}"),
+        "city_part":        ("city",        _AFF_SEP + "city={{{city}}}"),
+        "postcode_part":    ("postcode",    _AFF_SEP + "postcode={{{postcode}}}"),
+        "state_part":       ("state",       _AFF_SEP + "state={{{state}}}"),
+        "country_part":     ("country",     _AFF_SEP + "country={{{country}}}"),
+    },
+    affiliation="organization={{{organization}}}{addressline_part}{city_part}{postcode_part}{state_part}{country_part}",
+)
+
+# Formatos disponíveis para exportação (nome -> modelo)
+TEMPLATES = {
+    "elsevier": ELSEVIER_TEMPLATE,
+    "mdpi": MDPI_TEMPLATE,
+}
+
+def export_mdpi_authors(data):
+    return MDPI_TEMPLATE.render(data)
+
+def export_elsevier_authors(data):
+    return ELSEVIER_TEMPLATE.render(data)
+
+# Formatos disponíveis para exportação (nome -> função)
+EXPORTERS = {name: template.render for name, template in TEMPLATES.items()}
@@ -0,0 +1,586 @@
+#!/usr/bin/python3
+import os
+import sys
+import json
+import mmap
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, Counter
+from functools import partial
+from itertools import accumulate, chain
+
+from academic_contacts.modules.contact  import Contact, FIELDS, ID_KEY, INTERNED_FIELDS
+from academic_contacts.modules.jsonio   import atomic_write
+from academic_contacts.modules.search   import contact_text
+
+MAP_SUFFIX = ".map"
+# Segundo nome, usado enquanto o primeiro está aberto: no Windows um
+# arquivo mapeado não pode ser substituído
+ALT_MAP_SUFFIX = ".map2"
+
+# Uma coluna por campo, mais os campos extras (JSON) e o texto de busca
+_COLUMNS = FIELDS + ("extra", "text")
+_EXTRA = len(FIELDS)
+_TEXT = _EXTRA + 1
+
+# Campos cujos valores ficam contados no arquivo (value_counts): os
+# ORCIDs são conferidos a cada abertura e a contagem só muda ao gravar
+COUNTED_FIELDS = ("orcid",)
+
+_MAGIC = b"ACMAP\x00\x02\x00"
+# magic, ordem dos bytes, contatos, mtime e tamanho do JSON, maior número de campos
+_HEADER = struct.Struct("<8s8sQqQQ")
+# início da tabela de offsets, tamanho de cada offset, início e tamanho do pool
+_COLUMN = struct.Struct("<QQQQ")
+# início da tabela de contagens (uint64), número de valores distintos, início e tamanho do pool
+_COUNTS = struct.Struct("<QQQQ")
+_BYTEORDER = sys.byteorder.encode("ascii").ljust(8, b"\0")
+
+
+def _align(pos):
+    return (pos + 7) & ~7
+
+
+def _encode(text):
+    return text.encode("utf-8", "surrogatepass")
+
+
+def _decode(data):
+    return data.decode("utf-8", "surrogatepass")
+
+
+def _split(contact):
+    """
+    Valores das colunas de um contato. Campos que não são texto (ou que
+    contêm "\\0", o separador usado por _column) vão para a coluna extra,
+    em JSON; o texto de busca vai inteiro (é lido pelos offsets).
+    """
+    values = []
+    extra = dict(contact.extra) if contact.extra else {}
+    extra.pop(ID_KEY, None)
+    for key in FIELDS:
+        value = getattr(contact, key)
+        if type(value) is str and "\0" not in value:
+            values.append(value)
+        else:
+            values.append("")
+            extra[key] = value
+    values.append(json.dumps(extra, ensure_ascii=False) if extra else "")
+    values.append(contact_text(contact))
+    return values
+
+
+def write_map(path, signature, contacts):
+    """
+    Grava o arquivo mapeado (*.AcademicContacts.json.map) dos contatos
+    lidos do JSON com a assinatura `signature` (mtime, tamanho). Cada
+    coluna é um pool UTF-8 com os valores terminados em "\\0" e uma
+    tabela com o offset de cada valor no pool. Os valores distintos dos
+    campos de COUNTED_FIELDS vão num pool à parte, com quantos contatos
+    têm cada um.
+    """
+    rows = [_split(contact) for contact in contacts]
+    count = len(rows)
+    field_max = max((len(contact) for contact in contacts), default=0)
+    pieces = []
+    directory = []
+    pos = _align(_HEADER.size + _COLUMN.size * len(_COLUMNS) + _COUNTS.size * len(COUNTED_FIELDS))
+    for n in range(len(_COLUMNS)):
+        values = [_encode(row[n]) for row in rows]
+        pool = b"\0".join(values) + b"\0" if values else b""
+        offsets = array("Q", accumulate(chain((0,), (len(value) + 1 for value in values))))
+        if len(pool) < 1 << 32:
+            offsets = array("I", offsets)
+        table = offsets.tobytes()
+        directory.append((pos, offsets.itemsize, _align(pos + len(table)), len(pool)))
+        pad = _align(pos + len(table)) - pos - len(table)
+        pieces += [table, b"\0" * pad, pool, b"\0" * (_align(len(pool)) - len(pool))]
+        pos = _align(pos + len(table)) + _align(len(pool))
+
+    for key in COUNTED_FIELDS:
+        counts = Counter(row[FIELDS.index(key)] for row in rows)
+        counts.pop("", None)
+        pool = b"\0".join(_encode(value) for value in counts) + b"\0" if counts else b""
+        table = array("Q", counts.values()).tobytes()
+        directory.append((pos, len(counts), pos + len(table), len(pool)))
+        pieces += [table, pool, b"\0" * (_align(len(pool)) - len(pool))]
+        pos += len(table) + _align(len(pool))
+
+    header = _HEADER.pack(_MAGIC, _BYTEORDER, count, signature[0], signature[1], field_max)
+    header += b"".join(_COLUMN.pack(*entry) for entry in directory[:len(_COLUMNS)])
+    header += b"".join(_COUNTS.pack(*entry) for entry in directory[len(_COLUMNS):])
+    header += b"\0" * (_align(len(header)) - len(header))
+    atomic_write(path, [header] + pieces)
+
+
+def map_signature(path):
+    """
+    Assinatura do JSON de onde o arquivo mapeado foi gravado, ou None
+    se ele não existir ou não for deste formato.
+    """
+    try:
+        with open(path, "rb") as f:
+            head = f.read(_HEADER.size)
+    except OSError:
+        return None
+    if len(head) < _HEADER.size:
+        return None
+    magic, byteorder, _, mtime, size, _ = _HEADER.unpack(head)
+    if magic != _MAGIC or byteorder != _BYTEORDER:
+        return None
+    return (mtime, size)
+
+
+def map_paths(path):
+    """
+    Os dois nomes possíveis do arquivo mapeado ao lado do JSON `path`.
+    """
+    return (path + MAP_SUFFIX, path + ALT_MAP_SUFFIX)
+
+
+def find_map(path, signature):
+    """
+    O arquivo mapeado ao lado de `path` gravado para a assinatura
+    `signature` do JSON, ou None. Os outros (desatualizados) são apagados
+    quando possível.
+    """
+    found = None
+    for candidate in map_paths(path):
+        if found is None and map_signature(candidate) == signature:
+            found = candidate
+        elif os.path.exists(candidate):
+            try:
+                os.remove(candidate)
+            except OSError:
+                pass   # Ainda aberto (Windows)
+    return found
+
+
+class MappedContactStore:
+    """
+    Contatos de um *.AcademicContacts.json lidos do arquivo mapeado ao
+    lado dele (write_map), com a interface de ContactStore. Nada é
+    decodificado ao abrir: um contato só vira Contact quando é pedido
+    (um pequeno cache guarda os exibidos) e o filtro procura os bytes da
+    consulta direto no pool de textos de busca. Os IDs são as posições
+    no arquivo (a partir de 1) e a ordem da lista é sempre a dos IDs;
+    as alterações ficam em memória, por cima do arquivo mapeado.
+    """
+    CACHE_SIZE = 512
+    # Contatos por bloco do pool de textos varrido pelo filtro
+    BLOCK = 4096
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, byteorder, count, mtime, size, field_max = _HEADER.unpack_from(self._map, 0)
+            if magic != _MAGIC or byteorder != _BYTEORDER:
+                raise ValueError(f"Not a contacts map file: {os.path.basename(path)}")
+            self.signature = (mtime, size)
+            self._offsets = []   # por coluna: offsets dos valores (memoryview sobre o arquivo)
+            self._pools = []     # por coluna: (início, tamanho) do pool
+            view = memoryview(self._map)
+            for n in range(len(_COLUMNS)):
+                table, itemsize, pool, length = _COLUMN.unpack_from(self._map, _HEADER.size + n * _COLUMN.size)
+                self._offsets.append(view[table:table + (count + 1) * itemsize].cast("I" if itemsize == 4 else "Q"))
+                self._pools.append((pool, length))
+            view.release()
+            self._counts = {}    # campo de COUNTED_FIELDS -> entrada de _COUNTS
+            first = _HEADER.size + len(_COLUMNS) * _COLUMN.size
+            for n, key in enumerate(COUNTED_FIELDS):
+                self._counts[key] = _COUNTS.unpack_from(self._map, first + n * _COUNTS.size)
+        except Exception:
+            self.close()
+            raise
+
+        self._base = count          # IDs 1..count estão no arquivo mapeado
+        self._count = count
+        self._order = None          # IDs na ordem (array), depois da primeira inserção ou exclusão
+        self._contacts = {}         # ID -> contato editado ou criado aqui
+        self._texts = {}            # ID -> texto de busca desses contatos
+        self._deleted = set()       # IDs do arquivo mapeado que foram apagados
+        self._next_id = count + 1
+        self._field_max = field_max
+        self._cache = OrderedDict()   # ID -> Contact
+        self.version = 0              # conta as alterações feitas na lista
+        self._versions = {}           # ID -> versão da última alteração do contato
+        self._changes = {}            # ID -> (versão da última alteração, contato como está no arquivo ou None)
+
+    def close(self):
+        for offsets in getattr(self, "_offsets", ()):
+            offsets.release()
+        self._offsets = []
+        if getattr(self, "_map", None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    # Leitura do arquivo mapeado
+
+    def _value(self, n, i):
+        offsets = self._offsets[n]
+        start = self._pools[n][0]
+        return self._map[start + offsets[i]:start + offsets[i + 1] - 1]
+
+    def _decode_base(self, cid):
+        i = cid - 1
+        contact = Contact.from_row([_decode(self._value(n, i)) for n in range(_EXTRA)] + [None])
+        extra = self._value(_EXTRA, i)
+        if extra:
+            contact.extra = json.loads(_decode(extra))
+            for key in FIELDS:
+                if key in contact.extra:
+                    setattr(contact, key, contact.extra.pop(key))
+            contact.extra = contact.extra or None
+        return contact
+
+    def _column(self, n):
+        """
+        Todos os valores da coluna `n` (bytes), na ordem do arquivo.
+        """
+        start, length = self._pools[n]
+        # Nenhum valor contém "\0" (_split), então o último pedaço é vazio
+        return self._map[start:start + length].split(b"\0")[:-1]
+
+    def _base_contacts(self):
+        columns = []
+        for n, key in enumerate(FIELDS):
+            values = self._column(n)
+            if key in INTERNED_FIELDS:
+                # Poucos valores distintos: um decode por valor, todos compartilhados
+                decoded = {value: _decode(value) for value in set(values)}
+                columns.append(list(map(decoded.__getitem__, values)))
+            else:
+                columns.append([value.decode("utf-8", "surrogatepass") for value in values])
+        contacts = [Contact.from_row(row + (None,)) for row in zip(*columns)]
+        if self._has_extra():
+            for i, extra in enumerate(self._column(_EXTRA)):
+                if extra:
+                    contacts[i] = self._decode_base(i + 1)
+        return contacts
+
+    def _has_extra(self):
+        # Sem campos extras o pool da coluna só tem os "\0"
+        return self._pools[_EXTRA][1] > self._base
+
+    def _scan(self, needle, first=0, last=None):
+        """
+        IDs dos contatos do arquivo mapeado (posições `first` a `last`)
+        cujo texto de busca contém `needle` (bytes). O pool é lido em
+        blocos de BLOCK contatos: com poucas ocorrências num bloco cada
+        uma é localizada pelos offsets; com muitas, o bloco é dividido
+        nos textos.
+        """
+        offsets = self._offsets[_TEXT]
+        start = self._pools[_TEXT][0]
+        last = self._base if last is None else last
+        hits = []
+        for a in range(first, last, self.BLOCK):
+            b = min(a + self.BLOCK, last)
+            base = offsets[a]
+            block = self._map[start + base:start + offsets[b]]
+            found = block.count(needle)
+            if not found:
+                continue
+            if found * 8 < b - a:
+                pos = block.find(needle)
+                while pos >= 0:
+                    i = bisect_right(offsets, base + pos, a, b) - 1
+                    hits.append(i + 1)
+                    pos = block.find(needle, offsets[i + 1] - base)
+                continue
+            texts = block.split(b"\0")
+            if len(texts) == b - a + 1:
+                hits += [a + k + 1 for k, text in enumerate(texts) if needle in text]
+            else:
+                # Algum texto contém "\0": separa pelos offsets
+                hits += [i + 1 for i in range(a, b) if needle in self._value(_TEXT, i)]
+        return hits
+
+    # Interface de ContactStore
+
+    def __len__(self):
+        return self._count
+
+    def _ids(self):
+        return range(1, self._base + 1) if self._order is None else self._order
+
+    def __iter__(self):
+        return (contact for _, contact in self.items())
+
+    def __getitem__(self, pos):
+        return self.get(self.id_at(pos))
+
+    def _ordered(self):
+        # A primeira inserção ou exclusão passa a guardar os IDs
+        if self._order is None:
+            self._order = array("q", range(1, self._base + 1))
+        return self._order
+
+    def _touch(self, cid, original):
+        self.version += 1
+        self._versions[cid] = self.version
+        previous = self._changes.get(cid)
+        self._changes[cid] = (self.version, previous[1] if previous else original)
+
+    def _put(self, cid, contact):
+        self._contacts[cid] = contact
+        self._texts[cid] = contact_text(contact)
+        self._field_max = max(self._field_max, len(contact))
+        self._cache.pop(cid, None)
+
+    def id_at(self, pos):
+        if pos < 0:
+            pos += self._count
+        return self._ids()[pos]
+
+    def position(self, cid):
+        if self._order is None:
+            if 1 <= cid <= self._base:
+                return cid - 1
+            raise KeyError(cid)
+        pos = bisect_left(self._order, cid)
+        if pos == len(self._order) or self._order[pos] != cid:
+            raise KeyError(cid)
+        return pos
+
+    def has_id(self, cid):
+        if cid in self._contacts:
+            return True
+        return isinstance(cid, int) and 1 <= cid <= self._base and cid not in self._deleted
+
+    def get(self, cid):
+        contact = self._contacts.get(cid)
+        if contact is not None:
+            return contact
+        contact = self._cache.get(cid)
+        if contact is None:
+            if not self.has_id(cid):
+                raise KeyError(cid)
+            contact = self._decode_base(cid)
+        self._cache[cid] = contact
+        self._cache.move_to_end(cid)
+        if len(self._cache) > self.CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return contact
+
+    def contact_version(self, cid):
+        return self._versions.get(cid, 0)
+
+    def items(self):
+        """
+        Pares (ID, contato) na ordem da lista. Decodifica todos os
+        contatos (uma coluna por vez).
+        """
+        if not self._contacts and self._order is None:
+            return list(zip(range(1, self._base + 1), self._base_contacts()))
+        base = self._base_contacts()
+        return [(cid, self._contacts.get(cid) or base[cid - 1]) for cid in self._ids()]
+
+    def extend(self, contacts, touch=False, texts=None):
+        """
+        Acrescenta contatos no fim e retorna os seus IDs (sempre novos:
+        o `_id` gravado no arquivo é ignorado, como as posições).
+        """
+        order = self._ordered()
+        new_ids = []
+        for contact in contacts:
+            contact.pop(ID_KEY, None)
+            cid = self._next_id
+            self._next_id += 1
+            self._put(cid, contact)
+            order.append(cid)
+            if touch:
+                self._touch(cid, None)
+            new_ids.append(cid)
+        self._count += len(new_ids)
+        return new_ids
+
+    def append(self, contact):
+        return self.extend([contact], touch=True)[0]
+
+    def insert(self, pos, contact, cid=None):
+        """
+        Volta a inserir um contato apagado com o seu ID, o que o devolve à
+        mesma posição (a ordem é a dos IDs). Sem ID, vai para o fim.
+        """
+        if cid is None or self.has_id(cid) or not isinstance(cid, int) or cid < 1:
+            return self.append(contact)
+        order = self._ordered()
+        order.insert(bisect_left(order, cid), cid)
+        self._deleted.discard(cid)
+        self._next_id = max(self._next_id, cid + 1)
+        self._put(cid, contact)
+        self._touch(cid, None)
+        self._count += 1
+        return cid
+
+    def insert_many(self, items):
+        return [self.insert(pos, contact, cid) for pos, contact, cid in items]
+
+    def replace(self, cid, contact):
+        self._touch(cid, self.get(cid))
+        self._put(cid, contact)
+
+    def remove(self, cid):
+        self.remove_many([cid])
+
+    def remove_many(self, ids):
+        ids = set(ids)
+        for cid in ids:
+            self._touch(cid, self.get(cid))
+            self._contacts.pop(cid, None)
+            self._texts.pop(cid, None)
+            self._cache.pop(cid, None)
+            if cid <= self._base:
+                self._deleted.add(cid)
+        self._order = array("q", (cid for cid in self._ordered() if cid not in ids))
+        self._count = len(self._order)
+
+    def field_count(self):
+        """
+        Maior número de campos entre os contatos (pode ficar maior do
+        que o necessário depois de apagar ou editar contatos).
+        """
+        return self._field_max
+
+    def value_counts(self, key):
+        return self.value_counter(key)()
+
+    def value_counter(self, key):
+        """
+        Como ContactStore.value_counter: as alterações em memória são
+        copiadas agora; o arquivo mapeado não muda.
+        """
+        if key not in FIELDS:
+            raise KeyError(key)
+        return partial(self._value_counts, FIELDS.index(key), set(self._deleted), dict(self._contacts))
+
+    def _value_counts(self, n, deleted, contacts, stop=None):
+        # Rápido (contagem gravada ou varredura da coluna em C): `stop` é ignorado
+        key = FIELDS[n]
+        if key in self._counts:
+            table, number, pool, length = self._counts[key]
+            totals = array("Q")
+            totals.frombytes(self._map[table:table + 8 * number])
+            counts = Counter(dict(zip(self._map[pool:pool + length].split(b"\0"), totals)))
+        else:
+            counts = Counter(self._column(n))
+        # Contatos do arquivo que foram apagados ou trocados não contam
+        for cid in deleted | {cid for cid in contacts if cid <= self._base}:
+            counts[self._value(n, cid - 1)] -= 1
+        result = {}
+        for value, count in counts.items():
+            if value and count > 0:
+                result[_decode(value)] = count
+        # Valores que não são texto (ou com "\0") ficaram na coluna extra
+        if self._has_extra():
+            for i, extra in enumerate(self._column(_EXTRA)):
+                cid = i + 1
+                if extra and cid not in deleted and cid not in contacts:
+                    value = json.loads(_decode(extra)).get(key, "")
+                    if value:
+                        result[value] = result.get(value, 0) + 1
+        for contact in contacts.values():
+            value = contact.get(key, "")
+            if value:
+                result[value] = result.get(value, 0) + 1
+        return result
+
+    def search(self, query):
+        """
+        IDs dos contatos que casam com `query`, na ordem da lista.
+        """
+        if not query:
+            return list(self._ids())
+        hits = [cid for cid in self._scan(_encode(query))
+                if cid not in self._deleted and cid not in self._contacts]
+        if self._texts:
+            hits += [cid for cid, text in self._texts.items() if query in text]
+            hits.sort()
+        return hits
+
+    def filter_ids(self, query, ids):
+        """
+        Mantém, em ordem, só os `ids` que casam com `query`.
+        """
+        if not query:
+            return list(ids)
+        needle = _encode(query)
+        texts = self._texts
+        return [cid for cid in ids
+                if (query in texts[cid] if cid in texts else needle in self._value(_TEXT, cid - 1))]
+
+    def search_chunks(self, needles, accept=None, size=20000):
+        """
+        Como ContactStore.search_chunks: cada parte varre um trecho do
+        arquivo mapeado (_scan) pelo primeiro de `needles` e junta os
+        contatos editados ou criados desse trecho. As alterações em
+        memória são copiadas agora; o arquivo mapeado não muda.
+        """
+        encoded = [_encode(needle) for needle in needles]
+        contacts = dict(self._contacts)
+        texts = dict(self._texts)
+        deleted = set(self._deleted)
+        edited = sorted(texts)
+
+        def scan(first, last, final):
+            hits = []
+            for cid in self._scan(encoded[0], first, last):
+                if cid in deleted or cid in texts:
+                    continue
+                if len(encoded) > 1:
+                    text = self._value(_TEXT, cid - 1)
+                    if not all(needle in text for needle in encoded[1:]):
+                        continue
+                if accept is None or accept(self._decode_base(cid)):
+                    hits.append(cid)
+            # Contatos em memória com IDs deste trecho (os criados ficam no último)
+            end = len(edited) if final else bisect_right(edited, last)
+            own = [cid for cid in edited[bisect_right(edited, first):end]
+                   if all(needle in texts[cid] for needle in needles)
+                   and (accept is None or accept(contacts[cid]))]
+            return sorted(hits + own) if own else hits
+
+        base = self._base
+        starts = range(0, base, size) if base else [0]
+        return [partial(scan, first, min(first + size, base), first + size >= base) for first in starts]
+
+    def changed_ids(self):
+        return set(self._changes)
+
+    def mark_saved(self, version):
+        self._changes = {cid: change for cid, change in self._changes.items() if change[0] > version}
+
+    def mark_synced(self, ids):
+        for cid in ids:
+            self._changes.pop(cid, None)
+
+    def rebase(self, originals):
+        for cid, original in originals.items():
+            change = self._changes.get(cid)
+            if change is not None:
+                self._changes[cid] = (change[0], original)
+
+    def sync_base(self):
+        """
+        Como ContactStore.sync_base (decodifica todos os contatos).
+        """
+        base = [(cid, contact, contact, False) for cid, contact in self.items() if cid not in self._changes]
+        for cid, (_, original) in self._changes.items():
+            base.append((cid, original, self.get(cid) if self.has_id(cid) else None, True))
+        return base
+
+    def save_items(self, compact=False, with_ids=False):
+        return [(cid, contact, None) for cid, contact in self.items()]
+
+    def cache_blobs(self, compact, with_ids, new_blobs):
+        pass
+
+    def to_list(self, with_ids=False):
+        if not with_ids:
+            return [contact.to_dict() for _, contact in self.items()]
+        return [{ID_KEY: cid, **contact.to_dict()} for cid, contact in self.items()]
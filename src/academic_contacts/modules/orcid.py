@@ -0,0 +1,123 @@
+#!/usr/bin/python3
+import re
+import json
+from functools import lru_cache
+
+from academic_contacts.modules.contact import FIELDS
+
+# https://orcid.org/0000-0002-1825-0097, orcid.org/..., 0000-0002-1825-0097, 000000021825009X
+_ORCID = re.compile(r"^(?:(?:https?://)?(?:www\.)?orcid\.org/)?(\d{4})[- ]?(\d{4})[- ]?(\d{4})[- ]?(\d{3}[\dX])/?$",
+                    re.IGNORECASE)
+
+
+def orcid_checksum(base):
+    """
+    Dígito verificador (ISO 7064 11,2) dos 15 primeiros dígitos.
+    """
+    total = 0
+    for digit in base:
+        total = (total + int(digit)) * 2
+    result = (12 - total % 11) % 11
+    return "X" if result == 10 else str(result)
+
+
+@lru_cache(maxsize=1 << 16)
+def check_orcid(value):
+    """
+    (ORCID no formato 0000-0000-0000-0000, válido) para o texto de um
+    campo orcid, aceitando URL, com ou sem hífens. Um campo vazio é
+    ("", True); um texto que não é ORCID é (texto, False). O resultado
+    é guardado para cada valor.
+    """
+    value = value.strip()
+    if not value:
+        return "", True
+    match = _ORCID.match(value)
+    if match is None:
+        return value, False
+    digits = "".join(match.groups()).upper()
+    normalized = "-".join(digits[k:k + 4] for k in range(0, 16, 4))
+    return normalized, orcid_checksum(digits[:15]) == digits[15]
+
+
+def normalize_orcid(value):
+    """
+    O ORCID no formato 0000-0000-0000-0000 se for válido; senão o valor como está.
+    """
+    normalized, valid = check_orcid(value)
+    return normalized if valid else value
+
+
+def orcid_is_valid(contact):
+    value = contact.get("orcid", "")
+    return not isinstance(value, str) or check_orcid(value)[1]
+
+
+def invalid_orcids(contacts):
+    """
+    Contatos de `contacts` com um ORCID preenchido e inválido. Cada valor
+    distinto é verificado uma só vez.
+    """
+    return [contact for contact in contacts if not orcid_is_valid(contact)]
+
+
+def count_invalid_orcids(counts, stop=None):
+    """
+    Quantos contatos têm um ORCID preenchido e inválido, dados os valores
+    do campo e quantos contatos têm cada um ({valor: contatos}, como em
+    value_counts). Se `stop()` ficar True a contagem para e retorna None.
+    """
+    invalid = 0
+    for n, (value, count) in enumerate(counts.items()):
+        if stop is not None and n % 4096 == 0 and stop():
+            return None
+        # Sem passar pelo cache: os valores são quase todos distintos e
+        # expulsariam os dos cards exibidos
+        if isinstance(value, str) and not check_orcid.__wrapped__(value)[1]:
+            invalid += count
+    return invalid
+
+
+class OrcidCache:
+    """
+    Cache local (opcional) de dados do ORCID: um arquivo JSON
+    {"0000-0000-0000-0000": {"name": ..., "organization": ..., ...}}.
+    Preenche os campos vazios de um contato com o ORCID conhecido. O
+    arquivo só é lido no primeiro uso.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._records = None
+
+    def records(self):
+        if self._records is None:
+            self._records = {}
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = {}
+            if isinstance(data, dict):
+                for key, record in data.items():
+                    normalized, valid = check_orcid(key)
+                    if valid and isinstance(record, dict):
+                        self._records[normalized] = record
+        return self._records
+
+    def fill(self, contact):
+        """
+        Cópia de `contact` com os campos vazios preenchidos pelo cache
+        (ou o próprio contato, se não houver nada a preencher).
+        """
+        normalized, valid = check_orcid(contact.get("orcid", ""))
+        record = self.records().get(normalized) if valid and normalized else None
+        if not record:
+            return contact
+        missing = {key: record[key] for key in FIELDS
+                   if isinstance(record.get(key), str) and record[key].strip() and not contact.get(key, "").strip()}
+        if not missing:
+            return contact
+        filled = contact.copy()
+        for key, value in missing.items():
+            filled[key] = value
+        return filled
@@ -0,0 +1,110 @@
+#!/usr/bin/python3
+import re
+
+# Prefixos aceitos no filtro (org:ufes) e os campos que eles restringem
+FIELD_PREFIXES = {
+    "name":         "name",
+    "email":        "email",
+    "org":          "organization",
+    "organization": "organization",
+    "address":      "addressline",
+    "city":         "city",
+    "postcode":     "postcode",
+    "state":        "state",
+    "country":      "country",
+    "orcid":        "orcid",
+}
+
+# prefixo:valor ou prefixo:"valor com espaços" (as aspas podem não ter fechado ainda)
+_TERM = re.compile(r'(?<!\S)([a-z]+):("[^"]*"?|\S*)')
+
+
+def parse_query(text):
+    """
+    Separa o texto do filtro (já em minúsculas) em texto livre e termos
+    por campo. Prefixos desconhecidos ficam no texto livre; um termo sem
+    valor ("org:", enquanto se digita) não restringe nada.
+    """
+    fields = []
+    rest = []
+    last = 0
+    for match in _TERM.finditer(text):
+        field = FIELD_PREFIXES.get(match.group(1))
+        if field is None:
+            continue
+        rest.append(text[last:match.start()].strip())
+        last = match.end()
+        value = match.group(2).strip('"').strip()
+        if value:
+            fields.append((field, value))
+    rest.append(text[last:].strip())
+    return Query(" ".join(piece for piece in rest if piece), fields)
+
+
+def field_text(contact, field):
+    value = contact.get(field, "")
+    return (value if isinstance(value, str) else str(value)).lower()
+
+
+class Query:
+    """
+    Filtro dos cards: `text` tem que aparecer no texto de busca do
+    contato e cada valor de `fields` [(campo, valor)] no seu campo.
+    Os valores dos campos também aparecem no texto de busca, então uma
+    só busca pelo trecho mais longo acha os candidatos de todos os
+    termos, e os campos só são conferidos nesses candidatos.
+    """
+    __slots__ = ("text", "fields")
+
+    def __init__(self, text="", fields=()):
+        self.text = text
+        self.fields = list(fields)
+
+    def __bool__(self):
+        return bool(self.text or self.fields)
+
+    def needles(self):
+        """
+        Trechos que o texto de busca tem que conter, o mais longo primeiro.
+        """
+        needles = {value for _, value in self.fields}
+        if self.text:
+            needles.add(self.text)
+        return sorted(needles, key=len, reverse=True)
+
+    def accepts(self, contact):
+        return all(value in field_text(contact, field) for field, value in self.fields)
+
+    def filter_ids(self, store, ids):
+        """
+        Mantém, em ordem, só os `ids` que casam com a consulta.
+        """
+        for needle in self.needles():
+            ids = store.filter_ids(needle, ids)
+        if self.fields:
+            ids = [cid for cid in ids if self.accepts(store.get(cid))]
+        return list(ids)
+
+    def search(self, store):
+        """
+        IDs dos contatos que casam com a consulta, na ordem da lista.
+        """
+        needles = self.needles()
+        if not needles:
+            return store.search("")
+        ids = store.search(needles[0])
+        for needle in needles[1:]:
+            ids = store.filter_ids(needle, ids)
+        if self.fields:
+            ids = [cid for cid in ids if self.accepts(store.get(cid))]
+        return ids
+
+    def search_chunks(self, store):
+        """
+        A busca em partes (store.search_chunks) para uma thread, ou None
+        se ela deve ser feita direto com search().
+        """
+        needles = self.needles()
+        if not needles:
+            return None
+        return store.search_chunks(needles, self.accepts if self.fields else None)
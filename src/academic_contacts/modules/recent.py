@@ -0,0 +1,153 @@
+#!/usr/bin/python3
+import os
+import pickle
+import hashlib
+
+from academic_contacts.modules.contact  import Contact, ID_KEY
+from academic_contacts.modules.jsonio   import atomic_write
+from academic_contacts.modules.filesync import file_signature
+from academic_contacts.modules.search   import contact_text
+
+SNAPSHOT_SUFFIX = ".pickle"
+# Muda quando o conteúdo dos snapshots muda (os antigos são ignorados)
+SNAPSHOT_FORMAT = 1
+
+
+def file_hash(path, block_size=1 << 20):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_fingerprint(path, signature=None):
+    """
+    (mtime, tamanho, hash do conteúdo) do arquivo, ou None se ele não
+    existir ou se não tiver mais a assinatura (mtime, tamanho) esperada.
+    """
+    before = file_signature(path)
+    if before is None or (signature is not None and tuple(signature) != before):
+        return None
+    try:
+        digest = file_hash(path)
+    except OSError:
+        return None
+    # Mudou durante a leitura: o hash pode misturar as duas versões
+    if file_signature(path) != before:
+        return None
+    return before + (digest,)
+
+
+def write_snapshot(snapshot, fingerprint, ids, contacts):
+    """
+    Grava os contatos lidos de um arquivo com `fingerprint` (de
+    file_fingerprint), junto com os seus textos de busca, que assim não
+    são refeitos ao abrir. `ids` são os IDs a reaproveitar, ou None.
+    """
+    header = {"format": SNAPSHOT_FORMAT, "fingerprint": list(fingerprint), "count": len(contacts)}
+    rows = [contact.to_row() for contact in contacts]
+    texts = [contact_text(contact) for contact in contacts]
+    data = (pickle.dumps(header, pickle.HIGHEST_PROTOCOL)
+            + pickle.dumps((ids, rows, texts), pickle.HIGHEST_PROTOCOL))
+    os.makedirs(os.path.dirname(snapshot), exist_ok=True)
+    atomic_write(snapshot, data)
+
+
+def read_snapshot(snapshot, path):
+    """
+    (contatos, textos de busca) do snapshot se ele ainda corresponde ao
+    conteúdo de `path` (mesmo mtime, tamanho e hash), senão None. O
+    cabeçalho é conferido antes de ler os contatos.
+    """
+    try:
+        with open(snapshot, "rb") as f:
+            header = pickle.load(f)
+            if not isinstance(header, dict) or header.get("format") != SNAPSHOT_FORMAT:
+                return None
+            fingerprint = tuple(header["fingerprint"])
+            if file_signature(path) != fingerprint[:2] or file_fingerprint(path) != fingerprint:
+                return None
+            ids, rows, texts = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, KeyError, ValueError, TypeError):
+        return None
+
+    contacts = [Contact.from_row(row) for row in rows]
+    if ids is not None:
+        for cid, contact in zip(ids, contacts):
+            contact[ID_KEY] = cid
+    return contacts, texts
+
+
+class RecentFiles:
+    """
+    Arquivos abertos por último (o mais recente primeiro), guardados em
+    config["recent_files"]. Cada entrada é um dict com "path" e, depois
+    que o snapshot do arquivo foi gravado, "mtime", "size", "hash" e
+    "count" (número de contatos). Os snapshots ficam em `directory`, um
+    por arquivo, e saem junto com a entrada.
+    """
+    def __init__(self, config, directory, limit=10):
+        self.config = config
+        self.directory = directory
+        self.limit = limit
+
+    def entries(self):
+        entries = []
+        for entry in self.config.get("recent_files", []):
+            # Versões anteriores guardavam só os caminhos
+            if isinstance(entry, str):
+                entry = {"path": entry}
+            if isinstance(entry, dict) and isinstance(entry.get("path"), str):
+                entries.append(entry)
+        return entries
+
+    def paths(self):
+        return [entry["path"] for entry in self.entries()]
+
+    def snapshot_path(self, path):
+        name = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, name + SNAPSHOT_SUFFIX)
+
+    def remember(self, path):
+        """
+        Coloca `path` no topo da lista, com o que já se sabia dele.
+        """
+        entries = self.entries()
+        entry = next((entry for entry in entries if entry["path"] == path), {"path": path})
+        entries = [entry] + [other for other in entries if other["path"] != path]
+        for dropped in entries[self.limit:]:
+            self._remove_snapshot(dropped["path"])
+        self.config["recent_files"] = entries[:self.limit]
+
+    def update(self, path, fingerprint, count):
+        """
+        Registra o snapshot gravado para `path`, se ele ainda está na lista.
+        """
+        mtime, size, digest = fingerprint
+        entries = [dict(entry, mtime=mtime, size=size, hash=digest, count=count) if entry["path"] == path else entry
+                   for entry in self.entries()]
+        if any(entry["path"] == path for entry in entries):
+            self.config["recent_files"] = entries
+        else:
+            self._remove_snapshot(path)
+
+    def count(self, entry):
+        """
+        Número de contatos da entrada, ou None se o arquivo mudou desde
+        o snapshot (só compara mtime e tamanho, para o menu abrir rápido).
+        """
+        if "count" not in entry or file_signature(entry["path"]) != (entry.get("mtime"), entry.get("size")):
+            return None
+        return entry["count"]
+
+    def clear(self):
+        for path in self.paths():
+            self._remove_snapshot(path)
+        self.config["recent_files"] = []
+
+    def _remove_snapshot(self, path):
+        try:
+            os.remove(self.snapshot_path(path))
+        except OSError:
+            pass
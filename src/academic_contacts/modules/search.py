@@ -0,0 +1,174 @@
+#!/usr/bin/python3
+from bisect import bisect_right
+
+def contact_text(contact):
+    """
+    Texto (em minúsculas) usado pelo filtro para um contato. Valores que
+    não são texto (chaves extras do JSON) entram pela sua representação.
+    """
+    return " ".join(value if isinstance(value, str) else str(value) for value in contact.values()).lower()
+
+
+class SearchIndex:
+    """
+    Índice invertido de tokens para o filtro de contatos.
+
+    Cada contato é identificado por uma chave opaca. Para cada chave guarda
+    o texto em minúsculas (cache) e, para cada token (palavra separada por
+    espaços), o conjunto de chaves que o contêm. Um trecho da consulta sem
+    espaços sempre cai dentro de um único token, então os candidatos de uma
+    consulta são a interseção dos contatos cujos tokens contêm cada trecho;
+    o resultado final é confirmado com a busca de substring no texto.
+    """
+    # Consultas curtas casam com quase todo o vocabulário: varre os textos
+    MIN_TOKEN_QUERY = 3
+    # Acima disso um trecho é considerado comum demais para usar o índice
+    MAX_TOKEN_MATCHES = 1024
+
+    def __init__(self):
+        self.texts = {}      # key -> texto em minúsculas
+        self.postings = {}   # token -> set(keys)
+        self._vocab = None   # (tokens, texto com todos os tokens, início de cada token)
+        self._last_query = None
+        self._last_hits = None
+
+    def __len__(self):
+        return len(self.texts)
+
+    def clear(self):
+        self.texts.clear()
+        self.postings.clear()
+        self._vocab = None
+        self._forget_last()
+
+    def rebuild(self, items):
+        """
+        Reconstrói o índice a partir de pares (key, contact).
+        """
+        self.clear()
+        for key, contact in items:
+            self.add(key, contact)
+
+    def add(self, key, contact, text=None):
+        if text is None:
+            text = contact_text(contact)
+        self.texts[key] = text
+        postings = self.postings
+        for token in set(text.split()):
+            keys = postings.get(token)
+            if keys is None:
+                postings[token] = keys = set()
+                self._vocab = None
+            keys.add(key)
+        self._forget_last()
+
+    def remove(self, key):
+        text = self.texts.pop(key, None)
+        if text is None:
+            return
+        for token in set(text.split()):
+            keys = self.postings.get(token)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.postings[token]
+                    self._vocab = None
+        self._forget_last()
+
+    def update(self, key, contact):
+        self.remove(key)
+        self.add(key, contact)
+
+    def _forget_last(self):
+        self._last_query = None
+        self._last_hits = None
+
+    def _vocabulary(self):
+        if self._vocab is None:
+            tokens = list(self.postings)
+            starts = []
+            offset = 0
+            for token in tokens:
+                starts.append(offset)
+                offset += len(token) + 1
+            self._vocab = (tokens, "\n".join(tokens), starts)
+        return self._vocab
+
+    def _token_candidates(self, piece):
+        """
+        Chaves dos contatos com algum token contendo `piece`, ou None
+        se o trecho é tão comum que varrer os textos sai mais barato.
+        """
+        tokens, vocab_text, starts = self._vocabulary()
+        limit = len(self.texts) // 4
+        matched = []
+        total = 0
+
+        # `piece` não tem espaços, então cada ocorrência cai dentro de um token
+        pos = vocab_text.find(piece)
+        while pos != -1:
+            i = bisect_right(starts, pos) - 1
+            keys = self.postings[tokens[i]]
+            matched.append(keys)
+            total += len(keys)
+            if total > limit or len(matched) > self.MAX_TOKEN_MATCHES:
+                return None
+            if i + 1 >= len(starts):
+                break
+            pos = vocab_text.find(piece, starts[i + 1])
+
+        return set().union(*matched)
+
+    def matches(self, query, keys):
+        """
+        Filtra `keys`, mantendo a ordem, pelas que contêm `query`.
+        """
+        texts = self.texts
+        return [key for key in keys if query in texts[key]]
+
+    def candidates(self, query):
+        """
+        Conjunto de chaves que podem conter `query` segundo os tokens (o
+        resultado ainda precisa ser confirmado nos textos), ou None se a
+        consulta é curta ou comum demais e é melhor varrer todos os textos.
+        """
+        pieces = sorted(query.split(), key=len, reverse=True)
+        if not pieces or len(pieces[0]) < self.MIN_TOKEN_QUERY:
+            return None
+        candidates = None
+        for piece in pieces:
+            if len(piece) < self.MIN_TOKEN_QUERY:
+                break
+            piece_keys = self._token_candidates(piece)
+            if piece_keys is None:
+                continue
+            candidates = piece_keys if candidates is None else candidates & piece_keys
+            if not candidates:
+                break
+        return candidates
+
+    def search(self, query):
+        """
+        Retorna o conjunto de chaves cujo texto contém `query`
+        (já em minúsculas), ou None se a consulta estiver vazia.
+        """
+        if not query:
+            return None
+
+        texts = self.texts
+
+        # A consulta só cresceu: basta estreitar o resultado anterior
+        if (self._last_query and self._last_query in query
+                and len(self._last_hits) <= len(texts) // 4):
+            candidates = self._last_hits
+        else:
+            candidates = self.candidates(query)
+
+        if candidates is None:
+            hits = {key for key, text in texts.items() if query in text}
+        else:
+            hits = {key for key in candidates if query in texts[key]}
+
+        self._last_query = query
+        self._last_hits = hits
+        return hits
@@ -0,0 +1,202 @@
+#!/usr/bin/python3
+import locale
+from functools import lru_cache
+
+from academic_contacts.modules.dedup import fold
+from academic_contacts.modules.latex import parse_name
+
+# Campos oferecidos para ordenar e agrupar ("surname" vem do nome)
+SORT_FIELDS  = ("name", "surname", "email", "organization", "city", "state", "country")
+GROUP_FIELDS = ("organization", "city", "state", "country")
+
+# Acima disso as chaves que faltam são lidas de uma vez com store.items()
+BULK_KEYS = 1000
+
+
+@lru_cache(maxsize=1 << 16)
+def collation_key(text):
+    """
+    Chave de ordenação de um texto, numa só string para comparar rápido:
+    primeiro sem acentos e sem maiúsculas (como num dicionário), depois
+    a ordem do locale (LC_COLLATE, definido em program.main) para
+    desempatar. Textos vazios vão para o fim.
+    Organizações e países se repetem muito: cada valor é calculado uma vez.
+    """
+    folded = fold(text)
+    if not folded:
+        return "\uffff"
+    try:
+        collated = locale.strxfrm(text)
+    except ValueError:
+        collated = text
+    # "\0" não aparece em `folded`, então "ab" < "abc" como deve ser
+    return folded + "\0" + collated
+
+
+def group_key(key):
+    """
+    Parte de uma chave de collation_key() que define o grupo: grafias
+    que só diferem em acentos e maiúsculas caem no mesmo grupo.
+    """
+    return key.partition("\0")[0]
+
+
+def field_text(contact, field):
+    # O JSON pode trazer null ou números: valem como texto ("" para null)
+    return str(contact.get(field) or "")
+
+
+def field_key(contact, field):
+    if field == "surname":
+        first, rest, _ = parse_name(field_text(contact, "name"))
+        # Sobrenome como na exportação; quem só tem um nome fica por ele
+        return collation_key(rest or first)
+    return collation_key(field_text(contact, field))
+
+
+def _contacts(store, ids):
+    # Pares (ID, contato); muitos de uma vez numa só leitura do store
+    if len(ids) > BULK_KEYS:
+        wanted = set(ids)
+        return ((cid, contact) for cid, contact in store.items() if cid in wanted)
+    return ((cid, store.get(cid)) for cid in ids)
+
+
+class GroupHeader:
+    """
+    Linha de título de um grupo de cards.
+    """
+    __slots__ = ("key", "title", "count")
+
+    def __init__(self, key, title):
+        self.key = key
+        self.title = title
+        self.count = 0
+
+
+class CardOrder:
+    """
+    Ordem dos cards na tela: campos de ordenação (em sequência, a ordem
+    do arquivo desempata) e um campo opcional de agrupamento. As chaves
+    de cada contato são calculadas uma vez e guardadas por versão do
+    contato, então reordenar só ordena tuplas já prontas.
+    """
+    def __init__(self, sort=(), group=""):
+        self.sort = []
+        self.group = ""
+        self.collapsed = set()   # chaves dos grupos recolhidos
+        self._keys = {}          # ID -> (versão, {campo: chave})
+        self._composed = {}      # ID -> chave completa nos campos atuais
+        self.configure(sort, group)
+
+    def configure(self, sort, group):
+        fields = self.fields()
+        self.sort = [field for field in sort if field in SORT_FIELDS]
+        if group != self.group:
+            self.collapsed.clear()
+        self.group = group if group in GROUP_FIELDS else ""
+        if self.fields() != fields:
+            self._composed.clear()
+
+    def active(self):
+        return bool(self.sort or self.group)
+
+    def clear(self):
+        # Outro store: os IDs não valem mais
+        self._keys.clear()
+        self._composed.clear()
+        self.collapsed.clear()
+
+    def forget(self, ids):
+        # Contatos apagados: as chaves guardadas não servem mais
+        for cid in ids:
+            self._keys.pop(cid, None)
+            self._composed.pop(cid, None)
+
+    def fields(self):
+        return ([self.group] if self.group else []) + self.sort
+
+    def keys(self, store, ids):
+        """
+        {ID: chave nos campos atuais} com (pelo menos) os contatos `ids`.
+        """
+        fields = self.fields()
+        cache = self._keys
+        composed = self._composed
+        version_of = store.contact_version
+        pending = []
+        for cid in ids:
+            cached = cache.get(cid)
+            version = version_of(cid)
+            if cached is None or cached[0] != version:
+                cache[cid] = (version, {})
+                composed.pop(cid, None)
+                pending.append(cid)
+            elif cid not in composed and any(field not in cached[1] for field in fields):
+                pending.append(cid)
+        for cid, contact in _contacts(store, pending):
+            per_field = cache[cid][1]
+            for field in fields:
+                if field not in per_field:
+                    per_field[field] = field_key(contact, field)
+
+        for cid in ids:
+            if cid not in composed:
+                per_field = cache[cid][1]
+                key = tuple(per_field[field] for field in self.sort)
+                if self.group:
+                    key = (group_key(per_field[self.group]),) + key
+                composed[cid] = key
+        return composed
+
+    def moved(self, store, ids):
+        """
+        True se a chave de algum dos contatos `ids` (já editados) mudou.
+        """
+        before = {cid: self._composed.get(cid) for cid in ids}
+        after = self.keys(store, ids)
+        return any(before[cid] is None or before[cid] != after[cid] for cid in ids)
+
+    def arrange(self, store, ids):
+        """
+        Linhas da tela para os contatos `ids` (na ordem do arquivo): IDs
+        ordenados e, com agrupamento, um GroupHeader antes de cada grupo
+        (os cards dos grupos recolhidos ficam de fora). Retorna também,
+        para cada linha de card, (posição no grupo, tamanho do grupo), ou
+        None sem agrupamento.
+        """
+        keys = self.keys(store, ids)
+        ordered = sorted(ids, key=keys.__getitem__)
+        if not self.group:
+            return ordered, None
+
+        rows = []
+        numbers = []
+        header = None
+        members = []
+        for cid in ordered:
+            key = keys[cid][0]
+            if header is None or header.key != key:
+                self._close(header, members, rows, numbers)
+                title = field_text(store.get(cid), self.group).strip() or f"(no {self.group})"
+                header = GroupHeader(key, title)
+                members = []
+            members.append(cid)
+        self._close(header, members, rows, numbers)
+        return rows, numbers
+
+    def _close(self, header, members, rows, numbers):
+        if header is None:
+            return
+        header.count = len(members)
+        rows.append(header)
+        numbers.append(None)
+        if header.key not in self.collapsed:
+            rows.extend(members)
+            numbers.extend((n + 1, len(members)) for n in range(len(members)))
+
+    def toggle(self, header):
+        if header.key in self.collapsed:
+            self.collapsed.discard(header.key)
+        else:
+            self.collapsed.add(header.key)
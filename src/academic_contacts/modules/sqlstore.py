@@ -0,0 +1,329 @@
+#!/usr/bin/python3
+import os
+import json
+import sqlite3
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from urllib.request import pathname2url
+
+from academic_contacts.modules.contact import Contact, FIELDS
+from academic_contacts.modules.search  import contact_text
+
+DB_SUFFIX = ".AcademicContacts.db"
+
+_COLUMNS = ", ".join(FIELDS)
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS contacts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    {", ".join(f"{key} TEXT NOT NULL DEFAULT ''" for key in FIELDS)},
+    extra TEXT,
+    field_count INTEGER NOT NULL,
+    search_text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS contacts_field_count ON contacts(field_count);
+"""
+
+# Índice de texto (trigramas) sincronizado com a tabela por triggers
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS contacts_fts USING fts5(
+    search_text, content='contacts', content_rowid='id', tokenize='trigram'
+);
+"""
+
+_FTS_TRIGGERS = """
+CREATE TRIGGER IF NOT EXISTS contacts_ai AFTER INSERT ON contacts BEGIN
+    INSERT INTO contacts_fts(rowid, search_text) VALUES (new.id, new.search_text);
+END;
+CREATE TRIGGER IF NOT EXISTS contacts_ad AFTER DELETE ON contacts BEGIN
+    INSERT INTO contacts_fts(contacts_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text);
+END;
+CREATE TRIGGER IF NOT EXISTS contacts_au AFTER UPDATE ON contacts BEGIN
+    INSERT INTO contacts_fts(contacts_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text);
+    INSERT INTO contacts_fts(rowid, search_text) VALUES (new.id, new.search_text);
+END;
+"""
+
+_DROP_FTS_TRIGGERS = """
+DROP TRIGGER IF EXISTS contacts_ai;
+DROP TRIGGER IF EXISTS contacts_ad;
+DROP TRIGGER IF EXISTS contacts_au;
+"""
+
+
+def _row_values(contact):
+    extra = json.dumps(contact.extra, ensure_ascii=False) if contact.extra else None
+    return tuple(getattr(contact, key) for key in FIELDS) + (extra, len(contact), contact_text(contact))
+
+
+def _row_contact(row):
+    data = dict(zip(FIELDS, row[1:-1]))
+    if row[-1]:
+        data.update(json.loads(row[-1]))
+    return Contact.from_dict(data)
+
+
+def _value_counts(conn, key):
+    if key not in FIELDS:
+        raise KeyError(key)
+    return dict(conn.execute(f"SELECT {key}, COUNT(*) FROM contacts WHERE {key} != '' GROUP BY {key}"))
+
+
+class SqliteContactStore:
+    """
+    Armazenamento dos contatos num banco SQLite (*.AcademicContacts.db),
+    com a mesma interface de ContactStore. Os contatos ficam no disco;
+    só os que são exibidos passam pela memória (com um pequeno cache).
+    O filtro usa um índice FTS5 de trigramas sobre o mesmo texto usado
+    por SearchIndex, então casa exatamente as mesmas substrings.
+
+    As alterações ficam numa transação até commit() (o "Save").
+    """
+    CACHE_SIZE = 512
+    # O índice de trigramas só serve para consultas com 3+ caracteres
+    MIN_FTS_QUERY = 3
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(_SCHEMA)
+        try:
+            self.conn.executescript(_FTS_SCHEMA + _FTS_TRIGGERS)
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            # SQLite sem FTS5/trigram: o filtro varre a coluna search_text
+            self.has_fts = False
+        self.conn.commit()
+        self._cache = OrderedDict()   # ID -> Contact
+        self.version = 0              # conta as alterações feitas nesta sessão
+        self._versions = {}           # ID -> versão da última alteração
+        self._count = self.conn.execute("SELECT COUNT(*) FROM contacts").fetchone()[0]
+        self._ids = None              # IDs em ordem (array), lidos no primeiro uso e mantidos
+
+    def close(self):
+        self.conn.rollback()
+        self.conn.close()
+
+    def commit(self):
+        self.conn.commit()
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        cursor = self.conn.execute(f"SELECT id, {_COLUMNS}, extra FROM contacts ORDER BY id")
+        while True:
+            rows = cursor.fetchmany(1000)
+            if not rows:
+                return
+            for row in rows:
+                yield _row_contact(row)
+
+    def __getitem__(self, pos):
+        return self.get(self.id_at(pos))
+
+    def _cache_put(self, cid, contact):
+        self._cache[cid] = contact
+        self._cache.move_to_end(cid)
+        if len(self._cache) > self.CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+    def reset(self, contacts):
+        """
+        Substitui todos os contatos. Numa importação em massa os triggers
+        saem de cena e o índice de texto é reconstruído uma vez no fim,
+        o que é bem mais rápido do que atualizá-lo linha a linha.
+        """
+        self._cache.clear()
+        self._count = 0
+        self._ids = None
+        if not self.conn.in_transaction:
+            # O sqlite3 só abre a transação sozinho antes de DML, não de DROP
+            self.conn.execute("BEGIN")
+        if not self.has_fts:
+            self.conn.execute("DELETE FROM contacts")
+            self.extend(contacts)
+            return
+
+        # executescript faria commit; os comandos vão um a um na transação
+        for statement in _DROP_FTS_TRIGGERS.split(";")[:-1]:
+            self.conn.execute(statement)
+        self.conn.execute("DELETE FROM contacts")
+        self.extend(contacts)
+        self.conn.execute("INSERT INTO contacts_fts(contacts_fts) VALUES ('rebuild')")
+        for statement in _FTS_TRIGGERS.split("END;")[:-1]:
+            self.conn.execute(statement + "END;")
+
+    def _touch(self, cid):
+        self.version += 1
+        self._versions[cid] = self.version
+
+    def contact_version(self, cid):
+        return self._versions.get(cid, 0)
+
+    def extend(self, contacts, touch=False):
+        first = self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM contacts").fetchone()[0] + 1
+        self.conn.executemany(
+            f"INSERT INTO contacts ({_COLUMNS}, extra, field_count, search_text) "
+            f"VALUES ({', '.join('?' * (len(FIELDS) + 3))})",
+            (_row_values(contact) for contact in contacts))
+        new_ids = [row[0] for row in self.conn.execute("SELECT id FROM contacts WHERE id >= ? ORDER BY id", (first,))]
+        self._count += len(new_ids)
+        if self._ids is not None:
+            self._ids.extend(new_ids)
+        if touch:
+            for cid in new_ids:
+                self._touch(cid)
+        return new_ids
+
+    def append(self, contact):
+        return self.extend([contact], touch=True)[0]
+
+    def insert(self, pos, contact, cid=None):
+        """
+        Volta a inserir um contato apagado com o seu ID, o que o devolve à
+        mesma posição (a ordem é a dos IDs). Sem ID, vai para o fim.
+        """
+        if cid is None or self.conn.execute("SELECT 1 FROM contacts WHERE id = ?", (cid,)).fetchone():
+            return self.append(contact)
+        self.conn.execute(
+            f"INSERT INTO contacts (id, {_COLUMNS}, extra, field_count, search_text) "
+            f"VALUES ({', '.join('?' * (len(FIELDS) + 4))})",
+            (cid,) + _row_values(contact))
+        self._count += 1
+        if self._ids is not None:
+            self._ids.insert(bisect_left(self._ids, cid), cid)
+        self._touch(cid)
+        return cid
+
+    def insert_many(self, items):
+        return [self.insert(pos, contact, cid) for pos, contact, cid in items]
+
+    def _id_array(self):
+        # Uma varredura da tabela (~0,5 s por milhão de contatos), depois
+        # id_at e position são buscas na memória em vez de OFFSET e COUNT
+        if self._ids is None:
+            self._ids = array("q", (row[0] for row in self.conn.execute("SELECT id FROM contacts ORDER BY id")))
+        return self._ids
+
+    def id_at(self, pos):
+        return self._id_array()[pos]
+
+    def position(self, cid):
+        ids = self._id_array()
+        pos = bisect_left(ids, cid)
+        if pos == len(ids) or ids[pos] != cid:
+            raise KeyError(cid)
+        return pos
+
+    def has_id(self, cid):
+        return self.conn.execute("SELECT 1 FROM contacts WHERE id = ?", (cid,)).fetchone() is not None
+
+    def items(self):
+        """
+        Pares (ID, contato) na ordem da lista.
+        """
+        cursor = self.conn.execute(f"SELECT id, {_COLUMNS}, extra FROM contacts ORDER BY id")
+        return [(row[0], _row_contact(row)) for row in cursor]
+
+    def get(self, cid):
+        contact = self._cache.get(cid)
+        if contact is None:
+            row = self.conn.execute(f"SELECT id, {_COLUMNS}, extra FROM contacts WHERE id = ?", (cid,)).fetchone()
+            if row is None:
+                raise KeyError(cid)
+            contact = _row_contact(row)
+        self._cache_put(cid, contact)
+        return contact
+
+    def replace(self, cid, contact):
+        assignments = ", ".join(f"{key} = ?" for key in FIELDS)
+        self.conn.execute(
+            f"UPDATE contacts SET {assignments}, extra = ?, field_count = ?, search_text = ? WHERE id = ?",
+            _row_values(contact) + (cid,))
+        self._cache_put(cid, contact)
+        self._touch(cid)
+
+    def remove(self, cid):
+        self.conn.execute("DELETE FROM contacts WHERE id = ?", (cid,))
+        self._cache.pop(cid, None)
+        self._touch(cid)
+        self._count -= 1
+        if self._ids is not None:
+            del self._ids[self.position(cid)]
+
+    def remove_many(self, ids):
+        ids = list(ids)
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            self.conn.execute(f"DELETE FROM contacts WHERE id IN ({', '.join('?' * len(chunk))})", chunk)
+            for cid in chunk:
+                self._cache.pop(cid, None)
+                self._touch(cid)
+        self._count -= len(ids)
+        if self._ids is not None:
+            removed = set(ids)
+            self._ids = array("q", (cid for cid in self._ids if cid not in removed))
+
+    def field_count(self):
+        return self.conn.execute("SELECT COALESCE(MAX(field_count), 0) FROM contacts").fetchone()[0]
+
+    def value_counts(self, key):
+        return _value_counts(self.conn, key)
+
+    def value_counter(self, key):
+        """
+        Como ContactStore.value_counter, numa conexão própria (só
+        leitura): conta o que já foi gravado (commit).
+        """
+        if key not in FIELDS:
+            raise KeyError(key)
+        uri = "file:" + pathname2url(os.path.abspath(self.path)) + "?mode=ro"
+
+        def count(stop=None):
+            conn = sqlite3.connect(uri, uri=True)
+            if stop is not None:
+                # O GROUP BY de uma lista enorme leva quase um segundo: para no meio
+                conn.set_progress_handler(stop, 100000)
+            try:
+                return _value_counts(conn, key)
+            except sqlite3.OperationalError:
+                if stop is not None and stop():
+                    return None
+                raise
+            finally:
+                conn.close()
+        return count
+
+    def _where(self, query):
+        if self.has_fts and len(query) >= self.MIN_FTS_QUERY:
+            phrase = '"' + query.replace('"', '""') + '"'
+            return "id IN (SELECT rowid FROM contacts_fts WHERE contacts_fts MATCH ?)", phrase
+        return "instr(search_text, ?) > 0", query
+
+    def search(self, query):
+        """
+        IDs dos contatos que casam com `query`, na ordem do arquivo.
+        """
+        if not query:
+            return self._id_array().tolist()
+        where, arg = self._where(query)
+        return [row[0] for row in self.conn.execute(f"SELECT id FROM contacts WHERE {where} ORDER BY id", (arg,))]
+
+    def search_chunks(self, needles, accept=None, size=20000):
+        # A conexão só vale na thread da janela; o índice FTS já é rápido
+        return None
+
+    def filter_ids(self, query, ids):
+        if not query:
+            return list(ids)
+        where, arg = self._where(query)
+        keep = set()
+        ids = list(ids)
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            marks = ", ".join("?" * len(chunk))
+            keep.update(row[0] for row in self.conn.execute(
+                f"SELECT id FROM contacts WHERE id IN ({marks}) AND {where}", chunk + [arg]))
+        return [cid for cid in ids if cid in keep]
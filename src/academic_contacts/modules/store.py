@@ -0,0 +1,385 @@
+#!/usr/bin/python3
+from functools import partial
+from itertools import repeat
+
+from academic_contacts.modules.search  import SearchIndex
+from academic_contacts.modules.contact import ID_KEY
+
+
+def _value_counts(contacts, key, stop=None):
+    counts = {}
+    for n, contact in enumerate(contacts):
+        if stop is not None and n % 65536 == 0 and stop():
+            return None
+        value = contact.get(key, "")
+        if value:
+            counts[value] = counts.get(value, 0) + 1
+    return counts
+
+
+class ContactStore:
+    """
+    Lista ordenada de contatos onde cada contato tem um ID interno estável.
+
+    O mapa ID -> posição permite resolver as ações de um card em O(1),
+    mesmo quando dois contatos são dicionários iguais. O índice de busca
+    é mantido junto, usando os IDs como chave.
+    """
+    def __init__(self, contacts=()):
+        self.contacts = []    # contatos na ordem do arquivo
+        self.ids = []         # ID de cada posição
+        self.positions = {}   # ID -> posição
+        self.search_index = SearchIndex()
+        self._next_id = 1
+        self._blobs = {}           # ID -> contato serializado no último salvamento
+        self._blob_format = None   # (compact, with_ids) dos blobs em cache
+        self._lengths = {}         # número de campos -> quantos contatos o têm
+        self.version = 0           # conta as alterações feitas na lista
+        self._changes = {}         # ID -> (versão da última alteração, contato como está no arquivo ou None)
+        self._versions = {}        # ID -> versão da última alteração do contato (0 se nunca mudou)
+        self.reset(contacts)
+
+    def __len__(self):
+        return len(self.contacts)
+
+    def __iter__(self):
+        return iter(self.contacts)
+
+    def __getitem__(self, pos):
+        return self.contacts[pos]
+
+    def _new_id(self):
+        cid = self._next_id
+        self._next_id += 1
+        return cid
+
+    def reset(self, contacts):
+        """
+        Substitui todos os contatos.
+        """
+        self.contacts = []
+        self.ids = []
+        self.positions = {}
+        self._next_id = 1
+        self._blobs = {}
+        self._lengths = {}
+        self._changes = {}
+        self._versions = {}
+        self.search_index.clear()
+        self.extend(contacts)
+
+    def extend(self, contacts, touch=False, texts=None):
+        """
+        Acrescenta contatos no fim e retorna os seus IDs. Se um contato
+        trouxer `_id` (gravado com persist_ids), esse ID é reaproveitado
+        quando ainda não estiver em uso. Com `touch` os contatos contam
+        como criados aqui (não vieram do arquivo aberto). `texts` são os
+        textos de busca já calculados (search.contact_text), se houver.
+        """
+        start = len(self.ids)
+        pending = []
+        for contact in contacts:
+            cid = contact.pop(ID_KEY, None)
+            if isinstance(cid, int) and cid > 0 and cid not in self.positions:
+                self.positions[cid] = len(self.ids)
+                self._next_id = max(self._next_id, cid + 1)
+            else:
+                pending.append(len(self.ids))
+                cid = None
+            self.contacts.append(contact)
+            self.ids.append(cid)
+
+        for pos in pending:
+            cid = self._new_id()
+            self.ids[pos] = cid
+            self.positions[cid] = pos
+
+        new_ids = self.ids[start:]
+        if texts is None:
+            texts = [None] * len(new_ids)
+        for cid, contact, text in zip(new_ids, self.contacts[start:], texts):
+            self.search_index.add(cid, contact, text)
+            self._count_fields(contact, 1)
+            if touch:
+                self._touch(cid, None)
+        return new_ids
+
+    def _count_fields(self, contact, delta):
+        n = len(contact)
+        count = self._lengths.get(n, 0) + delta
+        if count:
+            self._lengths[n] = count
+        else:
+            del self._lengths[n]
+
+    def field_count(self):
+        """
+        Maior número de campos entre os contatos (altura dos cards).
+        """
+        return max(self._lengths, default=0)
+
+    def value_counts(self, key):
+        """
+        {valor: quantos contatos o têm} de um campo, sem os vazios.
+        """
+        return _value_counts(self.contacts, key)
+
+    def value_counter(self, key):
+        """
+        value_counts(key) para rodar fora da thread da janela: uma função
+        sobre uma cópia da lista tirada agora. Ela aceita `stop`: se stop()
+        ficar True a contagem pode parar no meio e retornar None.
+        """
+        return partial(_value_counts, list(self.contacts), key)
+
+    def id_at(self, pos):
+        return self.ids[pos]
+
+    def position(self, cid):
+        return self.positions[cid]
+
+    def get(self, cid):
+        return self.contacts[self.positions[cid]]
+
+    def has_id(self, cid):
+        return cid in self.positions
+
+    def contact_version(self, cid):
+        """
+        Muda sempre que o contato `cid` muda (serve de chave de cache).
+        """
+        return self._versions.get(cid, 0)
+
+    def items(self):
+        """
+        Pares (ID, contato) na ordem da lista.
+        """
+        return list(zip(self.ids, self.contacts))
+
+    def _touch(self, cid, original):
+        """
+        Registra uma alteração local; guarda o contato como estava no
+        arquivo (None se ele foi criado aqui) na primeira alteração.
+        """
+        self.version += 1
+        self._versions[cid] = self.version
+        previous = self._changes.get(cid)
+        self._changes[cid] = (self.version, previous[1] if previous else original)
+
+    def append(self, contact):
+        cid = self._new_id()
+        self._touch(cid, None)
+        self.positions[cid] = len(self.contacts)
+        self.contacts.append(contact)
+        self.ids.append(cid)
+        self.search_index.add(cid, contact)
+        self._count_fields(contact, 1)
+        return cid
+
+    def insert(self, pos, contact, cid=None):
+        """
+        Põe o contato na posição `pos`, com o ID `cid` se ele estiver livre.
+        """
+        if cid is None or cid in self.positions:
+            cid = self._new_id()
+        else:
+            self._next_id = max(self._next_id, cid + 1)
+        self._touch(cid, None)
+        self.contacts.insert(pos, contact)
+        self.ids.insert(pos, cid)
+        for i in range(pos, len(self.ids)):
+            self.positions[self.ids[i]] = i
+        self.search_index.add(cid, contact)
+        self._count_fields(contact, 1)
+        return cid
+
+    def insert_many(self, items):
+        """
+        Várias inserções de uma vez: `items` é uma lista de (posição,
+        contato, ID ou None) em ordem crescente de posição. As listas são
+        refeitas numa única passada. Retorna os IDs.
+        """
+        new_ids = []
+        taken = set()
+        for _, contact, cid in items:
+            if cid is None or cid in self.positions or cid in taken:
+                cid = self._new_id()
+            else:
+                self._next_id = max(self._next_id, cid + 1)
+            self._touch(cid, None)
+            self.search_index.add(cid, contact)
+            self._count_fields(contact, 1)
+            taken.add(cid)
+            new_ids.append(cid)
+
+        contacts = []
+        ids = []
+        old = 0
+        for (pos, contact, _), cid in zip(items, new_ids):
+            take = pos - len(ids)
+            contacts.extend(self.contacts[old:old + take])
+            ids.extend(self.ids[old:old + take])
+            old += take
+            contacts.append(contact)
+            ids.append(cid)
+        contacts.extend(self.contacts[old:])
+        ids.extend(self.ids[old:])
+        self.contacts = contacts
+        self.ids = ids
+        self.positions = {cid: i for i, cid in enumerate(ids)}
+        return new_ids
+
+    def replace(self, cid, contact):
+        pos = self.positions[cid]
+        self._touch(cid, self.contacts[pos])
+        self._count_fields(self.contacts[pos], -1)
+        self._count_fields(contact, 1)
+        self.contacts[pos] = contact
+        self.search_index.update(cid, contact)
+        self._blobs.pop(cid, None)
+
+    def remove(self, cid):
+        pos = self.positions.pop(cid)
+        self._touch(cid, self.contacts[pos])
+        self._count_fields(self.contacts[pos], -1)
+        del self.contacts[pos]
+        del self.ids[pos]
+        for i in range(pos, len(self.ids)):
+            self.positions[self.ids[i]] = i
+        self.search_index.remove(cid)
+        self._blobs.pop(cid, None)
+
+    def remove_many(self, ids):
+        """
+        Remove vários contatos refazendo as listas uma única vez.
+        """
+        ids = set(ids)
+        for cid in ids:
+            contact = self.contacts[self.positions[cid]]
+            self._touch(cid, contact)
+            self._count_fields(contact, -1)
+            self.search_index.remove(cid)
+            self._blobs.pop(cid, None)
+        keep = [i for i, cid in enumerate(self.ids) if cid not in ids]
+        self.contacts = [self.contacts[i] for i in keep]
+        self.ids = [self.ids[i] for i in keep]
+        self.positions = {cid: i for i, cid in enumerate(self.ids)}
+
+    def changed_ids(self):
+        """
+        IDs alterados (editados, criados ou apagados) desde a última
+        sincronização com o arquivo.
+        """
+        return set(self._changes)
+
+    def mark_saved(self, version):
+        """
+        O arquivo recebeu a lista como estava na versão `version`.
+        """
+        self._changes = {cid: change for cid, change in self._changes.items() if change[0] > version}
+
+    def mark_synced(self, ids):
+        """
+        Os contatos `ids` estão iguais no arquivo e na lista.
+        """
+        for cid in ids:
+            self._changes.pop(cid, None)
+
+    def rebase(self, originals):
+        """
+        {ID: contato como está agora no arquivo, ou None}: as alterações
+        locais desses contatos (mantidas num conflito) passam a ser em
+        relação a essa versão do arquivo.
+        """
+        for cid, original in originals.items():
+            change = self._changes.get(cid)
+            if change is not None:
+                self._changes[cid] = (change[0], original)
+
+    def sync_base(self):
+        """
+        Lista de (ID, contato como está no arquivo ou None, contato atual
+        ou None, alterado localmente) para comparar com o arquivo.
+        """
+        base = [(cid, contact, contact, False)
+                for cid, contact in zip(self.ids, self.contacts) if cid not in self._changes]
+        for cid, (_, original) in self._changes.items():
+            pos = self.positions.get(cid)
+            base.append((cid, original, None if pos is None else self.contacts[pos], True))
+        return base
+
+    def search(self, query):
+        """
+        IDs dos contatos que casam com `query`, na ordem do arquivo.
+        """
+        hits = self.search_index.search(query)
+        if hits is None or len(hits) == len(self.ids):
+            return list(self.ids)
+        return sorted(hits, key=self.positions.__getitem__)
+
+    def filter_ids(self, query, ids):
+        """
+        Mantém, em ordem, só os `ids` que casam com `query`.
+        """
+        if not query:
+            return list(ids)
+        return self.search_index.matches(query, ids)
+
+    def search_chunks(self, needles, accept=None, size=20000):
+        """
+        A busca dividida em partes de até `size` contatos, para rodar fora
+        da thread da janela: cada parte é uma função que retorna, na ordem
+        do arquivo, os IDs do seu trecho cujo texto contém todos os
+        `needles` (o primeiro é o mais seletivo) e cujo contato passa em
+        `accept`. As partes usam uma cópia da lista tirada agora. Retorna
+        None se o índice já reduz a busca a poucos candidatos.
+        """
+        candidates = self.search_index.candidates(needles[0])
+        if candidates is not None and len(candidates) <= size:
+            return None
+        ids = list(self.ids)
+        contacts = list(self.contacts)
+        texts = self.search_index.texts
+
+        def scan(first, last):
+            chunk = ids[first:last]
+            if candidates is not None:
+                chunk = [cid for cid in chunk if cid in candidates]
+            # Um contato apagado depois da cópia não tem mais texto ("")
+            for needle in needles:
+                chunk = [cid for cid, text in zip(chunk, map(texts.get, chunk, repeat(""))) if needle in text]
+            if accept is not None and chunk:
+                by_id = dict(zip(ids[first:last], contacts[first:last]))
+                chunk = [cid for cid in chunk if accept(by_id[cid])]
+            return chunk
+
+        return [partial(scan, first, first + size) for first in range(0, len(ids), size)]
+
+    def save_items(self, compact=False, with_ids=False):
+        """
+        Lista de (ID, contato, blob) para salvar. O blob é o contato já
+        serializado no formato pedido, ou None se o contato mudou desde
+        o último salvamento.
+        """
+        if (compact, with_ids) != self._blob_format:
+            self._blobs = {}
+            self._blob_format = (compact, with_ids)
+        blobs = self._blobs
+        return [(cid, contact, blobs.get(cid)) for cid, contact in zip(self.ids, self.contacts)]
+
+    def cache_blobs(self, compact, with_ids, new_blobs):
+        """
+        Guarda os blobs {ID: (contato, blob)} produzidos por um salvamento,
+        ignorando os contatos que mudaram enquanto ele acontecia.
+        """
+        if (compact, with_ids) != self._blob_format:
+            return
+        for cid, (contact, blob) in new_blobs.items():
+            pos = self.positions.get(cid)
+            if pos is not None and self.contacts[pos] is contact:
+                self._blobs[cid] = blob
+
+    def to_list(self, with_ids=False):
+        if not with_ids:
+            return [contact.to_dict() for contact in self.contacts]
+        return [{ID_KEY: cid, **contact.to_dict()} for cid, contact in zip(self.ids, self.contacts)]
@@ -0,0 +1,64 @@
+import os
+
+from PyQt5.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+
+from academic_contacts.modules.filesync import file_signature
+
+
+class FileWatcher(QObject):
+    """
+    Observa o arquivo aberto e emite fileChanged quando ele muda no
+    disco por outro programa. Os avisos são agrupados (pastas
+    sincronizadas gravam em várias etapas) e só contam se o (mtime,
+    tamanho) for diferente do último aceito com accept().
+    """
+    fileChanged = pyqtSignal(str)
+
+    DELAY = 500   # ms
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.path = ""
+        self.signature = None
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self.schedule)
+        # Um replace atômico troca o arquivo: a pasta avisa quando ele volta
+        self.watcher.directoryChanged.connect(self.schedule)
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(self.DELAY)
+        self.timer.timeout.connect(self.check)
+
+    def watch(self, path):
+        """
+        Passa a observar `path` ("" para parar), aceitando o estado atual.
+        """
+        paths = self.watcher.files() + self.watcher.directories()
+        if paths:
+            self.watcher.removePaths(paths)
+        self.timer.stop()
+        self.path = path
+        self.signature = file_signature(path) if path else None
+        if path:
+            self.watcher.addPath(os.path.dirname(os.path.abspath(path)))
+            if os.path.exists(path):
+                self.watcher.addPath(path)
+
+    def accept(self, signature=None):
+        """
+        O programa leu ou gravou o arquivo: esse estado não é uma mudança.
+        """
+        self.signature = file_signature(self.path) if signature is None else signature
+
+    def schedule(self, *args):
+        if self.path:
+            self.timer.start()
+
+    def check(self):
+        if not self.path:
+            return
+        if self.path not in self.watcher.files() and os.path.exists(self.path):
+            self.watcher.addPath(self.path)
+        signature = file_signature(self.path)
+        if signature is not None and signature != self.signature:
+            self.fileChanged.emit(self.path)
@@ -0,0 +1,186 @@
+from PyQt5.QtWidgets import (
+    QDialog, QHBoxLayout, QVBoxLayout, QListWidget, QListWidgetItem, QPushButton,
+    QInputDialog, QMessageBox, QAbstractItemView, QLabel
+)
+from PyQt5.QtCore import Qt
+
+ID_ROLE = Qt.UserRole
+
+
+class AuthorListsDialog(QDialog):
+    """
+    Edita as listas de autores: à esquerda as listas, à direita os
+    autores da lista escolhida na ordem do artigo (arrastar para
+    reordenar). `selected` são os IDs dos cards selecionados na janela
+    principal e `export(author_list, template)` mostra o LaTeX.
+    """
+    def __init__(self, author_lists, store, selected, export, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Author Lists")
+        self.resize(700, 450)
+        self.author_lists = author_lists
+        self.store = store
+        self.selected = selected
+        self.export = export
+
+        layout = QHBoxLayout(self)
+
+        # Listas
+        left = QVBoxLayout()
+        left.addWidget(QLabel("Lists"))
+        self.lists_widget = QListWidget()
+        self.lists_widget.currentRowChanged.connect(self.show_authors)
+        left.addWidget(self.lists_widget)
+        for text, tooltip, slot in (("New", "Create a new author list", self.new_list),
+                                    ("Rename", "Rename the chosen list", self.rename_list),
+                                    ("Delete", "Delete the chosen list (the contacts stay)", self.delete_list)):
+            btn = QPushButton(text)
+            btn.setToolTip(tooltip)
+            btn.clicked.connect(slot)
+            left.addWidget(btn)
+        layout.addLayout(left, 1)
+
+        # Autores
+        right = QVBoxLayout()
+        right.addWidget(QLabel("Authors (drag to reorder, * is the corresponding author)"))
+        self.authors_widget = QListWidget()
+        self.authors_widget.setDragDropMode(QAbstractItemView.InternalMove)
+        self.authors_widget.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.authors_widget.model().rowsMoved.connect(self.store_order)
+        right.addWidget(self.authors_widget)
+
+        row = QHBoxLayout()
+        self.add_btn = QPushButton(f"Add {len(selected)} Selected")
+        self.add_btn.setToolTip("Append the cards selected in the main window")
+        self.add_btn.setEnabled(bool(selected))
+        self.add_btn.clicked.connect(self.add_selected)
+        row.addWidget(self.add_btn)
+        for text, tooltip, slot in (("Remove", "Remove the chosen authors from this list", self.remove_authors),
+                                    ("Corresponding", "Make the chosen author the corresponding author",
+                                     self.set_corresponding)):
+            btn = QPushButton(text)
+            btn.setToolTip(tooltip)
+            btn.clicked.connect(slot)
+            row.addWidget(btn)
+        right.addLayout(row)
+
+        row = QHBoxLayout()
+        for text, template in (("Elsevier", "elsevier"), ("MDPI", "mdpi")):
+            btn = QPushButton(f"Export to {text}")
+            btn.setToolTip(f"Export this author list in LaTeX to {text} template format")
+            btn.clicked.connect(lambda _, template=template: self.export_current(template))
+            row.addWidget(btn)
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.accept)
+        row.addWidget(close_btn)
+        right.addLayout(row)
+        layout.addLayout(right, 2)
+
+        self.lists_widget.addItems(self.author_lists.names())
+        if len(self.author_lists):
+            self.lists_widget.setCurrentRow(0)
+        else:
+            self.show_authors(-1)
+
+    def current_list(self):
+        row = self.lists_widget.currentRow()
+        return self.author_lists.lists[row] if row >= 0 else None
+
+    def show_authors(self, row):
+        self.authors_widget.clear()
+        author_list = self.current_list()
+        self.authors_widget.setEnabled(author_list is not None)
+        if author_list is None:
+            return
+        for n, cid in enumerate(author_list.ids):
+            if self.store.has_id(cid):
+                contact = self.store.get(cid)
+                text = contact.get("name", "") or "(no name)"
+                if contact.get("organization", ""):
+                    text += f" ({contact['organization']})"
+            else:
+                text = "(deleted contact)"
+            if n == author_list.corresponding:
+                text = "* " + text
+            item = QListWidgetItem(text)
+            item.setData(ID_ROLE, cid)
+            self.authors_widget.addItem(item)
+
+    def store_order(self):
+        author_list = self.current_list()
+        corresponding = author_list.ids[author_list.corresponding] if author_list.ids else None
+        author_list.ids = [self.authors_widget.item(k).data(ID_ROLE) for k in range(self.authors_widget.count())]
+        author_list.corresponding = author_list.ids.index(corresponding) if corresponding in author_list.ids else 0
+        self.show_authors(self.lists_widget.currentRow())
+
+    def ask_name(self, title, text=""):
+        name, ok = QInputDialog.getText(self, title, "Name:", text=text)
+        name = name.strip()
+        if not ok or not name:
+            return None
+        if name != text and name in self.author_lists.names():
+            QMessageBox.warning(self, title, f"There is already a list named '{name}'.")
+            return None
+        return name
+
+    def new_list(self):
+        name = self.ask_name("New Author List")
+        if name is None:
+            return
+        self.author_lists.add(name)
+        self.lists_widget.addItem(name)
+        self.lists_widget.setCurrentRow(self.lists_widget.count() - 1)
+
+    def rename_list(self):
+        author_list = self.current_list()
+        if author_list is None:
+            return
+        name = self.ask_name("Rename Author List", author_list.name)
+        if name is not None:
+            author_list.name = name
+            self.lists_widget.currentItem().setText(name)
+
+    def delete_list(self):
+        author_list = self.current_list()
+        if author_list is None:
+            return
+        answer = QMessageBox.question(self, "Delete Author List", f"Delete the list '{author_list.name}'?")
+        if answer != QMessageBox.Yes:
+            return
+        row = self.lists_widget.currentRow()
+        self.author_lists.lists.pop(row)
+        self.lists_widget.takeItem(row)
+
+    def add_selected(self):
+        author_list = self.current_list()
+        if author_list is None:
+            return
+        present = set(author_list.ids)
+        author_list.ids += [cid for cid in self.selected if cid not in present]
+        self.show_authors(self.lists_widget.currentRow())
+
+    def remove_authors(self):
+        author_list = self.current_list()
+        if author_list is None:
+            return
+        rows = {index.row() for index in self.authors_widget.selectedIndexes()}
+        if not rows:
+            return
+        corresponding = author_list.ids[author_list.corresponding] if author_list.ids else None
+        author_list.ids = [cid for n, cid in enumerate(author_list.ids) if n not in rows]
+        author_list.corresponding = author_list.ids.index(corresponding) if corresponding in author_list.ids else 0
+        self.show_authors(self.lists_widget.currentRow())
+
+    def set_corresponding(self):
+        author_list = self.current_list()
+        row = self.authors_widget.currentRow()
+        if author_list is None or row < 0:
+            return
+        author_list.corresponding = row
+        self.show_authors(self.lists_widget.currentRow())
+        self.authors_widget.setCurrentRow(row)
+
+    def export_current(self, template):
+        author_list = self.current_list()
+        if author_list is not None:
+            self.export(author_list, template)
@@ -0,0 +1,289 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from academic_contacts.modules.jsonio   import iter_contact_chunks, serialize_contacts, atomic_write
+from academic_contacts.modules.filesync import diff_contacts, file_signature
+from academic_contacts.modules.dedup    import find_duplicates
+from academic_contacts.modules.importers import read_source, ImportFilter
+from academic_contacts.modules.recent   import read_snapshot, write_snapshot, file_fingerprint
+from academic_contacts.modules.mapstore import write_map
+from academic_contacts.modules.orcid    import count_invalid_orcids
+
+
+class ContactLoader(QThread):
+    """
+    Lê um arquivo de contatos numa thread separada, entregando os
+    contatos em blocos para que a lista apareça antes do fim da leitura.
+    Com `snapshot` (de RecentFiles) os contatos vêm dele quando ainda
+    corresponde ao arquivo, sem reler o JSON (`from_snapshot` fica True).
+    `signature` é a assinatura do arquivo antes da leitura.
+    Use requestInterruption() para cancelar.
+    """
+    chunkLoaded = pyqtSignal(object)   # (contatos, textos de busca ou None); object evita a conversão para QVariant
+    progress    = pyqtSignal(int)      # 0-100
+
+    # Primeiro bloco pequeno para mostrar a primeira página logo
+    FIRST_CHUNK = 100
+    CHUNK       = 2000
+
+    def __init__(self, path, snapshot=None, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.snapshot = snapshot
+        self.from_snapshot = False
+        self.signature = None
+        self.error = ""
+
+    def _emit_all(self, contacts, texts):
+        start = 0
+        size = self.FIRST_CHUNK
+        while start < len(contacts):
+            if self.isInterruptionRequested():
+                return
+            self.chunkLoaded.emit((contacts[start:start + size], texts[start:start + size]))
+            start += size
+            size = self.CHUNK
+            self.progress.emit(int(100 * min(start, len(contacts)) / len(contacts)))
+
+    def run(self):
+        try:
+            self.signature = file_signature(self.path)
+            snapshot = read_snapshot(self.snapshot, self.path) if self.snapshot else None
+            if snapshot is not None:
+                self.from_snapshot = True
+                self._emit_all(*snapshot)
+                self.progress.emit(100)
+                return
+
+            first = True
+            pending = []
+            for chunk, read, total in iter_contact_chunks(self.path, chunk_size=self.FIRST_CHUNK):
+                if self.isInterruptionRequested():
+                    return
+                pending.extend(chunk)
+                if first or len(pending) >= self.CHUNK:
+                    self.chunkLoaded.emit((pending, None))
+                    self.progress.emit(int(100 * read / total) if total else 100)
+                    pending = []
+                    first = False
+            if pending:
+                self.chunkLoaded.emit((pending, None))
+            self.progress.emit(100)
+        except Exception as e:
+            self.error = str(e)
+
+
+class SnapshotWriter(QThread):
+    """
+    Grava numa thread separada o snapshot (recent.write_snapshot) de um
+    arquivo que acabou de ser lido ou salvo, se ele ainda tem a
+    assinatura `signature`. O que foi gravado fica em `fingerprint`.
+    """
+    def __init__(self, path, signature, snapshot, ids, contacts, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.signature = signature
+        self.snapshot = snapshot
+        self.ids = ids
+        self.contacts = contacts
+        self.fingerprint = None
+        self.error = ""
+
+    def run(self):
+        try:
+            fingerprint = file_fingerprint(self.path, self.signature)
+            if fingerprint is None:
+                return   # Mudou por fora desde a leitura
+            write_snapshot(self.snapshot, fingerprint, self.ids, self.contacts)
+            self.fingerprint = fingerprint
+        except Exception as e:
+            self.error = str(e)
+
+
+class MapWriter(SnapshotWriter):
+    """
+    Como SnapshotWriter, mas grava o arquivo mapeado (mapstore.write_map)
+    em `snapshot`, ao lado do JSON. Não calcula o hash: o arquivo mapeado
+    vale para a assinatura (mtime, tamanho) do JSON.
+    """
+    def run(self):
+        try:
+            if file_signature(self.path) != self.signature:
+                return   # Mudou por fora desde a leitura
+            write_map(self.snapshot, self.signature, self.contacts)
+        except Exception as e:
+            self.error = str(e)
+
+
+class ContactReloader(QThread):
+    """
+    Relê um arquivo alterado por fora e o compara, numa thread separada,
+    com `base` (ContactStore.sync_base()). O resultado fica em `changes`.
+    """
+    def __init__(self, path, base, version, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.base = base
+        self.version = version   # versão da lista quando `base` foi tirada
+        self.changes = None
+        self.error = ""
+
+    def run(self):
+        try:
+            remote = []
+            for chunk, _, _ in iter_contact_chunks(self.path):
+                if self.isInterruptionRequested():
+                    return
+                remote.extend(chunk)
+            self.changes = diff_contacts(self.base, remote)
+        except Exception as e:
+            self.error = str(e)
+
+
+class ContactSaver(QThread):
+    """
+    Salva os contatos numa thread separada. Recebe a lista de
+    ContactStore.save_items, serializa só os contatos sem blob em cache
+    e grava o arquivo de forma atômica. Os blobs novos ficam em
+    `new_blobs` para voltarem ao cache do ContactStore.
+    """
+    def __init__(self, path, items, compact=False, with_ids=False, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.items = items
+        self.compact = compact
+        self.with_ids = with_ids
+        self.new_blobs = {}
+        self.signature = None   # do arquivo gravado
+        self.error = ""
+
+    def run(self):
+        try:
+            data, self.new_blobs = serialize_contacts(self.items, self.compact, self.with_ids)
+            atomic_write(self.path, data)
+            self.signature = file_signature(self.path)
+        except Exception as e:
+            self.error = str(e)
+
+
+class DuplicateFinder(QThread):
+    """
+    Procura contatos duplicados numa thread separada, sobre `items`
+    (ContactStore.items()). Os grupos sugeridos ficam em `groups`.
+    """
+    def __init__(self, items, version, parent=None):
+        super().__init__(parent)
+        self.items = items
+        self.version = version   # versão da lista quando `items` foi tirada
+        self.groups = None
+        self.error = ""
+
+    def run(self):
+        try:
+            self.groups = find_duplicates(self.items, self.isInterruptionRequested)
+        except Exception as e:
+            self.error = str(e)
+
+
+class OrcidChecker(QThread):
+    """
+    Conta numa thread separada os contatos com ORCID inválido. `counter`
+    é a contagem dos valores do campo (store.value_counter("orcid")); o
+    total fica em `invalid`. Use requestInterruption() para cancelar.
+    """
+    def __init__(self, counter, parent=None):
+        super().__init__(parent)
+        self.counter = counter
+        self.invalid = None
+        self.error = ""
+
+    def run(self):
+        try:
+            counts = self.counter(self.isInterruptionRequested)
+            if counts is not None and not self.isInterruptionRequested():
+                self.invalid = count_invalid_orcids(counts, self.isInterruptionRequested)
+        except Exception as e:
+            self.error = str(e)
+
+
+class ContactSearcher(QThread):
+    """
+    Executa numa thread separada as partes de uma busca (Query.search_chunks),
+    em ordem, entregando por chunkFound os IDs encontrados em cada uma
+    assim que ela termina. Use requestInterruption() para cancelar: a
+    parte em andamento termina e as demais são descartadas.
+    """
+    chunkFound = pyqtSignal(object)   # IDs de uma parte, na ordem da lista
+
+    def __init__(self, chunks, parent=None):
+        super().__init__(parent)
+        self.chunks = chunks
+        self.error = ""
+
+    def run(self):
+        try:
+            for chunk in self.chunks:
+                if self.isInterruptionRequested():
+                    return
+                self.chunkFound.emit(chunk())
+        except Exception as e:
+            self.error = str(e)
+
+
+class ContactImporter(QThread):
+    """
+    Importa vários arquivos (JSON, SQLite, CSV, vCard, BibTeX) numa
+    thread separada. Com mais de um arquivo, eles são lidos em paralelo
+    num pool de processos. Cada arquivo, na ordem dada, passa pelo
+    ImportFilter (contra `existing` e os arquivos anteriores) e é
+    entregue por sourceImported como (caminho, contatos novos,
+    duplicados descartados, erro ou "").
+    """
+    sourceImported = pyqtSignal(object)
+    progress       = pyqtSignal(int)   # 0-100
+
+    def __init__(self, paths, existing, parent=None):
+        super().__init__(parent)
+        self.paths = paths
+        self.existing = existing
+        self.error = ""
+
+    def _deliver(self, result, seen):
+        path, contacts, error = result
+        new = [contact for contact in contacts if seen.add(contact)]
+        self.sourceImported.emit((path, new, len(contacts) - len(new), error or ""))
+
+    def run(self):
+        try:
+            seen = ImportFilter(self.existing)
+            total = len(self.paths)
+            if total == 1:
+                self._deliver(read_source(self.paths[0]), seen)
+                self.progress.emit(100)
+                return
+
+            # spawn: um fork desta thread levaria junto o estado do Qt
+            pool = ProcessPoolExecutor(max_workers=min(total, os.cpu_count() or 1),
+                                       mp_context=multiprocessing.get_context("spawn"))
+            futures = [pool.submit(read_source, path) for path in self.paths]
+            try:
+                for done, future in enumerate(futures, start=1):
+                    while True:
+                        if self.isInterruptionRequested():
+                            return
+                        try:
+                            result = future.result(timeout=0.1)
+                            break
+                        except TimeoutError:
+                            pass
+                    self._deliver(result, seen)
+                    self.progress.emit(int(100 * done / total))
+            finally:
+                for future in futures:
+                    future.cancel()
+                pool.shutdown(wait=False)
+        except Exception as e:
+            self.error = str(e)
@@ -2,43 +2,89 @@ import os
 import sys
 import json
 import signal
+import locale
+import threading
 from PyQt5.QtWidgets import (
-    QApplication, QWidget, QSizePolicy, QVBoxLayout, QHBoxLayout, QPushButton, QGroupBox,
-    QLabel, QFileDialog, QLineEdit, QMessageBox, QScrollArea, QDialog, QTextEdit,  
-    QFormLayout, QDialogButtonBox, QMainWindow, QAction, QToolBar, QMenu
+    QApplication, QWidget, QSizePolicy, QVBoxLayout, QHBoxLayout, QPushButton,
+    QLabel, QFileDialog, QLineEdit, QMessageBox, QDialog, QTextEdit,  
+    QFormLayout, QDialogButtonBox, QMainWindow, QAction, QToolBar, QMenu, QProgressBar,
+    QComboBox, QListWidget, QListWidgetItem, QToolButton
 )
-from PyQt5.QtGui import QIcon, QDesktopServices, QClipboard
-from PyQt5.QtCore import Qt, QPoint, QUrl
+from PyQt5.QtGui import QIcon, QDesktopServices, QClipboard, QKeySequence
+from PyQt5.QtCore import Qt, QUrl, QTimer, QByteArray
 
 
 import academic_contacts.about as about
 import academic_contacts.modules.configure as configure 
 
-from academic_contacts.desktop import create_desktop_file
-from academic_contacts.desktop import create_desktop_directory
-from academic_contacts.desktop import create_desktop_menu
-from academic_contacts.modules.wabout    import show_about_window
+from academic_contacts.desktop import create_desktop_entries
 from academic_contacts.modules.resources import resource_path
+from academic_contacts.modules.cardview  import CardListView
+from academic_contacts.modules.store     import ContactStore
+from academic_contacts.modules.sqlstore  import SqliteContactStore, DB_SUFFIX
+from academic_contacts.modules.mapstore  import MappedContactStore, map_paths, find_map
+from academic_contacts.modules.contact   import DEFAULT_CONTACT, FIELDS, Contact
+from academic_contacts.modules.latex     import ELSEVIER_TEMPLATE, MDPI_TEMPLATE
+from academic_contacts.modules.workers   import (
+    ContactLoader, ContactSaver, ContactReloader, DuplicateFinder, ContactImporter, SnapshotWriter, MapWriter,
+    ContactSearcher, OrcidChecker
+)
+from academic_contacts.modules.watcher   import FileWatcher
+from academic_contacts.modules.filesync  import file_signature
+from academic_contacts.modules.journal   import UndoJournal, JOURNAL_SUFFIX
+from academic_contacts.modules.dedup     import merge_contacts
+from academic_contacts.modules.orcid     import check_orcid, normalize_orcid, invalid_orcids, OrcidCache
+from academic_contacts.modules.authorlists import AuthorLists, AUTHORS_SUFFIX
+from academic_contacts.modules.sorting   import CardOrder, SORT_FIELDS, GROUP_FIELDS
+from academic_contacts.modules.recent    import RecentFiles
+from academic_contacts.modules.query     import parse_query
+
+JSON_SUFFIX = ".AcademicContacts.json"
+JSON_FILTER = f"AcademicContacts (*{JSON_SUFFIX})"
+DB_FILTER   = f"AcademicContacts database (*{DB_SUFFIX})"
+IMPORT_FILTER = "Contacts (*.json *.db *.csv *.vcf *.vcard *.bib);;All files (*)"
 
 # Caminho para o arquivo de configuração
 CONFIG_PATH = os.path.join( os.path.expanduser("~"),
                             ".config",
                             about.__package__,
                             "config.json" )
-configure.verify_default_config(CONFIG_PATH, default_content={"old_path":""})
-CONFIG=configure.load_config(CONFIG_PATH)
-
-DEFAULT_CONTACT = {
-    "name": "",
-    "email": "",
-    "organization": "",
-    "addressline": "",
-    "city": "",
-    "postcode": "",
-    "state": "",
-    "country": "",
-    "orcid": ""
-}
+# Lido no primeiro acesso, não ao importar o módulo; gravado logo depois das alterações
+CONFIG = configure.Config(CONFIG_PATH, defaults={"old_path": ""})
+
+# Arquivos abertos por último (o mais recente primeiro)
+RECENT_FILES = 10
+
+# A partir deste número de contatos o filtro roda numa thread, em partes
+BACKGROUND_SEARCH = 20000
+
+# Snapshots dos arquivos recentes, para reabri-los sem reler o JSON
+SNAPSHOT_DIR = os.path.join( os.path.expanduser("~"),
+                             ".cache",
+                             about.__package__,
+                             "snapshots" )
+
+def ensure_desktop_integration():
+    """
+    Cria os atalhos do menu uma vez por versão do programa, numa thread,
+    já que create_desktop_file pode chamar update-desktop-database. A
+    versão só é anotada depois que os atalhos foram criados; se falhar,
+    tenta de novo na próxima abertura. Use --applications para recriá-los.
+    """
+    if CONFIG.get("desktop_integration") == about.__version__:
+        return
+
+    def integrate():
+        try:
+            create_desktop_entries()
+        except OSError as e:
+            print(f"Error creating the desktop entries: {e}")
+            return
+        CONFIG["desktop_integration"] = about.__version__
+        # A janela pode já ter fechado (e gravado a configuração)
+        CONFIG.flush()
+
+    threading.Thread(target=integrate).start()
 
 
 class LatexDialog(QDialog):
@@ -83,246 +129,6 @@ def show_latex_message(parent, text):
     dlg = LatexDialog(text, parent)
     dlg.exec_()
 
-def latex_escape(text):
-    replacements = {
-        '\\': r'\textbackslash{}',
-        '{': r'\{',
-        '}': r'\}',
-        '#': r'\#',
-        '$': r'\$',
-        '%': r'\%',
-        '&': r'\&',
-        '_': r'\_',
-        '~': r'\textasciitilde{}',
-        '^': r'\^{}',
-    }
-    for char, repl in replacements.items():
-        text = text.replace(char, repl)
-    return text
-
-def split_first_word(full_name):
-    parts = full_name.split()
-    if not parts:
-        return "", ""  # Caso a string esteja vazia ou só espaços
-    first_word = parts[0]
-    rest = " ".join(parts[1:]) if len(parts) > 1 else ""
-    return first_word, rest
-
-def export_mdpi_authors(data):
-    
-    latex_lines=[]
-    
-    line="% Author Orchid ID: enter ID or remove command"
-    latex_lines.append(line)
-    
-    # Orcid
-    for ID, entry in enumerate(data):
-        orcid = entry["orcid"]
-        if len(orcid)>0:
-            line = "\\newcommand{\\orcidauthor"+chr(ID+ord('A'))+"}{"+orcid+"}"
-            latex_lines.append(line)
-    
-    latex_lines.append("")
-    
-    line="% Authors, for the paper (add full first names)"
-    latex_lines.append(line)
-    
-    # Authors1
-    latex_lines.append("\\Author{%")
-    L = len(data)
-    for ID, entry in enumerate(data):
-        name = entry["name"]
-        orcid = entry["orcid"]
-        
-        line = "   "+name
-        
-        #
-        if   ID ==0:
-            line+="$^{1,}*$"
-        else:
-            line+="$^{"+str(ID+1)+"}$"
-
-        #
-        if len(orcid)>0:
-            line+="\\orcid"+chr(ID+ord('A'))+"{}"
-        
-        
-        #
-        if   ID==(L-1):
-            line+="%"
-        elif ID==(L-2):
-            line+=" and %"
-        else:
-            line+=", %"
-        
-        latex_lines.append(line)
-    latex_lines.append("}")
-
-    #
-    latex_lines.append("")
-    line="%\\longauthorlist{yes}"
-    latex_lines.append(line)
-    latex_lines.append("")
-    line="% MDPI internal command: Authors, for metadata in PDF"
-    latex_lines.append(line)
-
-    #
-    latex_lines.append("\\AuthorNames{%")
-    for ID, entry in enumerate(data):
-        name = entry["name"]
-        line = "   "+name
-        if   ID==(L-1):
-            line+="%"
-        elif ID==(L-2):
-            line+=" and %"
-        else:
-            line+=", %"
-        latex_lines.append(line)
-    latex_lines.append("}%")
-    
-    #
-    latex_lines.append("")
-    latex_lines.append("% MDPI internal command: Authors, for citation in the left column, only choose below one of them according to the journal style")
-    
-    #
-    latex_lines.append("\\isAPAStyle{%")
-    latex_lines.append("    \\AuthorCitation{%")
-    for ID, entry in enumerate(data):
-        name = entry["name"]
-        firstname, lastname = split_first_word(name)
-        firstinitial = firstname[0].upper()+"."
-        line = "    "+lastname+", "+firstinitial
-        if   ID==(L-1):
-            line+=" %"
-        elif ID==(L-2):
-            line+=" \\&%"
-        else:
-            line+=", %"
-        latex_lines.append(line)
-    latex_lines.append("    }%")
-    latex_lines.append("}{\\isChicagoStyle{%")
-    latex_lines.append("    \\AuthorCitation{%")
-    for ID, entry in enumerate(data):
-        name = entry["name"]
-        firstname, lastname = split_first_word(name)
-        if ID==0:
-            line = "    "+lastname+", "+firstname
-        else:
-            line = "    "+name
-        
-        if   ID==(L-1):
-            line+=". %"
-        elif ID==(L-2):
-            line+=", and %"
-        else:
-            line+=", %"
-        latex_lines.append(line)
-    latex_lines.append("    }%")
-    latex_lines.append("}{%")
-    latex_lines.append("    \\AuthorCitation{%")
-    for ID, entry in enumerate(data):
-        name = entry["name"]
-        firstname, lastname = split_first_word(name)
-        firstinitial = firstname[0].upper()+"."
-        line = "    "+lastname+", "+firstinitial
-        if   ID==(L-1):
-            line+=" %"
-        else:
-            line+="; %"
-        latex_lines.append(line)
-    latex_lines.append("    }%")
-    latex_lines.append("}}%")
-    
-    #
-    latex_lines.append("")
-    latex_lines.append("% Affiliations / Addresses (Add [1] after \\address if there is only one affiliation.)")
-    latex_lines.append("\\address{%")
-    for ID, entry in enumerate(data):
-        organization = entry["organization"]
-        city = entry["city"]
-        country = entry["country"]
-        email = entry["email"]
-        line = "    $^{"+str(ID+1)+"}$ \\quad "+organization+", "+city+", "+country+"; "+email
-        if ID==(L-1):
-            line+="%"
-        else:
-            line+="\\\\%"
-        latex_lines.append(line)
-        
-    latex_lines.append("}%")
-
-    #
-    latex_lines.append("")
-    latex_lines.append("% Contact information of the corresponding author")
-    line="\\corres{Correspondence: "+data[0]["email"]+"}"
-    latex_lines.append(line)
-    
-    return "\n".join(latex_lines)
-
-def export_elsevier_authors(data):
-    # --- Tabelas para mapear afiliações ---
-    affiliation_map = {}   # string da afiliação -> índice
-    affiliations = []      # lista de afiliações únicas
-    latex_lines = []
-
-    if len(data)==0:
-        return ""
-    
-    
-    name = latex_escape(data[0]['name'].strip())
-    latex_lines.append(f"\\cortext[cor1]{{{name}}}\n")
-
-    for ID, entry in enumerate(data):
-        # Verificar obrigatórios
-        for key in ["name", "email", "organization"]:
-            if key not in entry or not entry[key].strip():
-                raise ValueError(f"O campo obrigatório '{key}' está ausente ou vazio para {entry.get('name','<desconhecido>')}")
-
-        org = latex_escape(entry["organization"].strip())
-
-        # Montar chave única da afiliação (string padronizada)
-        parts = [f"organization={{{org}}}"]
-        if entry.get("addressline"):
-            parts.append(f"addressline={{{latex_escape(entry['addressline'].strip())}}}")
-        if entry.get("city"):
-            parts.append(f"city={{{latex_escape(entry['city'].strip())}}}")
-        if entry.get("postcode"):
-            parts.append(f"postcode={{{latex_escape(entry['postcode'].strip())}}}")
-        if entry.get("state"):
-            parts.append(f"state={{{latex_escape(entry['state'].strip())}}}")
-        if entry.get("country"):
-            parts.append(f"country={{{latex_escape(entry['country'].strip())}}}")
-
-        aff_string = ",\n            ".join(parts)
-
-        # Verificar se já existe, senão adicionar
-        if aff_string not in affiliation_map:
-            aff_index = len(affiliations) + 1
-            affiliation_map[aff_string] = aff_index
-            affiliations.append(aff_string)
-        else:
-            aff_index = affiliation_map[aff_string]
-
-        # Adicionar autor
-        name = latex_escape(entry['name'].strip())
-        email = latex_escape(entry['email'].strip())
-
-        if ID==0:
-            latex_lines.append(f"\\author[{aff_index}]{{{name}\\corref{{cor1}}}}")
-        else:
-            latex_lines.append(f"\\author[{aff_index}]{{{name}}}")
-        latex_lines.append(f"\\ead{{{email}}}")
-        latex_lines.append("")
-
-    # Adicionar blocos de afiliação no final
-    for idx, aff in enumerate(affiliations, start=1):
-        latex_lines.append(f"\\affiliation[{idx}]{{{aff}}}")
-        latex_lines.append("")
-
-    return "\n".join(latex_lines)
-
-
-
 class ContactEditor(QDialog):
     def __init__(self, contact, parent=None):
         super().__init__(parent)
@@ -344,7 +150,82 @@ class ContactEditor(QDialog):
         self.setLayout(layout)
 
     def get_data(self):
-        return {k: self.fields[k].text() for k in self.fields}
+        contact = Contact.from_dict({k: self.fields[k].text() for k in self.fields})
+        contact.orcid = normalize_orcid(contact.orcid)
+        return contact
+
+
+class BulkEditDialog(QDialog):
+    """
+    Define o mesmo valor de um campo para vários contatos.
+    """
+    def __init__(self, count, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Edit {count} Cards")
+
+        layout = QFormLayout()
+        self.field_box = QComboBox()
+        self.field_box.setEditable(True)
+        self.field_box.addItems(FIELDS)
+        self.field_box.setCurrentText("organization")
+        layout.addRow("Field", self.field_box)
+        self.value_edit = QLineEdit()
+        layout.addRow("Value", self.value_edit)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+
+        layout.addWidget(buttons)
+        self.setLayout(layout)
+
+    def get_data(self):
+        return self.field_box.currentText().strip(), self.value_edit.text()
+
+
+class DuplicatesDialog(QDialog):
+    """
+    Lista os grupos de contatos duplicados para o usuário escolher
+    quais juntar. Os grupos mais prováveis já vêm marcados.
+    """
+    CHECKED_SCORE = 0.95
+
+    def __init__(self, groups, store, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Duplicate Contacts")
+        self.resize(700, 400)
+        self.groups = groups
+
+        layout = QVBoxLayout()
+        layout.addWidget(QLabel(f"{len(groups)} group(s) of possible duplicates. "
+                                "Checked groups are merged into their first card."))
+        self.list_widget = QListWidget()
+        for group in groups:
+            names = " | ".join(self.describe(store.get(cid)) for cid in group.ids)
+            item = QListWidgetItem(f"{round(100 * group.score)}% ({group.reason}): {names}")
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+            item.setCheckState(Qt.Checked if group.score >= self.CHECKED_SCORE else Qt.Unchecked)
+            self.list_widget.addItem(item)
+        layout.addWidget(self.list_widget)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Cancel)
+        buttons.addButton("Merge Checked", QDialogButtonBox.AcceptRole)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+
+        layout.addWidget(buttons)
+        self.setLayout(layout)
+
+    @staticmethod
+    def describe(contact):
+        text = contact.get("name", "") or "(no name)"
+        if contact.get("email", ""):
+            text += f" <{contact['email']}>"
+        return text
+
+    def get_data(self):
+        return [group for row, group in enumerate(self.groups)
+                if self.list_widget.item(row).checkState() == Qt.Checked]
 
 
 class AcademicContactsApp(QMainWindow):
@@ -352,8 +233,30 @@ class AcademicContactsApp(QMainWindow):
         super().__init__()
         self.setWindowTitle(about.__program_name__)
         self.setGeometry(200, 200, 700, 600)
-        self.contacts = []
+        if CONFIG.get("geometry"):
+            self.restoreGeometry(QByteArray.fromBase64(CONFIG["geometry"].encode("ascii")))
+        self.contacts = ContactStore()
         self.current_file = ""
+        self.loader = None
+        self.previous_state = None
+        self.saver = None
+        self.saver_store = None
+        self.save_pending = False
+        self.reloader = None
+        self.finder = None
+        self.searcher = None
+        self.orcid_checker = None
+        self.importer = None
+        self.import_report = []
+        self.import_failed = False
+        # Dados locais do ORCID (opcional), lidos só no primeiro uso
+        self.orcid_cache = OrcidCache(CONFIG["orcid_cache"]) if CONFIG.get("orcid_cache") else None
+        self.journal = UndoJournal(CONFIG.get("undo_limit", 1000))
+        self.author_lists = AuthorLists()
+        self.recent = RecentFiles(CONFIG, SNAPSHOT_DIR, RECENT_FILES)
+        self.snapshot_writers = {}   # caminho -> SnapshotWriter em andamento
+        self.watcher = FileWatcher(self)
+        self.watcher.fileChanged.connect(self.on_file_changed)
         
         ## Icon
         # Get base directory for icons
@@ -368,8 +271,9 @@ class AcademicContactsApp(QMainWindow):
         self.init_export_toolbar()
         self.generate_filepath()
         self.init_ui()
+        self.init_statusbar()
         
-        if os.path.exists(CONFIG["old_path"]):
+        if os.path.exists(CONFIG.get("old_path", "")):
             self.load_file(CONFIG["old_path"])
 
     def generate_filepath(self):
@@ -396,7 +300,11 @@ class AcademicContactsApp(QMainWindow):
         open_action = QAction(QIcon(resource_path('icons', 'open_file.png')), "Open", self)
         open_action.setToolTip("Open list card from a *.AcademicContacts.json")
         open_action.triggered.connect(lambda: self.load_file(""))
+        self.recent_menu = QMenu(self)
+        self.recent_menu.aboutToShow.connect(self.fill_recent_menu)
+        open_action.setMenu(self.recent_menu)
         toolbar.addAction(open_action)
+        toolbar.widgetForAction(open_action).setPopupMode(QToolButton.MenuButtonPopup)
 
         #
         save_action = QAction(QIcon(resource_path('icons', 'download.png')), "Save", self)
@@ -421,6 +329,33 @@ class AcademicContactsApp(QMainWindow):
         new_card_action.setToolTip("Add a new card to current view")
         new_card_action.triggered.connect(self.add_new_card)
         toolbar.addAction(new_card_action)
+
+        #
+        import_action = QAction(QIcon.fromTheme("document-import"), "Import", self)
+        import_action.setToolTip("Add the contacts of other files (JSON, CSV, vCard, BibTeX) to the current list")
+        import_action.triggered.connect(self.import_files)
+        toolbar.addAction(import_action)
+
+        #
+        self.undo_action = QAction(QIcon.fromTheme("edit-undo"), "Undo", self)
+        self.undo_action.setToolTip("Undo the last change to the cards")
+        self.undo_action.setShortcut(QKeySequence.Undo)
+        self.undo_action.triggered.connect(self.undo)
+        toolbar.addAction(self.undo_action)
+
+        #
+        self.redo_action = QAction(QIcon.fromTheme("edit-redo"), "Redo", self)
+        self.redo_action.setToolTip("Redo the last undone change")
+        self.redo_action.setShortcut(QKeySequence.Redo)
+        self.redo_action.triggered.connect(self.redo)
+        toolbar.addAction(self.redo_action)
+        self.update_undo_actions()
+
+        #
+        duplicates_action = QAction(QIcon.fromTheme("edit-find"), "Duplicates", self)
+        duplicates_action.setToolTip("Find contacts that look like the same person and merge them")
+        duplicates_action.triggered.connect(self.find_duplicates)
+        toolbar.addAction(duplicates_action)
         
         # Separador expansível
         spacer = QWidget()
@@ -440,25 +375,80 @@ class AcademicContactsApp(QMainWindow):
         toolbar.addAction(about_action)
 
     def init_ui(self):
-        # Scroll area for cards
-        self.scroll = QScrollArea()
-        self.scroll.setWidgetResizable(True)
-        self.container = QWidget()
-        self.vbox = QVBoxLayout(self.container)
-        self.scroll.setWidget(self.container)
-        self.main_layout.addWidget(self.scroll)
+        # Card list (model/view, only visible cards are painted)
+        self.card_view = CardListView()
+        self.card_view.menuRequested.connect(self.show_card_menu)
+        self.main_layout.addWidget(self.card_view)
 
         # Filtro de busca
         filter_layout = QHBoxLayout()
         filter_label = QLabel("Filter:")
+
+        # Debounce: filtra só depois que o usuário para de digitar
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(150)
+        self.filter_timer.timeout.connect(self.refresh_cards)
+
         self.filter_edit = QLineEdit()
         self.filter_edit.setPlaceholderText("Type to filter contacts...")
-        self.filter_edit.textChanged.connect(self.refresh_cards)
+        self.filter_edit.setText(CONFIG.get("filter", ""))
+        self.filter_edit.textChanged.connect(self.filter_timer.start)
 
         filter_layout.addWidget(filter_label)
         filter_layout.addWidget(self.filter_edit)
+
+        # Ordenação (dois campos) e agrupamento, lembrados no config.json
+        sort = CONFIG.get("sort", [])
+        self.sort_boxes = []
+        for n, label in enumerate(("Sort:", "then:")):
+            box = QComboBox()
+            box.addItem("File order" if n == 0 else "—", "")
+            for field in SORT_FIELDS:
+                box.addItem(field.capitalize(), field)
+            box.setCurrentIndex(max(box.findData(sort[n] if n < len(sort) else ""), 0))
+            box.currentIndexChanged.connect(self.change_order)
+            filter_layout.addWidget(QLabel(label))
+            filter_layout.addWidget(box)
+            self.sort_boxes.append(box)
+        self.group_box = QComboBox()
+        self.group_box.addItem("No groups", "")
+        for field in GROUP_FIELDS:
+            self.group_box.addItem(field.capitalize(), field)
+        self.group_box.setCurrentIndex(max(self.group_box.findData(CONFIG.get("group", "")), 0))
+        self.group_box.setToolTip("Group the cards; click a group title to collapse it")
+        self.group_box.currentIndexChanged.connect(self.change_order)
+        filter_layout.addWidget(QLabel("Group:"))
+        filter_layout.addWidget(self.group_box)
         self.main_layout.addLayout(filter_layout)
 
+        self.card_order = CardOrder()
+        self.apply_order()
+
+    def apply_order(self):
+        sort = [box.currentData() for box in self.sort_boxes if box.currentData()]
+        group = self.group_box.currentData()
+        self.card_order.configure(sort, group)
+        self.card_view.set_order(self.card_order)
+        return sort, group
+
+    def change_order(self):
+        CONFIG["sort"], CONFIG["group"] = self.apply_order()
+
+
+    def init_statusbar(self):
+        # Progresso da leitura de arquivos (visível só durante a leitura)
+        self.load_progress = QProgressBar()
+        self.load_progress.setRange(0, 100)
+        self.load_progress.setMaximumWidth(200)
+        self.load_progress.hide()
+        self.statusBar().addPermanentWidget(self.load_progress)
+
+        self.cancel_load_btn = QPushButton("Cancel")
+        self.cancel_load_btn.clicked.connect(self.cancel_loading)
+        self.cancel_load_btn.clicked.connect(self.cancel_import)
+        self.cancel_load_btn.hide()
+        self.statusBar().addPermanentWidget(self.cancel_load_btn)
 
     def init_export_toolbar(self):
         export_toolbar = QToolBar("Export Toolbar")
@@ -478,17 +468,88 @@ class AcademicContactsApp(QMainWindow):
         mdpi_action.setToolTip("Export the author list in LaTeX to MDPI template format.")
         mdpi_action.triggered.connect(self.show_latex_mdpi)
         export_toolbar.addAction(mdpi_action)
+        
+        # Listas de autores
+        authors_action = QAction(QIcon.fromTheme("view-list-text"), "Author Lists", self)
+        authors_action.setToolTip("Named author lists of your manuscripts, exported in their own order.")
+        authors_action.triggered.connect(self.edit_author_lists)
+        export_toolbar.addAction(authors_action)
 
 
 
     def show_latex_elsevier(self):
-        res=export_elsevier_authors(self.contacts)
-        show_latex_message(self, res)
+        self.export_contacts(list(self.contacts), ELSEVIER_TEMPLATE)
         
     def show_latex_mdpi(self):
-        res=export_mdpi_authors(self.contacts)
+        self.export_contacts(list(self.contacts), MDPI_TEMPLATE)
+
+    def export_contacts(self, contacts, template):
+        if template.orcid:
+            invalid = invalid_orcids(contacts)
+            if invalid:
+                listed = "\n".join(f"  • {contact.get('name', '') or '(no name)'}: {contact['orcid']}"
+                                    for contact in invalid[:10])
+                if len(invalid) > 10:
+                    listed += f"\n  … and {len(invalid) - 10} more"
+                QMessageBox.warning(self, "Export", f"Fix the invalid ORCID of {len(invalid)} contact(s) "
+                                                    f"before exporting:\n{listed}")
+                return
+        try:
+            res = template.render(contacts)
+        except ValueError as e:
+            QMessageBox.warning(self, "Export", str(e))
+            return
         show_latex_message(self, res)
 
+    def edit_author_lists(self):
+        from academic_contacts.modules.wauthorlists import AuthorListsDialog
+        dialog = AuthorListsDialog(self.author_lists, self.contacts, self.card_view.selected_ids(),
+                                   self.export_author_list, self)
+        dialog.exec_()
+
+    def export_author_list(self, author_list, template):
+        # O texto fica em cache até um dos autores mudar
+        try:
+            res = author_list.export(self.contacts, template)
+        except ValueError as e:
+            QMessageBox.warning(self, "Export", str(e))
+            return
+        show_latex_message(self, res)
+
+    def report_invalid_orcids(self):
+        # Numa thread: com muitos ORCIDs distintos a conferência leva segundos
+        self.cancel_orcid_check()
+        self.orcid_checker = OrcidChecker(self.contacts.value_counter("orcid"), self)
+        self.orcid_checker.store = self.contacts
+        self.orcid_checker.finished.connect(self.on_orcids_checked)
+        self.orcid_checker.start()
+
+    def on_orcids_checked(self):
+        checker = self.sender()
+        if checker is not self.orcid_checker:
+            return
+        self.orcid_checker = None
+        if checker.invalid:
+            self.statusBar().showMessage(f"{checker.invalid} contact(s) with an invalid ORCID (marked on the cards).", 8000)
+
+    def cancel_orcid_check(self):
+        if self.orcid_checker is None:
+            return
+        checker = self.orcid_checker
+        self.orcid_checker = None
+        checker.requestInterruption()
+        checker.wait()
+
+    def complete_contact(self, contact):
+        """
+        Contato editado: campos vazios completados pelo cache do ORCID.
+        """
+        if self.orcid_cache is not None:
+            contact = self.orcid_cache.fill(contact)
+        if not check_orcid(contact.orcid)[1]:
+            self.statusBar().showMessage(f"Invalid ORCID for {contact.name or '(no name)'}: {contact.orcid}", 8000)
+        return contact
+
     def on_coffee_action_click(self):
         QDesktopServices.openUrl(QUrl("https://ko-fi.com/trucomanx"))
 
@@ -505,172 +566,850 @@ class AcademicContactsApp(QMainWindow):
             "url_funding": about.__url_funding__,
             "url_bugs": about.__url_bugs__
         }
+        from academic_contacts.modules.wabout import show_about_window
         show_about_window(data,self.icon_path)
 
     def load_file(self, path=""):
         if os.path.exists(path)==False:
-            path = QFileDialog.getOpenFileName(self, "Open AcademicContacts.json", "", "*.AcademicContacts.json")[0]
+            path = QFileDialog.getOpenFileName(self, "Open AcademicContacts.json", "", 
+                                               f"AcademicContacts (*{JSON_SUFFIX} *{DB_SUFFIX});;{JSON_FILTER};;{DB_FILTER}")[0]
         
         if path:
-            try:
-                with open(path, "r", encoding="utf-8") as f:
-                    self.contacts = json.load(f)
-                
-                for contact in self.contacts:
-                    for key, default_value in DEFAULT_CONTACT.items():
-                        contact.setdefault(key, default_value)    
-                    
-                self.current_file = path
-                self.path_edit.setText(path)
-                self.refresh_cards()
-                
-                CONFIG["old_path"] = self.current_file
-                configure.save_config(CONFIG_PATH, CONFIG)
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Failed to load file:\n{e}")
+            self.cancel_loading()
+            self.cancel_reload()
+            self.cancel_duplicates()
+            self.cancel_import()
+            
+            if path.endswith(DB_SUFFIX):
+                self.open_database(path)
+                return
+            # Arquivo mapeado ao lado do JSON e ainda atual: abre sem ler o JSON
+            signature = file_signature(path)
+            if CONFIG.get("mapped_files", False) and signature is not None:
+                mapped = find_map(path, signature)
+                if mapped is not None:
+                    self.open_database(path, MappedContactStore, mapped)
+                    return
+            
+            # A lista anterior volta se a leitura falhar ou for cancelada
+            self.previous_state = (self.contacts, self.current_file, self.journal, self.author_lists)
+            self.journal = UndoJournal(CONFIG.get("undo_limit", 1000))
+            self.author_lists = AuthorLists()
+            self.update_undo_actions()
+            self.contacts = ContactStore()
+            self.current_file = path
+            self.path_edit.setText(path)
+            self.refresh_cards()
+            self.watch_current_file()
+            
+            snapshot = self.recent.snapshot_path(path) if CONFIG.get("snapshots", True) else None
+            self.loader = ContactLoader(path, snapshot, self)
+            self.loader.chunkLoaded.connect(self.on_contacts_loaded)
+            self.loader.progress.connect(self.load_progress.setValue)
+            self.loader.finished.connect(self.on_load_finished)
+            self.load_progress.setValue(0)
+            self.load_progress.show()
+            self.cancel_load_btn.setToolTip("Stop loading the file and go back to the previous list")
+            self.cancel_load_btn.show()
+            self.loader.start()
+
+    def open_database(self, path, store_class=SqliteContactStore, source=None):
+        # Também abre o arquivo mapeado `source` ao lado de um JSON (store_class=MappedContactStore)
+        try:
+            store = store_class(source or path)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to load file:\n{e}")
+            return
+        
+        self.close_store(self.contacts)
+        self.contacts = store
+        self.current_file = path
+        self.path_edit.setText(path)
+        self.refresh_cards()
+        self.watch_current_file()
+        self.load_journal()
+        self.load_author_lists()
+        self.report_invalid_orcids()
+        
+        self.remember_file(self.current_file)
+
+    def close_store(self, store):
+        if self.searcher is not None and self.searcher.store is store:
+            self.cancel_search()
+        if self.orcid_checker is not None and self.orcid_checker.store is store:
+            self.cancel_orcid_check()
+        # Alterações não salvas num banco SQLite são descartadas (rollback)
+        if isinstance(store, (SqliteContactStore, MappedContactStore)):
+            store.close()
+
+    def on_contacts_loaded(self, chunk):
+        if self.sender() is not self.loader:
+            return
+        contacts, texts = chunk
+        new_ids = self.contacts.extend(contacts, texts=texts)
+        self.append_matching(new_ids)
+
+    def on_load_finished(self):
+        loader = self.sender()
+        if loader is not self.loader:
+            return
+        self.loader = None
+        self.load_progress.hide()
+        self.cancel_load_btn.hide()
+        self.card_view.finish_appending()
+        
+        if loader.error:
+            self.restore_previous_state()
+            QMessageBox.critical(self, "Error", f"Failed to load file:\n{loader.error}")
+            return
+        
+        self.close_store(self.previous_state[0])
+        self.previous_state = None
+        self.load_journal()
+        self.load_author_lists()
+        self.report_invalid_orcids()
+        self.remember_file(self.current_file)
+        if not loader.from_snapshot and self.contacts.version == 0:
+            # A lista ainda é a do arquivo: da próxima vez abre pelo snapshot
+            items = self.contacts.items()
+            self.write_snapshot(loader.path, loader.signature,
+                                [cid for cid, _ in items], [contact for _, contact in items])
+
+    def cancel_loading(self):
+        if self.loader is None:
+            return
+        loader = self.loader
+        self.loader = None
+        loader.requestInterruption()
+        loader.wait()
+        self.load_progress.hide()
+        self.cancel_load_btn.hide()
+        self.restore_previous_state()
+
+    def restore_previous_state(self):
+        if self.previous_state is None:
+            return
+        self.contacts, self.current_file, self.journal, self.author_lists = self.previous_state
+        self.previous_state = None
+        self.update_undo_actions()
+        self.path_edit.setText(self.current_file)
+        self.refresh_cards()
+        self.watch_current_file()
+
+    def watch_current_file(self):
+        # Só os arquivos JSON; o SQLite cuida do acesso concorrente ao banco
+        if self.current_file.endswith(DB_SUFFIX):
+            self.watcher.watch("")
+        else:
+            self.watcher.watch(self.current_file)
+
+    def on_file_changed(self, path):
+        if path != self.current_file:
+            return
+        if self.loader is not None or self.saver is not None or self.reloader is not None:
+            # Confere de novo quando a operação atual terminar
+            self.watcher.schedule()
+            return
+        self.reloader = ContactReloader(path, self.contacts.sync_base(), self.contacts.version, self)
+        self.reloader.store = self.contacts
+        self.reloader.signature = file_signature(path)
+        self.reloader.finished.connect(self.on_reload_finished)
+        self.reloader.start()
+
+    def cancel_reload(self):
+        if self.reloader is None:
+            return
+        reloader = self.reloader
+        self.reloader = None
+        reloader.requestInterruption()
+        reloader.wait()
+
+    def on_reload_finished(self):
+        reloader = self.sender()
+        if reloader is not self.reloader:
+            return
+        self.reloader = None
+        
+        if reloader.error:
+            # Provavelmente o arquivo ainda está sendo gravado
+            self.statusBar().showMessage(f"Could not read the changed file: {reloader.error}", 5000)
+            return
+        if reloader.store is not self.contacts or reloader.version != self.contacts.version:
+            # A lista mudou durante a leitura: compara de novo
+            self.on_file_changed(self.current_file)
+            return
+        
+        self.apply_file_changes(reloader.changes)
+        self.watcher.accept(reloader.signature)
+
+    def apply_file_changes(self, changes):
+        """
+        Aplica na lista e nos cards só o que mudou no arquivo.
+        """
+        store = self.contacts
+        for cid, contact in changes.changed.items():
+            store.replace(cid, contact)
+        if changes.removed:
+            store.remove_many(changes.removed)
+        added = store.extend(changes.added)
+        store.mark_synced(list(changes.changed) + changes.removed + changes.synced)
+        
+        changed = list(changes.changed)
+        removed = list(changes.removed)
+        if changes.conflicts and self.ask_take_file_versions(changes.conflicts):
+            dropped = []
+            for cid, local, remote in changes.conflicts:
+                if remote is None:
+                    dropped.append(cid)
+                elif local is None:
+                    # Apagado aqui e editado no arquivo: volta com um ID novo
+                    added += store.extend([remote])
+                else:
+                    store.replace(cid, remote)
+                    changed.append(cid)
+            if dropped:
+                store.remove_many(dropped)
+                removed += dropped
+            store.mark_synced([cid for cid, _, _ in changes.conflicts])
+        elif changes.conflicts:
+            # Ficam as versões daqui, mas em relação ao arquivo novo: o
+            # próximo salvamento por fora não pergunta de novo por elas
+            store.rebase({cid: remote for cid, _, remote in changes.conflicts})
+        
+        self.show_changes(changed, removed, added)
+        if removed or added:
+            # As posições guardadas no histórico não valem mais
+            self.journal.clear()
+            self.update_undo_actions()
+        
+        self.statusBar().showMessage(
+            f"File changed on disk: {len(added)} added, {len(changed)} changed, {len(removed)} removed.", 5000)
+
+    def ask_take_file_versions(self, conflicts):
+        names = [(local or remote).get("name", "") or "(no name)" for _, local, remote in conflicts]
+        listed = "\n".join(f"  • {name}" for name in names[:10])
+        if len(names) > 10:
+            listed += f"\n  … and {len(names) - 10} more"
+        box = QMessageBox(self)
+        box.setIcon(QMessageBox.Warning)
+        box.setWindowTitle("File changed on disk")
+        box.setText(f"{len(conflicts)} contact(s) with unsaved edits were also changed in the file:\n{listed}")
+        box.setInformativeText("Keep your versions (they overwrite the file on the next save) "
+                               "or use the versions from the file?")
+        keep = box.addButton("Keep Mine", QMessageBox.RejectRole)
+        box.addButton("Use File Versions", QMessageBox.AcceptRole)
+        box.setDefaultButton(keep)
+        box.exec_()
+        return box.clickedButton() is not keep
+
+    def closeEvent(self, event):
+        self.cancel_search()
+        self.cancel_loading()
+        self.cancel_reload()
+        self.cancel_duplicates()
+        self.cancel_orcid_check()
+        self.cancel_import()
+        while self.saver is not None:
+            self.saver.wait()
+            self.finish_save()
+        self.close_store(self.contacts)
+        for writer in list(self.snapshot_writers.values()):
+            writer.wait()
+            self.finish_snapshot(writer)
+        CONFIG["geometry"] = bytes(self.saveGeometry().toBase64()).decode("ascii")
+        CONFIG.flush()
+        super().closeEvent(event)
 
     def save_file(self):
+        if self.loader is not None:
+            self.statusBar().showMessage("Wait until the file finishes loading.", 3000)
+            return
         if not self.current_file:
             self.save_as_file()
             return
-        try:
-            with open(self.current_file, "w", encoding="utf-8") as f:
-                json.dump(self.contacts, f, indent=4, ensure_ascii=False)
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to save file:\n{e}")
+        if isinstance(self.contacts, SqliteContactStore):
+            try:
+                self.contacts.commit()
+                self.save_journal()
+                self.save_author_lists(self.current_file, self.author_lists.to_data(self.contacts))
+                self.statusBar().showMessage(f"Saved {self.current_file}", 3000)
+            except Exception as e:
+                QMessageBox.critical(self, "Error", f"Failed to save file:\n{e}")
+            return
+        if self.saver is not None:
+            # Salva de novo assim que o salvamento atual terminar
+            self.save_pending = True
+            return
+        
+        compact  = CONFIG.get("compact_json", False)
+        with_ids = CONFIG.get("persist_ids", False)
+        items = self.contacts.save_items(compact, with_ids)
+        
+        self.saver = ContactSaver(self.current_file, items, compact, with_ids, self)
+        self.saver.version = self.contacts.version
+        # As posições gravadas nas listas de autores são as desta versão
+        self.saver.author_data = self.author_lists.to_data(self.contacts)
+        self.saver_store = self.contacts
+        self.saver.finished.connect(self.on_save_finished)
+        self.statusBar().showMessage("Saving...")
+        self.saver.start()
+
+    def on_save_finished(self):
+        if self.sender() is self.saver:
+            self.finish_save()
+
+    def finish_save(self):
+        saver = self.saver
+        self.saver = None
+        
+        if saver.error:
+            self.statusBar().clearMessage()
+            QMessageBox.critical(self, "Error", f"Failed to save file:\n{saver.error}")
+        else:
+            if self.saver_store is self.contacts:
+                self.contacts.cache_blobs(saver.compact, saver.with_ids, saver.new_blobs)
+                self.contacts.mark_saved(saver.version)
+            if saver.path == self.current_file:
+                self.watcher.accept()
+                self.save_journal()
+            self.save_author_lists(saver.path, saver.author_data)
+            self.write_snapshot(saver.path, saver.signature,
+                                [cid for cid, _, _ in saver.items] if saver.with_ids else None,
+                                [contact for _, contact, _ in saver.items])
+            self.statusBar().showMessage(f"Saved {saver.path}", 3000)
+        self.saver_store = None
+        
+        if self.save_pending:
+            self.save_pending = False
+            self.save_file()
 
     def save_as_file(self):
-        path = QFileDialog.getSaveFileName(self, "Save As", "", "*.AcademicContacts.json")[0]
+        if self.loader is not None:
+            self.statusBar().showMessage("Wait until the file finishes loading.", 3000)
+            return
+        path, selected = QFileDialog.getSaveFileName(self, "Save As", "", f"{JSON_FILTER};;{DB_FILTER}")
         if path:
-            if not path.endswith(".AcademicContacts.json"):
-                path += ".AcademicContacts.json"
+            if not path.endswith((JSON_SUFFIX, DB_SUFFIX)):
+                path += DB_SUFFIX if selected == DB_FILTER else JSON_SUFFIX
+            
+            try:
+                if (isinstance(self.contacts, SqliteContactStore)
+                        and os.path.abspath(path) == os.path.abspath(self.contacts.path)):
+                    store = self.contacts
+                elif path.endswith(DB_SUFFIX):
+                    # Importa a lista atual para um banco novo
+                    if os.path.exists(path):
+                        os.remove(path)
+                    store = SqliteContactStore(path)
+                    store.reset(iter(self.contacts))
+                    store.commit()
+                elif isinstance(self.contacts, SqliteContactStore):
+                    # Exporta o banco para JSON: a lista passa para a memória
+                    store = ContactStore(list(self.contacts))
+                else:
+                    store = self.contacts
+            except Exception as e:
+                QMessageBox.critical(self, "Error", f"Failed to save file:\n{e}")
+                return
+            
+            if store is not self.contacts:
+                # Os contatos ganham IDs novos; as listas de autores seguem pelas posições
+                self.author_lists.from_data(self.author_lists.to_data(self.contacts), store)
+                self.close_store(self.contacts)
+                self.contacts = store
+                self.refresh_cards()
+            
             self.current_file = path
             self.path_edit.setText(path)
+            self.watch_current_file()
             self.save_file()
             
-            CONFIG["old_path"] = self.current_file
-            configure.save_config(CONFIG_PATH, CONFIG)
+            self.remember_file(self.current_file)
 
     def new_file(self):
-        self.contacts = []
+        self.cancel_loading()
+        self.cancel_reload()
+        self.cancel_duplicates()
+        self.cancel_import()
+        self.close_store(self.contacts)
+        self.contacts = ContactStore()
         self.current_file = ""
         self.path_edit.setText("")
         self.refresh_cards()
+        self.watch_current_file()
+        self.journal.clear()
+        self.update_undo_actions()
+        self.author_lists = AuthorLists()
 
     def add_new_card(self):
         dialog = ContactEditor(DEFAULT_CONTACT, self)
         if dialog.exec_():
-            self.contacts.append(dialog.get_data())
-            self.refresh_cards()
+            contact = self.complete_contact(dialog.get_data())
+            cid = self.contacts.append(contact)
+            self.journal.record_add(self.contacts.position(cid), cid, contact)
+            self.update_undo_actions()
+            self.show_changes(inserted=[cid])
+
+    def import_files(self):
+        if self.loader is not None or self.importer is not None:
+            self.statusBar().showMessage("Wait for the current file operation to finish.", 5000)
+            return
+        paths = QFileDialog.getOpenFileNames(self, "Import Contacts", "", IMPORT_FILTER)[0]
+        if not paths:
+            return
+        
+        self.import_report = []
+        self.import_failed = False
+        self.importer = ContactImporter(paths, [contact for _, contact in self.contacts.items()], self)
+        self.importer.store = self.contacts
+        self.importer.sourceImported.connect(self.on_source_imported)
+        self.importer.progress.connect(self.load_progress.setValue)
+        self.importer.finished.connect(self.on_import_finished)
+        self.load_progress.setValue(0)
+        self.load_progress.show()
+        self.cancel_load_btn.setToolTip("Stop importing; the files already imported stay in the list")
+        self.cancel_load_btn.show()
+        self.statusBar().showMessage(f"Importing {len(paths)} file(s)...")
+        self.importer.start()
+
+    def on_source_imported(self, result):
+        importer = self.sender()
+        if importer is not self.importer or importer.store is not self.contacts:
+            return
+        path, contacts, skipped, error = result
+        name = os.path.basename(path)
+        if error:
+            self.import_report.append(f"{name}: {error}")
+            self.import_failed = True
+            return
+        
+        # Cada arquivo é um passo de desfazer
+        ids = self.contacts.extend(contacts, touch=True)
+        first = len(self.contacts) - len(ids)
+        if ids:
+            self.journal.record_add_many([(first + k, cid, contact) for k, (cid, contact) in enumerate(zip(ids, contacts))])
+            self.update_undo_actions()
+        self.append_matching(ids)
+        self.card_view.finish_appending()
+        self.import_report.append(f"{name}: {len(ids)} added, {skipped} already in the list")
+
+    def cancel_import(self):
+        if self.importer is None:
+            return
+        importer = self.importer
+        self.importer = None
+        importer.requestInterruption()
+        importer.wait()
+        self.load_progress.hide()
+        self.cancel_load_btn.hide()
+        self.statusBar().clearMessage()
+
+    def on_import_finished(self):
+        importer = self.sender()
+        if importer is not self.importer:
+            return
+        self.importer = None
+        self.load_progress.hide()
+        self.cancel_load_btn.hide()
+        self.statusBar().clearMessage()
+        
+        if importer.error:
+            self.import_report.append(f"Import failed: {importer.error}")
+            self.import_failed = True
+        box = QMessageBox(self)
+        box.setIcon(QMessageBox.Warning if self.import_failed else QMessageBox.Information)
+        box.setWindowTitle("Import")
+        box.setText("\n".join(self.import_report[:20]))
+        if len(self.import_report) > 20:
+            box.setInformativeText(f"… and {len(self.import_report) - 20} more files")
+            box.setDetailedText("\n".join(self.import_report))
+        box.exec_()
+
+    def filter_query(self):
+        return parse_query(self.filter_edit.text().lower().strip())
 
     def refresh_cards(self):
-        filter_text = self.filter_edit.text().lower().strip()
-
-        # Limpa os widgets existentes
-        while self.vbox.count():
-            item = self.vbox.takeAt(0)
-            widget = item.widget()
-            if widget:
-                widget.setParent(None)
-
-        # Filtra contatos
-        filtered_contacts = []
-        for contact in self.contacts:
-            if not filter_text:
-                filtered_contacts.append(contact)
-            else:
-                combined_text = " ".join(contact.values()).lower()
-                if filter_text in combined_text:
-                    filtered_contacts.append(contact)
-
-        # Renderiza os cards filtrados
-        for index, contact in enumerate(filtered_contacts):
-            card = QGroupBox(f"{index + 1}/{len(filtered_contacts)}")
-            layout = QVBoxLayout()
-
-            # Info display (text selectable)
-            info = "<br>".join(f"<b>{k.capitalize()}</b>: {v}" for k, v in contact.items())
-            label = QLabel(info)
-            label.setTextInteractionFlags(Qt.TextSelectableByMouse)  # Make text selectable
-            label.setWordWrap(True)
-            label.setTextFormat(Qt.RichText)
-            layout.addWidget(label)
-
-            # Button to open context menu
-            menu_btn = QPushButton("⋮")
-            menu_btn.setFixedWidth(25)
-            menu_btn.setToolTip("Card menu")
-            menu_btn.setCursor(Qt.PointingHandCursor)
-            menu_btn.setStyleSheet("QPushButton { border: none; font-weight: bold; }")
-            menu_btn.clicked.connect(lambda _, i=self.contacts.index(contact), btn=menu_btn: self.show_card_menu(i, btn))
-
-            # Top-right aligned row for the button
-            top_row = QHBoxLayout()
-            top_row.addStretch()
-            top_row.addWidget(menu_btn)
-            layout.insertLayout(0, top_row)
-
-            card.setLayout(layout)
-            self.vbox.addWidget(card)
-
-        self.vbox.addStretch()
-
-    def copy_card_as_dict(self, index: int):
-        contact = self.contacts[index]
-        dict_str = json.dumps(contact, indent=4, ensure_ascii=False)
+        CONFIG["filter"] = self.filter_edit.text()
+        self.cancel_search()
+        query = self.filter_query()
+
+        # Listas grandes são filtradas numa thread; os cards chegam por partes
+        chunks = None
+        if len(self.contacts) >= BACKGROUND_SEARCH and self.loader is None:
+            chunks = query.search_chunks(self.contacts)
+        if chunks is None:
+            # Filtra contatos pelo índice (guarda apenas os IDs)
+            self.card_view.set_contacts(self.contacts, query.search(self.contacts))
+            return
+
+        self.searcher = ContactSearcher(chunks, self)
+        self.searcher.store = self.contacts
+        self.searcher.shown = False
+        self.searcher.chunkFound.connect(self.on_search_chunk)
+        self.searcher.finished.connect(self.on_search_finished)
+        self.statusBar().showMessage("Filtering...")
+        self.searcher.start()
+
+    def on_search_chunk(self, ids):
+        searcher = self.sender()
+        if searcher is not self.searcher:
+            return
+        if not searcher.shown:
+            # A lista anterior fica na tela até a primeira parte ficar pronta
+            searcher.shown = True
+            self.card_view.set_contacts(self.contacts, ids)
+        else:
+            self.card_view.append_contacts(ids)
+
+    def on_search_finished(self):
+        searcher = self.sender()
+        if searcher is not self.searcher:
+            return
+        self.searcher = None
+        if not searcher.shown:
+            self.card_view.set_contacts(self.contacts, [])
+        self.card_view.finish_appending()
+        if searcher.error:
+            self.statusBar().showMessage(f"Filter failed: {searcher.error}", 5000)
+        else:
+            self.statusBar().clearMessage()
+
+    def cancel_search(self):
+        # Consulta antiga (o usuário continuou digitando ou a lista mudou)
+        if self.searcher is None:
+            return
+        searcher = self.searcher
+        self.searcher = None
+        searcher.requestInterruption()
+        searcher.wait()
+        self.statusBar().clearMessage()
+
+    def append_matching(self, ids):
+        """
+        Mostra, dos contatos novos `ids`, os que passam no filtro.
+        """
+        if self.searcher is not None:
+            # A busca em andamento não os conhece: busca de novo
+            self.refresh_cards()
+            return
+        self.card_view.append_contacts(self.filter_query().filter_ids(self.contacts, ids))
+
+    def copy_card_as_dict(self, cid: int):
+        contact = self.contacts.get(cid)
+        dict_str = json.dumps(contact.to_dict(), indent=4, ensure_ascii=False)
         QApplication.clipboard().setText(dict_str)
 
-    def show_card_menu(self, index: int, widget: QWidget):
+    def show_card_menu(self, cid: int, pos):
+        selected = self.card_view.selected_ids()
+        if len(selected) > 1 and cid in selected:
+            self.show_selection_menu(selected, pos)
+            return
+
         menu = QMenu()
 
         edit_action = QAction("Edit Card", self)
-        edit_action.triggered.connect(lambda: self.edit_contact(index))
+        edit_action.triggered.connect(lambda: self.edit_contact(cid))
         menu.addAction(edit_action)
 
         delete_action = QAction("Delete Card", self)
-        delete_action.triggered.connect(lambda: self.delete_contact(index))
+        delete_action.triggered.connect(lambda: self.delete_contact(cid))
         menu.addAction(delete_action)
 
         copy_action = QAction("Copy as dict", self)
-        copy_action.triggered.connect(lambda: self.copy_card_as_dict(index))
+        copy_action.triggered.connect(lambda: self.copy_card_as_dict(cid))
         menu.addAction(copy_action)
 
-        menu.exec_(widget.mapToGlobal(QPoint(0, widget.height())))
+        menu.exec_(pos)
 
-    def edit_contact(self, index):
-        dialog = ContactEditor(self.contacts[index], self)
+    def edit_contact(self, cid):
+        before = self.contacts.get(cid)
+        dialog = ContactEditor(before, self)
         if dialog.exec_():
-            self.contacts[index] = dialog.get_data()
-            self.refresh_cards()
+            after = self.complete_contact(dialog.get_data())
+            self.journal.record_edit(self.contacts.position(cid), cid, before, after)
+            self.update_undo_actions()
+            self.contacts.replace(cid, after)
+            self.show_changes(changed=[cid])
+
+    def delete_contact(self, cid):
+        self.journal.record_delete(self.contacts.position(cid), cid, self.contacts.get(cid))
+        self.update_undo_actions()
+        self.contacts.remove(cid)
+        self.show_changes(removed=[cid])
+
+    def show_selection_menu(self, ids, pos):
+        menu = QMenu()
+        n = len(ids)
 
-    def delete_contact(self, index):
-        del self.contacts[index]
-        self.refresh_cards()
+        edit_action = QAction(f"Edit Field of {n} Cards", self)
+        edit_action.triggered.connect(lambda: self.edit_selection(ids))
+        menu.addAction(edit_action)
+
+        delete_action = QAction(f"Delete {n} Cards", self)
+        delete_action.triggered.connect(lambda: self.delete_selection(ids))
+        menu.addAction(delete_action)
+
+        copy_action = QAction(f"Copy {n} as JSON", self)
+        copy_action.triggered.connect(lambda: self.copy_selection(ids))
+        menu.addAction(copy_action)
+
+        menu.addSeparator()
+        elsevier_action = QAction(f"Export {n} to Elsevier", self)
+        elsevier_action.triggered.connect(lambda: self.export_selection(ids, ELSEVIER_TEMPLATE))
+        menu.addAction(elsevier_action)
+
+        mdpi_action = QAction(f"Export {n} to MDPI", self)
+        mdpi_action.triggered.connect(lambda: self.export_selection(ids, MDPI_TEMPLATE))
+        menu.addAction(mdpi_action)
+
+        menu.exec_(pos)
+
+    def edit_selection(self, ids):
+        dialog = BulkEditDialog(len(ids), self)
+        if not dialog.exec_():
+            return
+        key, value = dialog.get_data()
+        if not key:
+            return
+        
+        items = []
+        for cid in ids:
+            before = self.contacts.get(cid)
+            after = before.copy()
+            after[key] = value
+            items.append((self.contacts.position(cid), cid, before, after))
+        self.journal.record_edit_many(items)
+        self.update_undo_actions()
+        for _, cid, _, after in items:
+            self.contacts.replace(cid, after)
+        self.show_changes(changed=ids)
+
+    def delete_selection(self, ids):
+        answer = QMessageBox.question(self, "Delete Cards", f"Delete {len(ids)} cards?")
+        if answer != QMessageBox.Yes:
+            return
+        self.journal.record_delete_many([(self.contacts.position(cid), cid, self.contacts.get(cid)) for cid in ids])
+        self.update_undo_actions()
+        self.contacts.remove_many(ids)
+        self.show_changes(removed=ids)
+
+    def copy_selection(self, ids):
+        data = [self.contacts.get(cid).to_dict() for cid in ids]
+        QApplication.clipboard().setText(json.dumps(data, indent=4, ensure_ascii=False))
+
+    def export_selection(self, ids, template):
+        self.export_contacts([self.contacts.get(cid) for cid in ids], template)
+
+    def update_undo_actions(self):
+        self.undo_action.setEnabled(self.journal.can_undo())
+        self.redo_action.setEnabled(self.journal.can_redo())
+
+    def undo(self):
+        if self.loader is not None or not self.journal.can_undo():
+            return
+        self.show_changes(*self.journal.undo(self.contacts))
+        self.update_undo_actions()
+
+    def redo(self):
+        if self.loader is not None or not self.journal.can_redo():
+            return
+        self.show_changes(*self.journal.redo(self.contacts))
+        self.update_undo_actions()
+
+    def find_duplicates(self):
+        if self.loader is not None:
+            self.statusBar().showMessage("Wait for the file to finish loading.", 5000)
+            return
+        if self.finder is not None:
+            return
+        self.finder = DuplicateFinder(self.contacts.items(), self.contacts.version, self)
+        self.finder.store = self.contacts
+        self.finder.finished.connect(self.on_duplicates_found)
+        self.statusBar().showMessage("Looking for duplicate contacts...")
+        self.finder.start()
+
+    def cancel_duplicates(self):
+        if self.finder is None:
+            return
+        finder = self.finder
+        self.finder = None
+        finder.requestInterruption()
+        finder.wait()
+        self.statusBar().clearMessage()
+
+    def on_duplicates_found(self):
+        finder = self.sender()
+        if finder is not self.finder:
+            return
+        self.finder = None
+        self.statusBar().clearMessage()
+        
+        if finder.error:
+            QMessageBox.warning(self, "Duplicates", f"Failed to look for duplicates:\n{finder.error}")
+            return
+        if finder.store is not self.contacts or finder.groups is None:
+            return
+        if not finder.groups:
+            QMessageBox.information(self, "Duplicates", "No duplicate contacts found.")
+            return
+        
+        dialog = DuplicatesDialog(finder.groups, self.contacts, self)
+        if dialog.exec_():
+            self.merge_duplicates(dialog.get_data())
+
+    def merge_duplicates(self, groups):
+        """
+        Junta cada grupo no seu primeiro card, como um único passo de desfazer.
+        """
+        store = self.contacts
+        edits = []
+        deletes = []
+        for group in groups:
+            # A lista pode ter mudado enquanto a busca rodava
+            ids = sorted((cid for cid in group.ids if store.has_id(cid)), key=store.position)
+            if len(ids) < 2:
+                continue
+            contacts = [store.get(cid) for cid in ids]
+            edits.append((store.position(ids[0]), ids[0], contacts[0], merge_contacts(contacts)))
+            deletes += [(store.position(cid), cid, contact) for cid, contact in zip(ids[1:], contacts[1:])]
+        if not deletes:
+            return
+        
+        self.journal.record_merge(edits, deletes)
+        self.update_undo_actions()
+        for _, cid, _, after in edits:
+            store.replace(cid, after)
+        removed = [cid for _, cid, _ in deletes]
+        store.remove_many(removed)
+        self.show_changes(changed=[cid for _, cid, _, _ in edits], removed=removed)
+        self.statusBar().showMessage(f"Merged {len(removed)} duplicate card(s) into {len(edits)}.", 5000)
+
+    def remember_file(self, path):
+        CONFIG["old_path"] = path
+        self.recent.remember(path)
+
+    def fill_recent_menu(self):
+        self.recent_menu.clear()
+        entries = self.recent.entries()
+        for entry in entries:
+            path = entry["path"]
+            count = self.recent.count(entry)
+            text = os.path.basename(path) + (f"  ({count} contacts)" if count is not None else "")
+            action = self.recent_menu.addAction(text)
+            action.setStatusTip(path)
+            action.setEnabled(os.path.exists(path))
+            action.triggered.connect(lambda _, path=path: self.load_file(path))
+        if entries:
+            self.recent_menu.addSeparator()
+            self.recent_menu.addAction("Clear Recent Files", self.recent.clear)
+        else:
+            self.recent_menu.addAction("No recent files").setEnabled(False)
+
+    def write_snapshot(self, path, signature, ids, contacts):
+        """
+        Grava numa thread o snapshot de um arquivo JSON recente que
+        acabou de ser lido ou salvo (com a assinatura `signature`), ou,
+        com mapped_files, o arquivo mapeado ao lado dele.
+        """
+        if signature is None or path.endswith(DB_SUFFIX) or path in self.snapshot_writers:
+            return
+        if CONFIG.get("mapped_files", False):
+            # O arquivo mapeado numera os contatos pela posição
+            if ids is not None and any(cid != n for n, cid in enumerate(ids, start=1)):
+                return
+            # Não substitui o arquivo mapeado aberto: grava o outro nome
+            in_use = self.contacts.path if isinstance(self.contacts, MappedContactStore) else None
+            target = next(candidate for candidate in map_paths(path) if candidate != in_use)
+            writer = MapWriter(path, signature, target, None, contacts, self)
+        elif CONFIG.get("snapshots", True) and path in self.recent.paths():
+            writer = SnapshotWriter(path, signature, self.recent.snapshot_path(path), ids, contacts, self)
+        else:
+            return
+        writer.finished.connect(self.on_snapshot_written)
+        self.snapshot_writers[path] = writer
+        writer.start()
+
+    def on_snapshot_written(self):
+        writer = self.sender()
+        if self.snapshot_writers.get(writer.path) is writer:
+            self.finish_snapshot(writer)
+
+    def finish_snapshot(self, writer):
+        del self.snapshot_writers[writer.path]
+        if writer.error:
+            self.statusBar().showMessage(f"Could not write {os.path.basename(writer.snapshot)}: {writer.error}", 5000)
+        if writer.fingerprint is not None:
+            self.recent.update(writer.path, writer.fingerprint, len(writer.contacts))
+        writer.contacts = writer.ids = None
+
+    def journal_path(self):
+        return self.current_file + JOURNAL_SUFFIX
+
+    def load_journal(self):
+        # Histórico gravado com persist_undo, se for da versão atual do arquivo
+        if CONFIG.get("persist_undo", False):
+            self.journal.load(self.journal_path(), file_signature(self.current_file))
+        self.update_undo_actions()
+
+    def save_journal(self):
+        if not CONFIG.get("persist_undo", False):
+            return
+        try:
+            self.journal.save(self.journal_path(), file_signature(self.current_file))
+        except OSError as e:
+            self.statusBar().showMessage(f"Could not save the undo history: {e}", 5000)
+
+    def load_author_lists(self):
+        lost = self.author_lists.load(self.current_file + AUTHORS_SUFFIX, self.contacts)
+        if lost:
+            self.statusBar().showMessage(f"{lost} author(s) of the author lists are no longer in the contacts.", 8000)
+
+    def save_author_lists(self, path, data):
+        if not data["lists"] and not os.path.exists(path + AUTHORS_SUFFIX):
+            return
+        try:
+            self.author_lists.save(path + AUTHORS_SUFFIX, data)
+        except OSError as e:
+            self.statusBar().showMessage(f"Could not save the author lists: {e}", 5000)
+
+    def show_changes(self, changed=(), removed=(), inserted=()):
+        """
+        Atualiza só os cards afetados, respeitando o filtro atual.
+        """
+        self.card_order.forget(removed)
+        if self.searcher is not None:
+            # A busca em andamento usa uma cópia anterior da lista
+            self.refresh_cards()
+            return
+        shown = self.card_view.card_model.shown_ids()
+        removed = set(removed)
+        changed = [cid for cid in dict.fromkeys(changed) if cid not in removed]
+        matching = set(self.filter_query().filter_ids(self.contacts, changed + list(inserted)))
+        self.card_view.update_contacts(
+            changed=[cid for cid in changed if cid in shown and cid in matching],
+            removed=[cid for cid in removed if cid in shown]
+                    + [cid for cid in changed if cid in shown and cid not in matching],
+            inserted=[cid for cid in changed + list(inserted) if cid not in shown and cid in matching])
 
 def main():
     signal.signal(signal.SIGINT, signal.SIG_DFL)
     
-    create_desktop_directory()    
-    create_desktop_menu()
-    create_desktop_file('~/.local/share/applications')
-    
-    for n in range(len(sys.argv)):
-        if sys.argv[n] == "--autostart":
-            create_desktop_directory(overwrite = True)
-            create_desktop_menu(overwrite = True)
-            create_desktop_file('~/.config/autostart', overwrite=True)
-            return
-        if sys.argv[n] == "--applications":
-            create_desktop_directory(overwrite = True)
-            create_desktop_menu(overwrite = True)
-            create_desktop_file('~/.local/share/applications', overwrite=True)
-            return
+    try:
+        # Desempate dos cards ordenados pela ordem do idioma do usuário (sorting.collation_key)
+        locale.setlocale(locale.LC_COLLATE, "")
+    except locale.Error:
+        pass
     
     app = QApplication(sys.argv)
     app.setApplicationName(about.__package__) 
     win = AcademicContactsApp()
     win.show()
-    sys.exit(app.exec_())
+    
+    # Fora do caminho até a primeira pintura da janela
+    QTimer.singleShot(0, ensure_desktop_integration)
+    status = app.exec_()
+    CONFIG.flush()
+    sys.exit(status)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,585 @@
+#!/usr/bin/python3
+'''
+Benchmarks of the hot paths of academic_contacts.
+
+cd src
+python3 benchmark.py save
+python3 benchmark.py save --sizes 1000 10000
+python3 benchmark.py --save baseline.json          # keep the results
+python3 benchmark.py --compare baseline.json       # report regressions against them
+'''
+
+import os
+import sys
+import json
+import time
+import random
+import pathlib
+import argparse
+import tempfile
+
+here = pathlib.Path(__file__).parent.resolve()
+sys.path.insert(0, str(here))
+
+BENCHMARKS = {}
+RESULTS = {}    # "benchmark|size|label" -> ms
+
+def benchmark(name):
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+FIRST_NAMES = ["Ana", "Bruno", "Carla", "Diego", "Elena", "Fernando", "Gabriela", "Hugo", "Irene", "João"]
+LAST_NAMES  = ["Silva", "Souza", "Pujaico Rivera", "Müller", "García", "Rossi", "Dubois", "Kowalski", "Tanaka", "O'Brien"]
+ORGS        = ["Federal University", "Institute of Technology", "National Laboratory", "School of Medicine", "Research Center"]
+CITIES      = [("Vitória", "Brazil"), ("Lima", "Peru"), ("Madrid", "Spain"), ("Berlin", "Germany"), ("Kyoto", "Japan")]
+
+def make_orcid(rnd):
+    from academic_contacts.modules.orcid import orcid_checksum
+    base = f"00000002{rnd.randint(1000, 9999)}{rnd.randint(100, 999)}"
+    digits = base + orcid_checksum(base)
+    return "-".join(digits[k:k + 4] for k in range(0, 16, 4))
+
+def make_contacts(n, seed=0):
+    """
+    Synthetic contacts with the fields of DEFAULT_CONTACT.
+    """
+    rnd = random.Random(seed)
+    contacts = []
+    for i in range(n):
+        first = rnd.choice(FIRST_NAMES)
+        last = rnd.choice(LAST_NAMES)
+        city, country = rnd.choice(CITIES)
+        contacts.append({
+            "name": f"{first} {last} {i}",
+            "email": f"{first.lower()}.{i}@example.org",
+            "organization": f"{rnd.choice(ORGS)} {i % 400}",
+            "addressline": f"Street {rnd.randint(1, 999)}",
+            "city": city,
+            "postcode": f"{rnd.randint(10000, 99999)}",
+            "state": "",
+            "country": country,
+            "orcid": make_orcid(rnd) if i % 3 == 0 else ""
+        })
+    return contacts
+
+def measure(func, repeat=3):
+    """
+    Best time of `repeat` runs, in milliseconds.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return 1000 * best
+
+def report(name, size, label, ms):
+    RESULTS[f"{name}|{size}|{label}"] = ms
+    print(f"{name:<10} {size:>9} {label:<34} {ms:10.2f} ms")
+
+def write_contacts(path, size):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(make_contacts(size), f, indent=4, ensure_ascii=False)
+
+def compare(baseline, threshold):
+    """
+    Compares RESULTS with a file written by --save. Returns the number
+    of measurements slower than the baseline by more than `threshold`.
+    """
+    with open(baseline, "r", encoding="utf-8") as f:
+        before = json.load(f)
+    regressions = 0
+    print(f"\n{'regression report':<55} {'before':>10} {'after':>10} {'change':>8}")
+    for key, ms in RESULTS.items():
+        if key not in before:
+            continue
+        old = before[key]
+        change = (ms - old) / old if old > 0 else 0.0
+        # Abaixo de 1 ms a variação é ruído
+        slower = change > threshold and ms - old > 1.0
+        regressions += slower
+        name, size, label = key.split("|", 2)
+        mark = "  REGRESSION" if slower else ""
+        print(f"{name:<10} {size:>9} {label:<34} {old:10.2f} {ms:10.2f} {100 * change:+7.1f}%{mark}")
+    print(f"{regressions} regression(s) above {100 * threshold:.0f}%")
+    return regressions
+
+
+@benchmark("load")
+def bench_load(sizes, workdir):
+    from academic_contacts.modules.store  import ContactStore
+    from academic_contacts.modules.jsonio import iter_contact_chunks
+    from academic_contacts.modules.recent import write_snapshot, read_snapshot, file_fingerprint
+
+    for size in sizes:
+        path = os.path.join(workdir, "bench.AcademicContacts.json")
+        write_contacts(path, size)
+
+        def parse():
+            store = ContactStore()
+            for chunk, _, _ in iter_contact_chunks(path):
+                store.extend(chunk)
+
+        report("load", size, "json.load only", measure(lambda: json.load(open(path, "r", encoding="utf-8"))))
+        report("load", size, "chunks + store + index", measure(parse))
+
+        # Reabrir um arquivo recente: snapshot (com hash do arquivo) no lugar do JSON
+        snapshot = os.path.join(workdir, "bench.pickle")
+        store = ContactStore()
+        for chunk, _, _ in iter_contact_chunks(path):
+            store.extend(chunk)
+        items = store.items()
+        write_snapshot(snapshot, file_fingerprint(path), [cid for cid, _ in items], [c for _, c in items])
+
+        def reopen():
+            contacts, texts = read_snapshot(snapshot, path)
+            ContactStore().extend(contacts, texts=texts)
+
+        report("load", size, "snapshot read only", measure(lambda: read_snapshot(snapshot, path)))
+        report("load", size, "snapshot + store + index", measure(reopen))
+
+
+@benchmark("save")
+def bench_save(sizes, workdir):
+    from academic_contacts.modules.store   import ContactStore
+    from academic_contacts.modules.contact import to_contacts
+    from academic_contacts.modules.jsonio  import serialize_contacts, atomic_write
+
+    for size in sizes:
+        contacts = make_contacts(size)
+        path = os.path.join(workdir, "bench.AcademicContacts.json")
+
+        def before():
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(contacts, f, indent=4, ensure_ascii=False)
+
+        store = ContactStore(to_contacts(contacts))
+
+        def cold():
+            items = store.save_items()
+            data, _ = serialize_contacts(items)
+            atomic_write(path, data)
+
+        data, new_blobs = serialize_contacts(store.save_items())
+        store.cache_blobs(False, False, new_blobs)
+
+        def one_edit():
+            cid = store.id_at(size // 2)
+            contact = store.get(cid).copy()
+            contact.name = "Edited"
+            store.replace(cid, contact)
+            data, new_blobs = serialize_contacts(store.save_items())
+            atomic_write(path, data)
+            store.cache_blobs(False, False, new_blobs)
+
+        report("save", size, "before: json.dump(indent=4)", measure(before))
+        report("save", size, "after: cold cache + atomic", measure(cold))
+        report("save", size, "after: one edit + atomic", measure(one_edit))
+
+
+@benchmark("memory")
+def bench_memory(sizes, workdir):
+    import gc
+    import tracemalloc
+    from academic_contacts.modules.contact import to_contacts
+
+    for size in sizes:
+        path = os.path.join(workdir, "bench.AcademicContacts.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(make_contacts(size), f, ensure_ascii=False)
+
+        def allocated(load):
+            gc.collect()
+            tracemalloc.start()
+            with open(path, "r", encoding="utf-8") as f:
+                records = load(json.load(f))
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            del records
+            return current
+
+        as_dicts = allocated(lambda records: records)
+        as_contacts = allocated(to_contacts)
+        print(f"{'memory':<10} {size:>9} {'before: dict per contact':<34} {as_dicts / size:10.1f} bytes/contact")
+        print(f"{'memory':<10} {size:>9} {'after: slotted Contact':<34} {as_contacts / size:10.1f} bytes/contact")
+
+
+@benchmark("sqlite")
+def bench_sqlite(sizes, workdir):
+    from academic_contacts.modules.sqlstore import SqliteContactStore
+    from academic_contacts.modules.contact  import to_contacts
+
+    for size in sizes:
+        contacts = to_contacts(make_contacts(size))
+        path = os.path.join(workdir, f"bench{size}.AcademicContacts.db")
+
+        start = time.perf_counter()
+        store = SqliteContactStore(path)
+        store.reset(contacts)
+        store.commit()
+        store.close()
+        report("sqlite", size, "import from list", 1000 * (time.perf_counter() - start))
+
+        store = SqliteContactStore(path)
+        report("sqlite", size, "open", measure(lambda: SqliteContactStore(path).close()))
+        report("sqlite", size, "filter 'silva 1'", measure(lambda: store.search("silva 1")))
+
+        def edit():
+            cid = store.id_at(size // 2)
+            contact = store.get(cid).copy()
+            contact.name = "Edited"
+            store.replace(cid, contact)
+            store.commit()
+
+        report("sqlite", size, "edit one contact + commit", measure(edit))
+        store.close()
+
+
+@benchmark("mapped")
+def bench_mapped(sizes, workdir):
+    from academic_contacts.modules.mapstore import MappedContactStore, write_map, MAP_SUFFIX
+    from academic_contacts.modules.contact  import to_contacts
+    from academic_contacts.modules.filesync import file_signature
+
+    for size in sizes:
+        contacts = to_contacts(make_contacts(size))
+        path = os.path.join(workdir, f"bench{size}.AcademicContacts.json")
+        write_contacts(path, size)
+        signature = file_signature(path)
+
+        start = time.perf_counter()
+        write_map(path + MAP_SUFFIX, signature, contacts)
+        report("mapped", size, "write map file", 1000 * (time.perf_counter() - start))
+        del contacts
+
+        report("mapped", size, "open", measure(lambda: MappedContactStore(path + MAP_SUFFIX).close()))
+        store = MappedContactStore(path + MAP_SUFFIX)
+
+        def first_page():
+            # Os cards visíveis ao abrir, sem o cache de contatos
+            store._cache.clear()
+            for n in range(min(size, 50)):
+                store.get(store.id_at(n))
+
+        report("mapped", size, "get first 50 cards", measure(first_page))
+        for query in ("silva", "silva 1", "nothing-matches"):
+            report("mapped", size, f"search '{query}'", measure(lambda: store.search(query)))
+        store.close()
+
+
+@benchmark("filter")
+def bench_filter(sizes, workdir):
+    from academic_contacts.modules.store   import ContactStore
+    from academic_contacts.modules.contact import to_contacts
+    from academic_contacts.modules.query   import parse_query
+
+    for size in sizes:
+        store = ContactStore(to_contacts(make_contacts(size)))
+        index = store.search_index
+
+        def search(query):
+            # Sem o atalho da consulta anterior
+            index._forget_last()
+            store.search(query)
+
+        for query in ("silva", "silva 1", "müller 12", "federal university 1", "nothing-matches"):
+            report("filter", size, f"search '{query}'", measure(lambda: search(query)))
+
+        def typing():
+            index._forget_last()
+            for n in range(1, len("pujaico") + 1):
+                store.search("pujaico"[:n])
+
+        report("filter", size, "typing 'pujaico' (7 searches)", measure(typing))
+
+        for text in ("org:federal silva", "country:bra si"):
+            query = parse_query(text)
+            report("filter", size, f"search '{text}'", measure(lambda: (index._forget_last(), query.search(store))))
+
+        def in_chunks(text):
+            # Como o ContactSearcher: a cópia na thread da janela, as partes na outra
+            chunks = parse_query(text).search_chunks(store)
+            return [cid for chunk in chunks or () for cid in chunk()]
+
+        report("filter", size, "search 'si' in chunks", measure(lambda: in_chunks("si")))
+
+
+def offscreen_window(workdir):
+    """
+    Main window on the offscreen Qt platform, with its config in `workdir`.
+    """
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtWidgets import QApplication
+    import academic_contacts.program as program
+
+    program.CONFIG = program.configure.Config(os.path.join(workdir, "config.json"))
+    program.SNAPSHOT_DIR = os.path.join(workdir, "snapshots")
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    win = program.AcademicContactsApp()
+    win.resize(700, 900)
+    win.show()
+    app.processEvents()
+    return app, win
+
+@benchmark("gui")
+def bench_gui(sizes, workdir):
+    from PyQt5.QtCore import QEventLoop
+
+    app, win = offscreen_window(workdir)
+    view = win.card_view
+    for size in sizes:
+        path = os.path.join(workdir, f"bench{size}.AcademicContacts.json")
+        write_contacts(path, size)
+
+        def load():
+            loop = QEventLoop()
+            win.load_file(path)
+            win.loader.finished.connect(loop.quit)
+            loop.exec_()
+            app.processEvents()
+
+        def refresh():
+            win.refresh_cards()
+            view.viewport().repaint()
+
+        def scroll():
+            # Cards que ainda não foram pintados
+            bar = view.verticalScrollBar()
+            bar.setValue((bar.value() + view.viewport().height() * 7) % max(bar.maximum(), 1))
+            view.viewport().repaint()
+
+        def edit_one():
+            cid = view.card_model.rows[0]
+            contact = win.contacts.get(cid).copy()
+            contact.name += "x"
+            win.contacts.replace(cid, contact)
+            win.show_changes(changed=[cid])
+            view.viewport().repaint()
+
+        def filter_and_clear():
+            win.filter_edit.setText("silva 1")
+            refresh()
+            win.filter_edit.setText("")
+            refresh()
+
+        report("gui", size, "load_file (until finished)", measure(load, repeat=1))
+        for writer in list(win.snapshot_writers.values()):
+            writer.wait()
+            win.finish_snapshot(writer)
+        report("gui", size, "load_file again (snapshot)", measure(load, repeat=1))
+        report("gui", size, "refresh_cards + paint", measure(refresh))
+        report("gui", size, "scroll a page + paint", measure(scroll))
+        report("gui", size, "edit one card + paint", measure(edit_one))
+        report("gui", size, "filter + clear + paint", measure(filter_and_clear))
+
+        def order(sort, group):
+            win.card_order.configure(sort, group)
+            view.set_order(win.card_order)
+            app.processEvents()
+
+        report("gui", size, "sort by surname (first time)", measure(lambda: order(["surname"], ""), repeat=1))
+        report("gui", size, "sort by surname + country", measure(lambda: order(["surname", "country"], "")))
+        report("gui", size, "group by country", measure(lambda: order(["surname"], "country")))
+        order([], "")
+
+        win.current_file = path
+        report("gui", size, "save_file (until finished)",
+               measure(lambda: (win.save_file(), win.saver.wait(), win.finish_save())))
+        win.new_file()
+    win.close()
+
+
+@benchmark("export")
+def bench_export(sizes, workdir):
+    from academic_contacts.modules.contact import to_contacts
+    from academic_contacts.modules.latex   import latex_escape, TEMPLATES
+
+    for size in sizes:
+        contacts = to_contacts(make_contacts(size))
+        values = [value for contact in contacts for value in contact.values()]
+        report("export", size, "latex_escape (all fields)", measure(lambda: [latex_escape(v) for v in values]))
+        for name, template in sorted(TEMPLATES.items()):
+            report("export", size, name, measure(lambda: template.render(contacts)))
+
+    # Collaboration: 300 authors from 40 institutions, each written in a few ways
+    from academic_contacts.modules.affiliations import AffiliationIndex
+    rnd = random.Random(1)
+    spellings = [lambda org: org, lambda org: org.replace("University", "Univ."),
+                 lambda org: org.upper(), lambda org: org.replace("Center", "Centre") + "."]
+    authors = to_contacts(make_contacts(300))
+    for i, contact in enumerate(authors):
+        k = rnd.randrange(40)
+        contact.organization = rnd.choice(spellings)(f"{ORGS[k % len(ORGS)]} {k}")
+        contact.city, contact.country = CITIES[k % len(CITIES)]
+        contact.postcode = ""
+    # Os campos que o MDPI imprime
+    fields = ("organization", "city", "country")
+    numbers, first = AffiliationIndex().number(authors, fields)
+    report("export", len(authors), f"index: {len(first)} affiliations", measure(lambda: AffiliationIndex().number(authors, fields)))
+    report("export", len(authors), "mdpi", measure(lambda: TEMPLATES["mdpi"].render(authors)))
+
+    # Author lists: 50 lists of 30 authors; one contact changes between exports
+    from academic_contacts.modules.store       import ContactStore
+    from academic_contacts.modules.authorlists import AuthorLists
+    store = ContactStore(to_contacts(make_contacts(max(sizes))))
+    lists = AuthorLists()
+    for k in range(50):
+        lists.add(f"paper {k}", [store.id_at(rnd.randrange(len(store))) for _ in range(30)])
+
+    def export_all(clear):
+        for author_list in lists:
+            if clear:
+                author_list._cache.clear()
+            author_list.export(store, "elsevier")
+
+    def edit_one():
+        cid = lists.lists[0].ids[0]
+        contact = store.get(cid).copy()
+        contact.city += "x"
+        store.replace(cid, contact)
+        export_all(False)
+
+    report("export", len(store), "50 author lists, uncached", measure(lambda: export_all(True)))
+    report("export", len(store), "50 author lists, cached", measure(lambda: export_all(False)))
+    report("export", len(store), "50 author lists, one author edited", measure(edit_one))
+
+
+
+SYLLABLES = ["ka", "lo", "mi", "ra", "ten", "su", "vo", "der", "an", "bel", "cor", "di", "ge", "ho",
+             "jun", "li", "mar", "ne", "per", "qui", "ros", "tan", "ul", "ver", "wei", "xa", "yo", "zen"]
+
+def make_people(n, duplicates=0.05, seed=0):
+    """
+    Contacts with varied surnames, plus `duplicates` * n copies of random
+    contacts with a typo in the name and, for half of them, the email in
+    upper case.
+    """
+    rnd = random.Random(seed)
+    first_names = FIRST_NAMES + [a + b for a in ("Al", "Be", "Ca", "Da", "El", "Fa", "Gi", "Ha", "Iv", "Ja")
+                                 for b in ("ex", "ra", "min", "na", "lia", "ton", "vi", "us")]
+    contacts = []
+    for i in range(n):
+        first = rnd.choice(first_names)
+        last = "".join(rnd.choice(SYLLABLES) for _ in range(rnd.randint(3, 4))).capitalize()
+        city, country = rnd.choice(CITIES)
+        contacts.append({
+            "name": f"{first} {last}",
+            "email": f"{first.lower()}.{last.lower()}{i}@example.org",
+            "organization": f"{rnd.choice(ORGS)} {rnd.randrange(400)}",
+            "city": city,
+            "country": country,
+        })
+    for _ in range(int(n * duplicates)):
+        contact = dict(rnd.choice(contacts[:n]))
+        name = list(contact["name"])
+        name[rnd.randrange(len(name) // 2, len(name))] = "x"
+        contact["name"] = "".join(name)
+        if rnd.random() < 0.5:
+            contact["email"] = contact["email"].upper()
+        contacts.append(contact)
+    return contacts
+
+@benchmark("dedup")
+def bench_dedup(sizes, workdir):
+    import math
+    from academic_contacts.modules.contact import to_contacts
+    from academic_contacts.modules.dedup   import find_duplicates, candidate_pairs, _Entry
+
+    previous = None
+    for size in sizes:
+        items = list(enumerate(to_contacts(make_people(size))))
+        groups = []
+        ms = measure(lambda: groups.append(find_duplicates(items)), repeat=1)
+        pairs = sum(1 for _ in candidate_pairs([_Entry(cid, contact) for cid, contact in items]))
+        all_pairs = len(items) * (len(items) - 1) // 2
+        report("dedup", size, f"find: {len(groups[0])} groups", ms)
+        print(f"{'':<10} {'':>9} {pairs} pairs compared ({pairs / len(items):.1f} per contact, "
+              f"{100 * pairs / all_pairs:.4f}% of all pairs)")
+        if previous is not None:
+            # 1 = linear, 2 = all pairs
+            exponent = math.log(ms / previous[1]) / math.log(size / previous[0])
+            print(f"{'':<10} {'':>9} growth exponent from {previous[0]}: {exponent:.2f}")
+        previous = (size, ms)
+
+
+# Child process for the startup benchmark: same steps as program.main(),
+# stops at the first paint of the main window
+FIRST_PAINT_SCRIPT = '''
+import os, sys, time
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt5.QtCore import QObject, QEvent
+from PyQt5.QtWidgets import QApplication
+import academic_contacts.program as program
+
+class FirstPaint(QObject):
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint:
+            print("painted", flush=True)
+            os._exit(0)
+        return False
+
+app = QApplication(sys.argv)
+win = program.AcademicContactsApp()
+first_paint = FirstPaint()
+win.installEventFilter(first_paint)
+win.show()
+app.exec_()
+'''
+
+@benchmark("startup")
+def bench_startup(sizes, workdir):
+    import subprocess
+
+    env = dict(os.environ, HOME=workdir, PYTHONPATH=str(here))
+
+    # python -X importtime: cumulative import time of each module
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import academic_contacts.program"],
+                            env=env, capture_output=True, text=True, check=True)
+    modules = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line[len("import time:"):].split("|")
+            if cumulative.strip().isdigit():
+                modules[name.strip()] = int(cumulative) / 1000
+    for name in ("academic_contacts.program", "PyQt5.QtWidgets", "academic_contacts.modules.store",
+                 "academic_contacts.modules.sqlstore", "academic_contacts.desktop"):
+        if name in modules:
+            report("startup", "-", f"import {name.replace('academic_contacts.', '')}", modules[name])
+
+    def first_paint():
+        subprocess.run([sys.executable, "-c", FIRST_PAINT_SCRIPT], env=env, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    report("startup", "-", "process start to first paint", measure(first_paint))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks of academic_contacts")
+    parser.add_argument("names", nargs="*", help=f"benchmarks to run: {', '.join(sorted(BENCHMARKS))} (default: all)")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 10000, 100000],
+                        help="number of contacts (up to 1000000)")
+    parser.add_argument("--save", metavar="FILE", help="write the results to a JSON file")
+    parser.add_argument("--compare", metavar="FILE", help="report regressions against a file written by --save")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="slowdown reported as a regression (default 0.25 = 25%%)")
+    args = parser.parse_args()
+
+    names = args.names or sorted(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            parser.error(f"unknown benchmark '{name}'")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in names:
+            BENCHMARKS[name](args.sizes, workdir)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(RESULTS, f, indent=1, ensure_ascii=False)
+    if args.compare and compare(args.compare, args.threshold):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
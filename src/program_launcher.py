@@ -32,7 +32,7 @@ os.environ["QT_QPA_PLATFORM_PLUGIN_PATH"] = QLibraryInfo.location(
 )
 
 
-from academic_contacts.program import main
+from academic_contacts.__main__ import main
 
 if __name__ == "__main__":
     main()
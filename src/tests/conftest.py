@@ -0,0 +1,5 @@
+import sys
+import pathlib
+
+# Os testes importam o pacote direto de src/, sem instalar
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent.resolve()))
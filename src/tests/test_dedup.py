@@ -0,0 +1,22 @@
+from academic_contacts.modules.contact import Contact
+from academic_contacts.modules.dedup   import find_duplicates, merge_contacts
+
+
+def items(*contacts):
+    return [(cid, Contact.from_dict(data)) for cid, data in enumerate(contacts, start=1)]
+
+
+def test_null_fields_do_not_break_the_search():
+    groups = find_duplicates(items(
+        {"name": "Ana Silva", "email": None, "orcid": None, "organization": None},
+        {"name": "Ana Silva", "email": "ana@uni.edu", "orcid": "", "organization": "UFES"},
+        {"name": None, "email": "ana@uni.edu"},
+    ))
+    assert [group.ids for group in groups] == [[1, 2, 3]]
+
+
+def test_merge_with_null_and_numeric_fields():
+    merged = merge_contacts([Contact.from_dict({"name": "Ana", "email": None, "postcode": 29075}),
+                             Contact.from_dict({"name": "Ana", "email": "ana@uni.edu", "postcode": "29075-910"})])
+    assert merged.get("email") == "ana@uni.edu"
+    assert merged.get("postcode") == 29075
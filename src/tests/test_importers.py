@@ -0,0 +1,24 @@
+import json
+
+from academic_contacts.modules.contact   import Contact
+from academic_contacts.modules.importers import ImportFilter, read_source
+
+
+def test_import_into_a_list_with_null_fields(tmp_path):
+    existing = [Contact.from_dict({"name": "Ana Silva", "email": None, "orcid": None, "organization": None}),
+                Contact.from_dict({"name": "Bruno Alves", "email": "bruno@uni.edu"})]
+    path = tmp_path / "new.AcademicContacts.json"
+    path.write_text(json.dumps([
+        {"name": "Ana Silva", "email": None},
+        {"name": "Bruno", "email": " Bruno@Uni.edu "},
+        {"name": "Carla  Souza", "email": None, "orcid": None, "postcode": 29075},
+    ]), encoding="utf-8")
+
+    _, contacts, error = read_source(str(path))
+    assert error is None
+    seen = ImportFilter(existing)
+    new = [contact for contact in contacts if seen.add(contact)]
+
+    assert [contact.get("name") for contact in new] == ["Carla Souza"]
+    assert new[0].get("email") == ""
+    assert new[0].get("postcode") == "29075"
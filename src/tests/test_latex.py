@@ -0,0 +1,43 @@
+import pytest
+
+from academic_contacts.modules.contact import Contact
+from academic_contacts.modules.latex   import ELSEVIER_TEMPLATE, MDPI_TEMPLATE, compile_format
+
+
+@pytest.mark.parametrize("fmt", [
+    "{name}",
+    "'{name}' \\n {{literal}} 100%",
+    "\\author[{aff}]{{{name}}}\n\\ead{{{email}}}\n",
+    "{name}, {email}; {aff} and {name}",
+    "{name!r}|{aff:>4}",
+    "no fields {{}}",
+])
+def test_compile_format_matches_format_map(fmt):
+    ctx = {"name": "O'Brien \\ {x}", "email": "a%s@b.c", "aff": 2}
+    assert compile_format(fmt)(ctx) == fmt.format_map(ctx)
+
+
+@pytest.mark.parametrize("fmt", [
+    "{name.__class__}",
+    "{name[0]}",
+    "{0}",
+    "{name!z}",
+    "{name:{aff}}",
+    "{name",
+])
+def test_compile_format_rejects_bad_fields(fmt):
+    with pytest.raises(ValueError):
+        compile_format(fmt)
+
+
+def test_render_with_null_fields():
+    data = [{"name": "Ana Silva", "email": None, "organization": "UFRJ"},
+            {"name": "Bruno Alves", "email": "b@ufrj.br", "organization": "UFRJ", "orcid": None}]
+    assert "Ana Silva" in MDPI_TEMPLATE.render(data)
+    assert "Ana Silva" in MDPI_TEMPLATE.render([Contact.from_dict(entry) for entry in data])
+
+
+def test_render_null_required_field():
+    data = [{"name": None, "email": "a@ufrj.br", "organization": "UFRJ"}]
+    with pytest.raises(ValueError, match="name"):
+        ELSEVIER_TEMPLATE.render(data)
@@ -0,0 +1,21 @@
+from academic_contacts.modules.contact import Contact
+from academic_contacts.modules.store   import ContactStore
+from academic_contacts.modules.sorting import CardOrder, GroupHeader
+
+
+def make_store(*contacts):
+    return ContactStore([Contact.from_dict(data) for data in contacts])
+
+
+def test_sort_by_surname_with_null_name():
+    store = make_store({"name": "Ana Silva"}, {"name": None}, {"name": "Bruno Alves"})
+    rows, numbers = CardOrder(sort=("surname",)).arrange(store, list(store.ids))
+    assert [store.get(cid).get("name") for cid in rows] == ["Bruno Alves", "Ana Silva", None]
+    assert numbers is None
+
+
+def test_group_by_null_field():
+    store = make_store({"name": "Ana", "country": None}, {"name": "Bruno", "country": "Brazil"})
+    rows, _ = CardOrder(sort=("name",), group="country").arrange(store, list(store.ids))
+    titles = [row.title for row in rows if isinstance(row, GroupHeader)]
+    assert titles == ["Brazil", "(no country)"]